@@ -1,13 +1,22 @@
 from .gcs_client import GCSClient
 from .task_client import TaskClient
 from .gemini_client import GeminiClient
+from .llm_gateway import LLMGateway, LLMGatewayError, LLMUnavailableError, LLMDeadlineError
 from .rapidapi_client import RapidAPIClient
 from .supabase_client import SupabaseClient
+from .ocr_cache import OCRCache, DatabaseOCRCacheBackend, GCSOCRCacheBackend
 
 __all__ = [
     'GCSClient',
     'TaskClient',
     'GeminiClient',
+    'LLMGateway',
+    'LLMGatewayError',
+    'LLMUnavailableError',
+    'LLMDeadlineError',
     'RapidAPIClient',
-    'SupabaseClient'
+    'SupabaseClient',
+    'OCRCache',
+    'DatabaseOCRCacheBackend',
+    'GCSOCRCacheBackend'
 ]
@@ -1,12 +1,16 @@
 import logging
+import os
 import datetime
 import hmac
 import hashlib
 import urllib.parse
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterable, List, Dict
 from google.cloud import storage
 import google.auth
 import google.auth.transport.requests
+from requests.adapters import HTTPAdapter
 
 from app.config.settings import settings
 
@@ -17,10 +21,28 @@ class GCSClient:
 
     def __init__(self):
         self.bucket_name = settings.BUCKET_NAME
-        self.storage_client = storage.Client()
+        self.storage_client = self._build_storage_client(settings.GCS_UPLOAD_CONCURRENCY)
         self.bucket = self.storage_client.bucket(self.bucket_name)
         log.info(f"GCSClient inicializado con bucket: {self.bucket_name}")
 
+    @staticmethod
+    def _build_storage_client(pool_size: int) -> storage.Client:
+
+        # Las subidas concurrentes comparten la sesión HTTP del cliente; el pool por
+        # defecto (10 conexiones) descartaría conexiones con más hilos que eso. La sesión
+        # se entrega al constructor en lugar de modificar la que crea el cliente.
+        try:
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+        except Exception as e:
+            log.warning(f"No se pudo configurar el pool de conexiones de GCS, se usa el cliente por defecto: {e}")
+            return storage.Client()
+
+        session = google.auth.transport.requests.AuthorizedSession(credentials)
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(10, pool_size)))
+
+        kwargs = {"project": project} if project else {}
+        return storage.Client(credentials=credentials, _http=session, **kwargs)
+
     def generate_signed_upload_url(
             self,
             filename: str,
@@ -85,6 +107,43 @@ class GCSClient:
             log.error(f"Error al subir archivo {destination_blob_name}: {e}")
             raise
 
+    def upload_blobs(
+            self,
+            uploads: Iterable[Dict],
+            max_workers: Optional[int] = None
+    ) -> List[Dict]:
+
+        max_workers = max(1, max_workers or settings.GCS_UPLOAD_CONCURRENCY)
+        max_pendientes = max_workers * 2
+
+        def _upload(item: Dict) -> Dict:
+            destination = item["destination_blob_name"]
+            try:
+                uri = self.upload_blob(
+                    item["source_bytes"],
+                    destination,
+                    content_type=item.get("content_type", "application/pdf")
+                )
+                return {"destination_blob_name": destination, "uri": uri, "error": None}
+            except Exception as e:
+                return {"destination_blob_name": destination, "uri": None, "error": str(e)}
+
+        # Acepta generadores: como máximo max_pendientes subidas retienen sus bytes a la vez.
+        results = []
+        pendientes = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for item in uploads:
+                pendientes.append(executor.submit(_upload, item))
+                if len(pendientes) >= max_pendientes:
+                    results.append(pendientes.popleft().result())
+            while pendientes:
+                results.append(pendientes.popleft().result())
+
+        if results:
+            failed = sum(1 for r in results if r["error"])
+            log.info(f"Subida múltiple a GCS: {len(results) - failed}/{len(results)} archivos subidos")
+        return results
+
     def download_blob(self, source_blob_name: str) -> bytes:
 
         try:
@@ -97,6 +156,17 @@ class GCSClient:
             log.error(f"Error al descargar archivo {source_blob_name}: {e}")
             raise
 
+    def download_blob_to_file(self, source_blob_name: str, destination_path: str) -> None:
+
+        try:
+            blob = self.bucket.blob(source_blob_name)
+            blob.download_to_filename(destination_path)
+
+            log.info(f"Archivo descargado de GCS a disco: {source_blob_name} ({os.path.getsize(destination_path)} bytes)")
+        except Exception as e:
+            log.error(f"Error al descargar archivo {source_blob_name}: {e}")
+            raise
+
     def blob_exists(self, blob_name: str) -> bool:
 
         try:
@@ -4,17 +4,18 @@ from typing import List, Dict, Optional
 import google.generativeai as genai
 from google.cloud import secretmanager
 import json
-import base64
-from PIL import Image
-import io
+
+from app.extractors.image_record import ImageRecord
+from .llm_gateway import LLMGateway
 
 log = logging.getLogger(__name__)
 
 
 class GeminiClient:
 
-    def __init__(self):
+    def __init__(self, gateway: Optional[LLMGateway] = None):
 
+        self.gateway = gateway or LLMGateway()
         api_key = self._get_api_key_from_secret()
 
         if not api_key:
@@ -59,14 +60,14 @@ class GeminiClient:
             log.exception(f"EXCEPCIÓN AL LEER SECRET MANAGER: {str(e)}")
             return None
 
-    def analyze_images(self, images_base64: List[str], tema: str, descripcion_tema: str) -> Optional[Dict]:
+    def analyze_images(self, images: List[ImageRecord], tema: str, descripcion_tema: str) -> Optional[Dict]:
 
         if not self.is_ready:
             log.error("Intento de análisis bloqueado: El cliente no se inicializó correctamente (Falta Key).")
             return None
 
         try:
-            images_to_analyze = images_base64[:10]
+            images_to_analyze = images[:10]
             log.info(f"Enviando {len(images_to_analyze)} imágenes a Gemini...")
 
             prompt = f"""
@@ -76,18 +77,13 @@ class GeminiClient:
             """
 
             image_parts = []
-            for img_b64 in images_to_analyze:
-                try:
-                    img_bytes = base64.b64decode(img_b64)
-                    img = Image.open(io.BytesIO(img_bytes))
-                    image_parts.append(img)
-                except Exception as e:
-                    continue
+            for imagen in images_to_analyze:
+                image_parts.append(imagen.to_gemini_part())
 
             if not image_parts:
                 return None
 
-            response = self.model.generate_content([prompt] + image_parts)
+            response = self.gateway.generate(self.model, [prompt] + image_parts)
 
             text = response.text.strip()
             if text.startswith("```json"):
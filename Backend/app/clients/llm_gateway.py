@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from app.config.settings import settings
+from .rate_limiter import TokenBucket
+
+log = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = (429, 500, 503, 504)
+
+# Estimación previa a la llamada: ~4 caracteres por token y coste fijo por imagen en Gemini.
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE = 258
+
+
+class LLMGatewayError(RuntimeError):
+    pass
+
+
+class LLMUnavailableError(LLMGatewayError):
+    pass
+
+
+class LLMDeadlineError(LLMGatewayError):
+    pass
+
+
+def llm_status_code(error: Exception) -> Optional[int]:
+
+    if isinstance(error, google_exceptions.GoogleAPICallError):
+        return error.code
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return 503
+    return None
+
+
+def is_transient_llm_error(error: Exception) -> bool:
+
+    # Cuota, caída o plazo: reintentar más tarde puede funcionar, a diferencia de un error de contenido.
+    return isinstance(error, LLMGatewayError) or llm_status_code(error) in RETRYABLE_STATUS
+
+
+class _CircuitBreaker:
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+
+        if self.failure_threshold <= 0:
+            return True
+
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            ahora = time.monotonic()
+            if ahora - self._opened_at < self.cooldown:
+                return False
+            # Semiabierto: pasa una llamada de prueba y el resto espera otro enfriamiento.
+            self._opened_at = ahora
+            return True
+
+    def record_success(self) -> None:
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> bool:
+
+        with self._lock:
+            self._failures += 1
+            if self.failure_threshold <= 0 or self._failures < self.failure_threshold:
+                return False
+            recien_abierto = self._opened_at is None
+            self._opened_at = time.monotonic()
+            return recien_abierto
+
+
+class _ModelLimits:
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            requests_per_minute: float,
+            tokens_per_minute: float,
+            failure_threshold: int,
+            cooldown: float
+    ):
+
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.requests = TokenBucket(rate_per_second=requests_per_minute / 60.0, capacity=max_concurrency)
+        self.tokens = TokenBucket(rate_per_second=tokens_per_minute / 60.0, capacity=tokens_per_minute)
+        self.breaker = _CircuitBreaker(failure_threshold, cooldown)
+
+
+class LLMGateway:
+
+    def __init__(
+            self,
+            max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+            requests_per_minute: float = settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute: float = settings.LLM_TOKENS_PER_MINUTE,
+            max_retries: int = settings.LLM_MAX_RETRIES,
+            request_timeout: float = settings.LLM_REQUEST_TIMEOUT,
+            deadline: float = settings.LLM_DEADLINE_SECONDS,
+            circuit_failures: int = settings.LLM_CIRCUIT_FAILURES,
+            circuit_cooldown: float = settings.LLM_CIRCUIT_COOLDOWN
+    ):
+
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max(0, max_retries)
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+        self.circuit_failures = circuit_failures
+        self.circuit_cooldown = circuit_cooldown
+        self._limits: Dict[str, _ModelLimits] = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, model_name: str) -> _ModelLimits:
+
+        with self._lock:
+            limits = self._limits.get(model_name)
+            if limits is None:
+                limits = _ModelLimits(
+                    self.max_concurrency,
+                    self.requests_per_minute,
+                    self.tokens_per_minute,
+                    self.circuit_failures,
+                    self.circuit_cooldown
+                )
+                self._limits[model_name] = limits
+            return limits
+
+    @staticmethod
+    def estimate_tokens(contents: List[Any]) -> int:
+
+        total = 0
+        for parte in contents:
+            if isinstance(parte, str):
+                total += len(parte) // CHARS_PER_TOKEN
+            elif isinstance(parte, dict) and "data" in parte:
+                total += TOKENS_PER_IMAGE
+        return max(1, total)
+
+    @staticmethod
+    def _status_code(error: Exception) -> Optional[int]:
+        return llm_status_code(error)
+
+    def is_retryable(self, error: Exception) -> bool:
+        return self._status_code(error) in RETRYABLE_STATUS
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+
+        # Jitter completo, como en RapidAPIClient; el 429 arranca más alto porque es cuota agotada.
+        base = 4.0 if self._status_code(error) == 429 else 1.0
+        return random.uniform(0, min(60.0, base * (2 ** attempt)))
+
+    def generate(
+            self,
+            model,
+            contents: List[Any],
+            deadline: Optional[float] = None,
+            consume: Optional[Callable[[Any], Any]] = None,
+            **kwargs
+    ):
+
+        # `consume` procesa la respuesta (p. ej. un stream) dentro del turno y de los reintentos.
+        model_name = getattr(model, "model_name", None) or "default"
+        limits = self._limits_for(model_name)
+        fin = time.monotonic() + (deadline or self.deadline)
+        estimados = self.estimate_tokens(contents)
+        request_options = dict(kwargs.pop("request_options", None) or {})
+
+        for attempt in range(self.max_retries + 1):
+            if not limits.breaker.allow():
+                raise LLMUnavailableError(f"Circuito abierto para {model_name}; se rechaza la llamada")
+
+            # La cuota se espera antes de ocupar el semáforo para no bloquear a otras llamadas mientras tanto.
+            try:
+                limits.requests.acquire(timeout=max(0.0, fin - time.monotonic()))
+            except TimeoutError:
+                raise LLMDeadlineError(f"Plazo agotado esperando cuota de peticiones para {model_name}")
+            try:
+                limits.tokens.acquire(estimados, timeout=max(0.0, fin - time.monotonic()))
+            except TimeoutError:
+                limits.requests.release(1)
+                raise LLMDeadlineError(f"Plazo agotado esperando cuota de tokens para {model_name}")
+
+            restante = fin - time.monotonic()
+            if restante <= 0 or not limits.semaphore.acquire(timeout=restante):
+                limits.requests.release(1)
+                limits.tokens.release(estimados)
+                raise LLMDeadlineError(f"Plazo agotado esperando turno para {model_name}")
+
+            try:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    raise LLMDeadlineError(f"Plazo agotado esperando turno para {model_name}")
+
+                request_options["timeout"] = min(self.request_timeout, restante)
+
+                inicio = time.monotonic()
+                response = model.generate_content(contents, request_options=request_options, **kwargs)
+                resultado = consume(response) if consume else response
+
+                usados = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+                if usados:
+                    limits.tokens.consume(usados - estimados)
+
+                limits.breaker.record_success()
+                log.debug(f"LLM {model_name}: {time.monotonic() - inicio:.1f}s, {usados or estimados} tokens")
+                return resultado
+
+            except LLMGatewayError:
+                raise
+            except Exception as e:
+                if not self.is_retryable(e):
+                    # El servicio respondió (p. ej. 400 por contenido inválido): no cuenta como caída.
+                    limits.breaker.record_success()
+                    raise
+
+                if limits.breaker.record_failure():
+                    log.error(f"Circuito abierto para {model_name} tras fallos consecutivos ({e})")
+
+                delay = self._backoff_delay(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= fin:
+                    raise
+
+                log.warning(f"LLM {model_name}: HTTP {self._status_code(e)}, reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+            finally:
+                limits.semaphore.release()
+
+            time.sleep(delay)
+
+    async def generate_async(
+            self,
+            model,
+            contents: List[Any],
+            deadline: Optional[float] = None,
+            consume: Optional[Callable[[Any], Any]] = None,
+            **kwargs
+    ):
+
+        return await asyncio.to_thread(self.generate, model, contents, deadline, consume, **kwargs)
@@ -0,0 +1,128 @@
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict
+
+log = logging.getLogger(__name__)
+
+
+class DatabaseOCRCacheBackend:
+
+    def get(self, key: str) -> Optional[str]:
+
+        from app.config.database import SessionLocal
+        from app.models.ocr_cache import OcrCacheEntry
+
+        db = SessionLocal()
+        try:
+            entry = db.query(OcrCacheEntry).filter(OcrCacheEntry.hash == key).first()
+            return entry.texto if entry else None
+        finally:
+            db.close()
+
+    def set(self, key: str, texto: str) -> None:
+
+        from app.config.database import SessionLocal
+        from app.models.ocr_cache import OcrCacheEntry
+
+        db = SessionLocal()
+        try:
+            db.merge(OcrCacheEntry(hash=key, texto=texto))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class GCSOCRCacheBackend:
+
+    def __init__(self, gcs_client, prefix: str = "ocr_cache"):
+        self.gcs_client = gcs_client
+        self.prefix = prefix.rstrip("/")
+
+    def _blob_name(self, key: str) -> str:
+        return f"{self.prefix}/{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+
+        blob_name = self._blob_name(key)
+        if not self.gcs_client.blob_exists(blob_name):
+            return None
+        return self.gcs_client.download_blob(blob_name).decode("utf-8")
+
+    def set(self, key: str, texto: str) -> None:
+        self.gcs_client.upload_blob(texto.encode("utf-8"), self._blob_name(key), content_type="text/plain")
+
+
+class OCRCache:
+
+    def __init__(self, max_entries: int = 2048, backend=None):
+
+        self.max_entries = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+
+        with self._lock:
+            texto = self._entries.get(key)
+            if texto is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return texto
+
+        if self.backend:
+            try:
+                texto = self.backend.get(key)
+            except Exception as e:
+                log.warning(f"Error al leer caché OCR persistente ({key[:12]}): {e}")
+                texto = None
+
+            if texto is not None:
+                self._remember(key, texto)
+                with self._lock:
+                    self.persistent_hits += 1
+                return texto
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, texto: str) -> None:
+
+        self._remember(key, texto)
+
+        if self.backend:
+            try:
+                self.backend.set(key, texto)
+            except Exception as e:
+                log.warning(f"Error al escribir caché OCR persistente ({key[:12]}): {e}")
+
+    def _remember(self, key: str, texto: str) -> None:
+
+        with self._lock:
+            self._entries[key] = texto
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+
+        with self._lock:
+            return {
+                "entradas": len(self._entries),
+                "hits": self.hits,
+                "hits_persistentes": self.persistent_hits,
+                "misses": self.misses
+            }
@@ -1,28 +1,69 @@
 import logging
+import random
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
 from app.config.settings import settings
+from .ocr_cache import OCRCache
+from .rate_limiter import TokenBucket
 
 log = logging.getLogger(__name__)
 
 
 class RapidAPIClient:
 
-    def __init__(self):
+    def __init__(self, cache: Optional[OCRCache] = None):
+        self.cache = cache
         self.api_key = settings.RAPIDAPI_KEY
         self.base_url = "https://pen-to-print-handwriting-ocr.p.rapidapi.com/recognize/"
         self.headers = {
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": "pen-to-print-handwriting-ocr.p.rapidapi.com"
         }
+        self.max_concurrency = max(1, settings.OCR_MAX_CONCURRENCY)
+        self.max_retries = max(0, settings.OCR_MAX_RETRIES)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+
+        self.rate_limiter = TokenBucket(
+            rate_per_second=settings.OCR_RATE_LIMIT_PER_MINUTE / 60.0,
+            capacity=self.max_concurrency
+        )
         log.info("RapidAPIClient inicializado para Pen-to-Print OCR")
 
     def ocr_image(
             self,
             image_bytes: bytes,
             src: str = "image_file",
-            session_id: str = "default_session"
+            session_id: str = "default_session",
+            image_format: str = "png"
+    ) -> Optional[str]:
+
+        if not self.cache:
+            return self._request_ocr(image_bytes, src=src, session_id=session_id, image_format=image_format)
+
+        key = OCRCache.key_for(image_bytes)
+        texto = self.cache.get(key)
+        if texto is not None:
+            log.info(f"OCR servido desde caché (session_id={session_id}, hash={key[:12]})")
+            return texto
+
+        texto = self._request_ocr(image_bytes, src=src, session_id=session_id, image_format=image_format)
+        if texto is not None:
+            self.cache.set(key, texto)
+        return texto
+
+    def _request_ocr(
+            self,
+            image_bytes: bytes,
+            src: str,
+            session_id: str,
+            image_format: str
     ) -> Optional[str]:
 
         try:
@@ -32,58 +73,99 @@ class RapidAPIClient:
                 "session_id": session_id
             }
 
+            image_format = "jpeg" if image_format.lower() in ("jpg", "jpeg") else "png"
             files = {
-                "srcImg": ("page.png", image_bytes, "image/png")
+                "srcImg": (f"page.{image_format}", image_bytes, f"image/{image_format}")
             }
 
             log.info(f"Llamando a OCR API (session_id={session_id}, tamaño={len(image_bytes)} bytes)")
 
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                params=querystring,
-                files=files,
-                timeout=60
-            )
-
-            response.raise_for_status()
+            response = self._post_with_retries(querystring, files, session_id)
 
             data = response.json()
 
             texto = data.get("value", "")
 
+            # None queda reservado para fallos; una página en blanco devuelve "" y no se reintenta.
             if texto:
                 log.info(f"OCR exitoso: {len(texto)} caracteres extraídos")
-                return texto
             else:
                 log.warning("OCR no devolvió texto")
-                return None
+            return texto or ""
 
         except requests.exceptions.Timeout:
             log.error("Timeout al llamar a OCR API")
             return None
         except requests.exceptions.HTTPError as e:
             log.error(f"Error HTTP al llamar a OCR API: {e}")
-            log.error(f"Respuesta: {response.text if response else 'N/A'}")
+            log.error(f"Respuesta: {e.response.text if e.response is not None else 'N/A'}")
             return None
         except Exception as e:
             log.error(f"Error inesperado al llamar a OCR API: {e}")
             return None
 
+    def _post_with_retries(self, querystring: dict, files: dict, session_id: str) -> requests.Response:
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+
+            try:
+                response = self.session.post(
+                    self.base_url,
+                    headers=self.headers,
+                    params=querystring,
+                    files=files,
+                    timeout=60
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+                log.warning(f"OCR {session_id}: {type(e).__name__}, reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                log.warning(f"OCR {session_id}: HTTP {response.status_code}, reintento {attempt + 1}/{self.max_retries} en {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response
+
+    @staticmethod
+    def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+
+        if retry_after:
+            try:
+                return min(60.0, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(30.0, 1.0 * (2 ** attempt)))
+
     def ocr_multiple_images(
             self,
             images_list: list,
             session_id: str = "default_session"
     ) -> list:
 
-        results = []
+        if not images_list:
+            return []
+
+        max_workers = min(self.max_concurrency, len(images_list))
+        log.info(f"Procesando {len(images_list)} imágenes con concurrencia máxima {max_workers}")
 
-        for i, img_bytes in enumerate(images_list):
-            log.info(f"Procesando imagen {i + 1}/{len(images_list)}")
-            texto = self.ocr_image(img_bytes, session_id=f"{session_id}_page_{i}")
-            results.append(texto)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.ocr_image, img_bytes, session_id=f"{session_id}_page_{i}")
+                for i, img_bytes in enumerate(images_list)
+            ]
+            results = [future.result() for future in futures]
 
         successful = sum(1 for r in results if r is not None)
         log.info(f"OCR completado: {successful}/{len(images_list)} imágenes procesadas exitosamente")
+        if self.cache:
+            log.info(f"Caché OCR: {self.cache.stats()}")
 
         return results
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+
+    def __init__(self, rate_per_second: float, capacity: float):
+
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> float:
+
+        if self.rate <= 0:
+            return 0.0
+
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+
+            # Si la espera no cabe en el plazo se abandona sin descontar nada del cubo.
+            if timeout is not None and waited + wait > timeout:
+                raise TimeoutError(f"Sin cupo en el cubo tras {waited:.1f}s (plazo {timeout:.1f}s)")
+
+            time.sleep(wait)
+            waited += wait
+
+    def consume(self, tokens: float) -> None:
+
+        # Descuenta sin esperar (el saldo puede quedar negativo): se usa para ajustar
+        # una estimación con el consumo real una vez conocido.
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+    def release(self, tokens: float) -> None:
+
+        # Devuelve un cupo adquirido que no llegó a usarse.
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + tokens)
@@ -2,7 +2,7 @@ import logging
 import json
 from typing import Dict, Any
 from google.cloud import tasks_v2
-from google.protobuf import timestamp_pb2
+from google.protobuf import duration_pb2, timestamp_pb2
 import datetime
 
 from app.config.settings import settings
@@ -31,7 +31,8 @@ class TaskClient:
             self,
             relative_uri: str,
             payload: Dict[Any, Any],
-            delay_seconds: int = 0
+            delay_seconds: int = 0,
+            dispatch_deadline_seconds: int = 0
     ) -> str:
 
         try:
@@ -57,6 +58,9 @@ class TaskClient:
                 timestamp.FromDatetime(d)
                 task["schedule_time"] = timestamp
 
+            if dispatch_deadline_seconds > 0:
+                task["dispatch_deadline"] = duration_pb2.Duration(seconds=dispatch_deadline_seconds)
+
             response = self.client.create_task(
                 request={
                     "parent": self.queue_path,
@@ -98,11 +102,13 @@ class TaskClient:
     def create_evaluation_task(
             self,
             evaluacion_id: int,
-            delay_seconds: int = 5
+            delay_seconds: int = 5,
+            bypass_cache: bool = False
     ) -> str:
 
         payload = {
-            "evaluacion_id": evaluacion_id
+            "evaluacion_id": evaluacion_id,
+            "bypass_cache": bypass_cache
         }
 
         return self.create_task(
@@ -110,3 +116,11 @@ class TaskClient:
             payload=payload,
             delay_seconds=delay_seconds
         )
+
+    def create_exam_batch_task(self, lote_id: int) -> str:
+
+        return self.create_task(
+            relative_uri="/process-exam-batch-task",
+            payload={"lote_id": lote_id},
+            dispatch_deadline_seconds=settings.LOTE_TASK_DEADLINE_SECONDS
+        )
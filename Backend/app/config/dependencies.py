@@ -10,11 +10,24 @@ from app.repositories import (
     EvaluacionRepository,
     ArchivoRepository,
     ResultadoRepository,
-    CursoRepository
+    CursoRepository,
+    LoteRepository,
+    ExtraccionCacheRepository,
+    RespuestaLLMCacheRepository
 )
 from app.middleware import FirebaseAuth
 
-from app.clients import GCSClient, TaskClient, GeminiClient, RapidAPIClient
+from app.clients import (
+    GCSClient,
+    TaskClient,
+    GeminiClient,
+    LLMGateway,
+    RapidAPIClient,
+    OCRCache,
+    DatabaseOCRCacheBackend,
+    GCSOCRCacheBackend
+)
+from app.config.settings import settings
 from app.extractors import TextExtractor, ImageExtractor, StudentNameMatcher
 from app.services.gemini_analyzer import GeminiAnalyzer
 from app.services.report_service import ReportService
@@ -34,13 +47,26 @@ def get_gcs_client() -> GCSClient:
 def get_task_client() -> TaskClient:
     return TaskClient()
 
+@lru_cache()
+def get_llm_gateway() -> LLMGateway:
+    return LLMGateway()
+
 @lru_cache()
 def get_gemini_client() -> GeminiClient:
-    return GeminiClient()
+    return GeminiClient(gateway=get_llm_gateway())
+
+@lru_cache()
+def get_ocr_cache() -> OCRCache:
+    backend = None
+    if settings.OCR_CACHE_BACKEND == "db":
+        backend = DatabaseOCRCacheBackend()
+    elif settings.OCR_CACHE_BACKEND == "gcs":
+        backend = GCSOCRCacheBackend(get_gcs_client())
+    return OCRCache(max_entries=settings.OCR_CACHE_MAX_ENTRIES, backend=backend)
 
 @lru_cache()
 def get_rapidapi_client() -> RapidAPIClient:
-    return RapidAPIClient()
+    return RapidAPIClient(cache=get_ocr_cache())
 
 @lru_cache()
 def get_text_extractor() -> TextExtractor:
@@ -48,7 +74,13 @@ def get_text_extractor() -> TextExtractor:
 
 @lru_cache()
 def get_image_extractor() -> ImageExtractor:
-    return ImageExtractor(max_images=100)
+    return ImageExtractor(
+        max_images=100,
+        max_edge=settings.IMAGE_MAX_EDGE,
+        photo_format=settings.IMAGE_PHOTO_FORMAT,
+        photo_quality=settings.IMAGE_PHOTO_QUALITY,
+        keep_original=settings.IMAGE_KEEP_ORIGINAL
+    )
 
 @lru_cache()
 def get_student_matcher() -> StudentNameMatcher:
@@ -56,7 +88,7 @@ def get_student_matcher() -> StudentNameMatcher:
 
 @lru_cache()
 def get_gemini_analyzer() -> GeminiAnalyzer:
-    return GeminiAnalyzer()
+    return GeminiAnalyzer(gateway=get_llm_gateway())
 
 @lru_cache()
 def get_report_service() -> ReportService:
@@ -77,6 +109,7 @@ def get_extraction_service(
     student_matcher: StudentNameMatcher = Depends(get_student_matcher)
 ) -> ExtractionService:
     archivo_repo = ArchivoRepository(db)
+    extraccion_cache_repo = ExtraccionCacheRepository(db) if settings.EXTRACTION_CACHE_ENABLED else None
     return ExtractionService(
         gcs_client=gcs_client,
         ocr_client=ocr_client,
@@ -84,7 +117,8 @@ def get_extraction_service(
         text_extractor=text_extractor,
         image_extractor=image_extractor,
         student_matcher=student_matcher,
-        archivo_repo=archivo_repo
+        archivo_repo=archivo_repo,
+        extraccion_cache_repo=extraccion_cache_repo
     )
 
 def get_analysis_service(
@@ -97,6 +131,7 @@ def get_analysis_service(
     resultado_repo = ResultadoRepository(db)
     rubrica_repo = RubricaRepository(db)
     evaluacion_repo = EvaluacionRepository(db)
+    respuesta_cache_repo = RespuestaLLMCacheRepository(db) if settings.LLM_CACHE_ENABLED else None
 
     return AnalysisService(
         evaluacion_repo=evaluacion_repo,
@@ -105,7 +140,8 @@ def get_analysis_service(
         resultado_repo=resultado_repo,
         gemini_analyzer=gemini_analyzer,
         gcs_client=gcs_client,
-        image_extractor=image_extractor
+        image_extractor=image_extractor,
+        respuesta_cache_repo=respuesta_cache_repo
     )
 
 def get_orchestrator_service(
@@ -118,6 +154,7 @@ def get_orchestrator_service(
     evaluacion_repo = EvaluacionRepository(db)
     rubrica_repo = RubricaRepository(db)
     curso_repo = CursoRepository(db)
+    lote_repo = LoteRepository(db)
     return OrchestratorService(
         evaluacion_repo=evaluacion_repo,
         rubrica_repo=rubrica_repo,
@@ -125,7 +162,8 @@ def get_orchestrator_service(
         gcs_client=gcs_client,
         task_service=task_service,
         ocr_client=ocr_client,
-        student_matcher=student_matcher
+        student_matcher=student_matcher,
+        lote_repo=lote_repo
     )
 
 async def get_token_from_header(authorization: Optional[str] = Header(None)) -> str:
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from app.config.settings import settings
+
+log = logging.getLogger(__name__)
+
+
+def _current_rss_mb() -> Optional[float]:
+
+    # Memoria residente actual (no el pico histórico de ru_maxrss, que nunca baja). /proc solo
+    # existe en Linux; en otros sistemas no se mide y no se recicla por memoria.
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _run_tracked(fn: Callable, args: Sequence, kwargs: dict) -> Tuple[Any, Optional[float]]:
+
+    resultado = fn(*args, **kwargs)
+    return resultado, _current_rss_mb()
+
+
+class CPUProcessPool:
+
+    def __init__(
+            self,
+            max_workers: int,
+            max_tasks_per_child: Optional[int] = None,
+            max_rss_mb: Optional[float] = None,
+            task_timeout: Optional[float] = None
+    ):
+
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.max_rss_mb = max_rss_mb or None
+        self.task_timeout = task_timeout or None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+
+        with self._lock:
+            if self._executor is None:
+                # spawn evita heredar hilos y conexiones del proceso web al hacer fork.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child
+                )
+                log.info(f"Pool de procesos iniciado con {self.max_workers} trabajadores")
+            return self._executor
+
+    def recycle(self, executor: Optional[ProcessPoolExecutor] = None, grace: Optional[float] = None) -> None:
+
+        # El ejecutor viejo deja de recibir tareas pero termina las que ya tiene; las nuevas van a
+        # uno nuevo. Con `grace`, pasado ese plazo se terminan los procesos que sigan vivos (una
+        # tarea colgada no debe retener un trabajador para siempre).
+        with self._lock:
+            if self._executor is None or (executor is not None and executor is not self._executor):
+                return
+            viejo, self._executor = self._executor, None
+
+        viejo.shutdown(wait=False, cancel_futures=False)
+        if grace is not None:
+            reaper = threading.Timer(grace, self._terminate, args=(viejo,))
+            reaper.daemon = True
+            reaper.start()
+        log.warning("Pool de procesos reciclado")
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor) -> None:
+
+        procesos = [p for p in list((getattr(executor, "_processes", None) or {}).values()) if p.is_alive()]
+        for proceso in procesos:
+            try:
+                proceso.terminate()
+            except Exception:
+                pass
+        if procesos:
+            log.warning(f"Terminados {len(procesos)} trabajadores de un pool reciclado que no terminaron a tiempo")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Tuple[ProcessPoolExecutor, Future]:
+
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(_run_tracked, fn, args, kwargs)
+        except BrokenProcessPool:
+            self.recycle(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(_run_tracked, fn, args, kwargs)
+
+    def result(self, submitted: Tuple[ProcessPoolExecutor, Future], timeout: Optional[float] = None) -> Any:
+
+        executor, future = submitted
+        timeout = timeout or self.task_timeout
+        try:
+            resultado, rss_mb = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Si aún no empezó basta con cancelarla; si está corriendo, el resto del trabajo en curso
+            # se deja terminar en el ejecutor viejo y solo después se matan sus procesos.
+            if future.cancel():
+                log.error(f"Tarea de CPU excedió {timeout}s esperando turno; cancelada")
+            else:
+                log.error(f"Tarea de CPU excedió {timeout}s en ejecución; se recicla el pool")
+                self.recycle(executor, grace=self.task_timeout or timeout)
+            raise TimeoutError(f"Tarea de CPU excedió {timeout}s")
+        except BrokenProcessPool:
+            self.recycle(executor)
+            raise
+
+        if self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb:
+            log.warning(f"Trabajador alcanzó {rss_mb:.0f} MB (límite {self.max_rss_mb:.0f} MB)")
+            self.recycle(executor)
+        return resultado
+
+    def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        return self.result(self.submit(fn, *args, **kwargs), timeout=timeout)
+
+    def run_many(
+            self,
+            fn: Callable,
+            args_list: Iterable[Sequence],
+            timeout: Optional[float] = None
+    ) -> List[Any]:
+
+        if not self.enabled:
+            return [fn(*args) for args in args_list]
+
+        enviados = [self.submit(fn, *args) for args in args_list]
+
+        # Un único plazo para todo el lote: cada espera recibe solo el tiempo que queda.
+        timeout = timeout or self.task_timeout
+        fin = time.monotonic() + timeout if timeout else None
+        resultados = []
+        for s in enviados:
+            restante = max(0.001, fin - time.monotonic()) if fin is not None else None
+            resultados.append(self.result(s, timeout=restante))
+        return resultados
+
+    async def run_async(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+
+        loop = asyncio.get_running_loop()
+        if not self.enabled:
+            return await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+        submitted = self.submit(fn, *args, **kwargs)
+        return await loop.run_in_executor(None, lambda: self.result(submitted, timeout=timeout))
+
+    def shutdown(self) -> None:
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[CPUProcessPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> CPUProcessPool:
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.CPU_POOL_WORKERS if settings.CPU_POOL_WORKERS >= 0 else (os.cpu_count() or 1)
+            _pool = CPUProcessPool(
+                max_workers=workers,
+                max_tasks_per_child=settings.CPU_POOL_MAX_TASKS_PER_CHILD,
+                max_rss_mb=settings.CPU_POOL_MAX_RSS_MB,
+                task_timeout=settings.CPU_POOL_TASK_TIMEOUT
+            )
+        return _pool
@@ -18,7 +18,67 @@ class Settings:
         "https://analitica-backend-511391059179.southamerica-east1.run.app"
     )
 
+    GCS_UPLOAD_CONCURRENCY: int = int(os.environ.get("GCS_UPLOAD_CONCURRENCY", "8"))
+    TASK_ENQUEUE_CONCURRENCY: int = int(os.environ.get("TASK_ENQUEUE_CONCURRENCY", "8"))
+
     RAPIDAPI_KEY: str = os.environ.get("RAPIDAPI_KEY")
+    OCR_MAX_CONCURRENCY: int = int(os.environ.get("OCR_MAX_CONCURRENCY", "8"))
+    OCR_RATE_LIMIT_PER_MINUTE: float = float(os.environ.get("OCR_RATE_LIMIT_PER_MINUTE", "60"))
+    OCR_MAX_RETRIES: int = int(os.environ.get("OCR_MAX_RETRIES", "3"))
+    OCR_CACHE_MAX_ENTRIES: int = int(os.environ.get("OCR_CACHE_MAX_ENTRIES", "2048"))
+    OCR_CACHE_BACKEND: str = os.environ.get("OCR_CACHE_BACKEND", "").lower()
+    OCR_ID_REGION: str = os.environ.get("OCR_ID_REGION", "0,0,1,0.35")
+    OCR_ID_DPI: int = int(os.environ.get("OCR_ID_DPI", "150"))
+    OCR_ID_FORMAT: str = os.environ.get("OCR_ID_FORMAT", "jpeg")
+    OCR_ID_GRAYSCALE: bool = os.environ.get("OCR_ID_GRAYSCALE", "true").lower() == "true"
+    OCR_ID_JPEG_QUALITY: int = int(os.environ.get("OCR_ID_JPEG_QUALITY", "75"))
+
+    PDF_TEXT_ENGINE: str = os.environ.get("PDF_TEXT_ENGINE", "pymupdf").lower()
+    PDF_PARALLEL_MIN_PAGES: int = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "32"))
+    PDF_PAGES_PER_CHUNK: int = int(os.environ.get("PDF_PAGES_PER_CHUNK", "16"))
+
+    CPU_POOL_WORKERS: int = int(os.environ.get("CPU_POOL_WORKERS", "-1"))
+    CPU_POOL_MAX_TASKS_PER_CHILD: int = int(os.environ.get("CPU_POOL_MAX_TASKS_PER_CHILD", "50"))
+    CPU_POOL_MAX_RSS_MB: float = float(os.environ.get("CPU_POOL_MAX_RSS_MB", "1024"))
+    CPU_POOL_TASK_TIMEOUT: float = float(os.environ.get("CPU_POOL_TASK_TIMEOUT", "300"))
+
+    EXTRACTION_STREAMING: bool = os.environ.get("EXTRACTION_STREAMING", "true").lower() == "true"
+    EXTRACTION_TEMP_DIR: str = os.environ.get("EXTRACTION_TEMP_DIR") or None
+    OCR_PAGE_WINDOW: int = int(os.environ.get("OCR_PAGE_WINDOW", "16"))
+    EXTRACTION_CACHE_ENABLED: bool = os.environ.get("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+
+    IMAGE_MAX_EDGE: int = int(os.environ.get("IMAGE_MAX_EDGE", "1536"))
+    IMAGE_PHOTO_FORMAT: str = os.environ.get("IMAGE_PHOTO_FORMAT", "jpeg").lower()
+    IMAGE_PHOTO_QUALITY: int = int(os.environ.get("IMAGE_PHOTO_QUALITY", "80"))
+    IMAGE_KEEP_ORIGINAL: bool = os.environ.get("IMAGE_KEEP_ORIGINAL", "false").lower() == "true"
+
+    GEMINI_MODEL: str = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+    GEMINI_PROMPT_CACHE_SIZE: int = int(os.environ.get("GEMINI_PROMPT_CACHE_SIZE", "64"))
+    GEMINI_CONTEXT_CACHE: bool = os.environ.get("GEMINI_CONTEXT_CACHE", "true").lower() == "true"
+    GEMINI_CONTEXT_CACHE_TTL_MINUTES: int = int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_MINUTES", "60"))
+    GEMINI_CONTEXT_CACHE_MIN_CHARS: int = int(os.environ.get("GEMINI_CONTEXT_CACHE_MIN_CHARS", "4000"))
+    GEMINI_JSON_MODE: bool = os.environ.get("GEMINI_JSON_MODE", "true").lower() == "true"
+    GEMINI_STREAMING: bool = os.environ.get("GEMINI_STREAMING", "true").lower() == "true"
+    GEMINI_REASK_ATTEMPTS: int = int(os.environ.get("GEMINI_REASK_ATTEMPTS", "1"))
+
+    LLM_MAX_CONCURRENCY: int = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+    LLM_REQUESTS_PER_MINUTE: float = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", "60"))
+    LLM_TOKENS_PER_MINUTE: float = float(os.environ.get("LLM_TOKENS_PER_MINUTE", "1000000"))
+    LLM_MAX_RETRIES: int = int(os.environ.get("LLM_MAX_RETRIES", "4"))
+    LLM_REQUEST_TIMEOUT: float = float(os.environ.get("LLM_REQUEST_TIMEOUT", "120"))
+    LLM_DEADLINE_SECONDS: float = float(os.environ.get("LLM_DEADLINE_SECONDS", "300"))
+    LLM_CIRCUIT_FAILURES: int = int(os.environ.get("LLM_CIRCUIT_FAILURES", "5"))
+    LLM_CIRCUIT_COOLDOWN: float = float(os.environ.get("LLM_CIRCUIT_COOLDOWN", "30"))
+
+    LOTE_STALE_MINUTES: float = float(os.environ.get("LOTE_STALE_MINUTES", "30"))
+    LOTE_TASK_DEADLINE_SECONDS: int = int(os.environ.get("LOTE_TASK_DEADLINE_SECONDS", "1800"))
+    ANALYSIS_BATCH_SIZE: int = int(os.environ.get("ANALYSIS_BATCH_SIZE", "1"))
+    ANALYSIS_BATCH_MAX_CHARS: int = int(os.environ.get("ANALYSIS_BATCH_MAX_CHARS", "6000"))
+    ANALYSIS_CLAIM_TIMEOUT_SECONDS: float = float(os.environ.get("ANALYSIS_CLAIM_TIMEOUT_SECONDS", "900"))
+
+    LLM_CACHE_ENABLED: bool = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_HOURS: float = float(os.environ.get("LLM_CACHE_TTL_HOURS", "720"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "20000"))
 
     DATABASE_URL: str = os.environ.get("DATABASE_URL")
 
@@ -1,3 +1,4 @@
+import datetime
 import logging
 from typing import List, Optional
 import io
@@ -8,16 +9,24 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app.models import get_db, Usuario, Evaluacion, Criterio, Curso
+from app.config.settings import settings
 from app.schemas import (
     EvaluacionSchema,
     EvaluacionDetailSchema,
     ExamBatchRequest,
     QualityDashboardStats,
-    EvaluacionFeedbackProfesorUpdateSchema
+    EvaluacionFeedbackProfesorUpdateSchema,
+    LoteProcesamientoSchema
+)
+from app.repositories import EvaluacionRepository, LoteRepository
+from app.services import OrchestratorService, TaskService
+from app.config.dependencies import (
+    get_orchestrator_service,
+    get_current_user,
+    require_role,
+    get_report_service,
+    get_task_service
 )
-from app.repositories import EvaluacionRepository
-from app.services import OrchestratorService
-from app.config.dependencies import get_orchestrator_service, get_current_user, require_role, get_report_service
 
 log = logging.getLogger(__name__)
 
@@ -385,7 +394,7 @@ async def export_professor_pdf_report(
             "tema": tema
         }
 
-        pdf_buffer = report_service.generate_professor_report_pdf(stats, metadata)
+        pdf_buffer = await report_service.generate_async("generate_professor_report_pdf", stats, metadata)
         
         filename = f"Reporte_Estadistico_{course_name.replace(' ', '_')}_{tema.replace(' ', '_')}.pdf"
         return Response(
@@ -449,7 +458,7 @@ async def export_quality_pdf_report(
             "nrc": nrc
         }
 
-        pdf_buffer = report_service.generate_quality_report_pdf(stats, metadata)
+        pdf_buffer = await report_service.generate_async("generate_quality_report_pdf", stats, metadata)
         
         attr_str = atributo or "AG-07"
         filename = f"Reporte_Calidad_{course_name.replace(' ', '_')}_{attr_str}.pdf"
@@ -502,7 +511,7 @@ async def export_professor_excel_report(
             "tema": tema
         }
 
-        excel_buffer = report_service.generate_professor_report_excel(stats, metadata)
+        excel_buffer = await report_service.generate_async("generate_professor_report_excel", stats, metadata)
         
         filename = f"Reporte_Estadistico_{course_name.replace(' ', '_')}_{tema.replace(' ', '_')}.xlsx"
         return Response(
@@ -566,7 +575,7 @@ async def export_quality_excel_report(
             "nrc": nrc
         }
 
-        excel_buffer = report_service.generate_quality_report_excel(stats, metadata)
+        excel_buffer = await report_service.generate_async("generate_quality_report_excel", stats, metadata)
         
         attr_str = atributo or "AG-07"
         filename = f"Reporte_Calidad_{course_name.replace(' ', '_')}_{attr_str}.xlsx"
@@ -755,33 +764,123 @@ async def get_evaluacion_detail(
 async def enqueue_exam_batch(
     request: ExamBatchRequest,
     current_user: Usuario = Depends(require_role("PROFESOR")),
-    orchestrator: OrchestratorService = Depends(get_orchestrator_service)
+    orchestrator: OrchestratorService = Depends(get_orchestrator_service),
+    task_service: TaskService = Depends(get_task_service)
 ):
 
     try:
         log.info(f"Recibido lote de {current_user.nombre}: {len(request.pdf_files)} archivos")
 
-        result = orchestrator.process_exam_batch(
+        orchestrator.validate_batch_context(request.rubrica_id, request.curso_id)
+        total = orchestrator.count_batch_students(
+            [f.dict() for f in request.pdf_files],
+            request.tipo_documento
+        )
+
+        # Los parámetros quedan en la fila del lote: la tarea de Cloud Tasks solo lleva el lote_id
+        # y, si la instancia cae, el reintento reanuda desde ahí.
+        lote_id = orchestrator.start_exam_batch(
             profesor_id=current_user.id,
-            rubrica_id=request.rubrica_id,
-            pdf_files=[f.dict() for f in request.pdf_files],
-            student_list=request.student_list,
-            curso_id=request.curso_id,
-            codigo_curso=request.codigo_curso,
-            instructor=current_user.nombre,
-            semestre=request.semestre,
-            tema=request.tema,
-            descripcion_tema=request.descripcion_tema or "",
-            tipo_documento=request.tipo_documento
+            tipo_documento=request.tipo_documento,
+            total=total,
+            parametros={
+                "profesor_id": current_user.id,
+                "rubrica_id": request.rubrica_id,
+                "pdf_files": [f.dict() for f in request.pdf_files],
+                "student_list": request.student_list,
+                "curso_id": request.curso_id,
+                "codigo_curso": request.codigo_curso,
+                "instructor": current_user.nombre,
+                "semestre": request.semestre,
+                "tema": request.tema,
+                "descripcion_tema": request.descripcion_tema or "",
+                "tipo_documento": request.tipo_documento
+            }
         )
 
-        return result
+        try:
+            task_service.create_exam_batch_task(lote_id)
+        except Exception as e:
+            orchestrator.lote_repo.finalizar(lote_id, error=f"No se pudo encolar el lote: {e}")
+            raise
+
+        return {
+            "success": True,
+            "lote_id": lote_id,
+            "estado": "pendiente",
+            "tipo": request.tipo_documento,
+            "total": total
+        }
 
+    except ValueError as e:
+        log.error(f"Lote rechazado en enqueue_exam_batch: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         log.error(f"Error en enqueue_exam_batch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/batches/{lote_id}", response_model=LoteProcesamientoSchema)
+async def get_batch_status(
+    lote_id: int,
+    current_user: Usuario = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+
+    repo = LoteRepository(db)
+    repo.marcar_interrumpidos(
+        datetime.datetime.utcnow() - datetime.timedelta(minutes=settings.LOTE_STALE_MINUTES),
+        lote_id=lote_id
+    )
+
+    lote = repo.get_by_id(lote_id)
+    if not lote:
+        raise HTTPException(status_code=404, detail="Lote no encontrado")
+
+    if getattr(current_user, 'active_role', current_user.rol) == "PROFESOR" and lote.profesor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso para consultar este lote")
+
+    return lote
+
+
+@router.post("/{evaluacion_id}/reanalizar")
+async def reanalizar_evaluacion(
+    evaluacion_id: int,
+    current_user: Usuario = Depends(require_role("PROFESOR")),
+    task_service: TaskService = Depends(get_task_service),
+    db: Session = Depends(get_db)
+):
+
+    try:
+        repo = EvaluacionRepository(db)
+        evaluacion = repo.get_with_details(evaluacion_id)
+
+        if not evaluacion:
+            raise HTTPException(status_code=404, detail="Evaluación no encontrada")
+
+        if evaluacion.profesor_id != current_user.id:
+            raise HTTPException(status_code=403, detail="No tienes permiso para recalificar esta evaluación")
+
+        if not evaluacion.archivos_procesados:
+            raise HTTPException(status_code=400, detail="La evaluación no tiene archivos procesados")
+
+        # Recalificar es pedir una respuesta nueva: se omite la caché de respuestas LLM.
+        task_name = task_service.create_evaluation_task(
+            evaluacion_id=evaluacion_id,
+            delay_seconds=0,
+            bypass_cache=True
+        )
+
+        log.info(f"Recalificación encolada: ID={evaluacion_id}, tarea={task_name}")
+        return {"success": True, "evaluacion_id": evaluacion_id, "estado": "encolado"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.error(f"Error al encolar recalificación de evaluación {evaluacion_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/{evaluacion_id}")
 async def delete_evaluacion(
     evaluacion_id: int,
@@ -7,7 +7,7 @@ from app.models import get_db
 from app.schemas import GenerateUploadURLRequest
 from app.clients import GCSClient
 from app.config.dependencies import get_gcs_client
-from app.extractors.text_extractor import TextExtractor
+from app.extractors import DocumentInspector
 from fastapi import Form
 
 log = logging.getLogger(__name__)
@@ -64,8 +64,8 @@ async def upload_file_proxy(
         file_extension = f".{file.filename.split('.')[-1].lower()}" if '.' in file.filename else ''
 
         if tipo_documento:
-            text_extractor = TextExtractor()
-            has_text = text_extractor.detect_has_extractable_text(file_bytes, file_extension)
+            inspection = DocumentInspector().inspect(file_bytes, file_extension, stop_when_text_found=True)
+            has_text = inspection.has_extractable_text
 
             if tipo_documento == 'examen':
                 if has_text:
@@ -3,13 +3,15 @@ from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 
 from app.models import get_db
-from app.schemas import FileTaskPayload, EvaluationTaskPayload
-from app.services import ExtractionService, AnalysisService, TaskService
+from app.schemas import FileTaskPayload, EvaluationTaskPayload, ExamBatchTaskPayload
+from app.services import ExtractionService, AnalysisService, TaskService, OrchestratorService
+from app.services.analysis_service import EvaluacionEnCursoError
 from app.repositories import EvaluacionRepository
 from app.config.dependencies import (
     get_extraction_service,
     get_analysis_service,
-    get_task_service
+    get_task_service,
+    get_orchestrator_service
 )
 
 log = logging.getLogger(__name__)
@@ -18,7 +20,7 @@ router = APIRouter(prefix="", tags=["Workers"])
 
 
 @router.post("/process-file-task")
-async def process_file_task(
+def process_file_task(
         payload: FileTaskPayload,
         background_tasks: BackgroundTasks,
         db: Session = Depends(get_db),
@@ -42,7 +44,8 @@ async def process_file_task(
             evaluacion_id=payload.evaluacion_id,
             tipo_documento=payload.tipo_documento,
             tema=evaluacion.tema,
-            descripcion_tema=evaluacion.descripcion_tema or ""
+            descripcion_tema=evaluacion.descripcion_tema or "",
+            precomputed_ocr_text=payload.precomputed_ocr_text
         )
 
         archivos = evaluacion_repo.get_with_details(payload.evaluacion_id).archivos_procesados
@@ -68,7 +71,7 @@ async def process_file_task(
 
 
 @router.post("/process-evaluation-task")
-async def process_evaluation_task(
+def process_evaluation_task(
         payload: EvaluationTaskPayload,
         db: Session = Depends(get_db),
         analysis_service: AnalysisService = Depends(get_analysis_service)
@@ -77,7 +80,8 @@ async def process_evaluation_task(
         log.info(f"Worker evaluación iniciado: evaluacion_id={payload.evaluacion_id}")
 
         result = analysis_service.analyze_evaluation(
-            evaluacion_id=payload.evaluacion_id
+            evaluacion_id=payload.evaluacion_id,
+            bypass_cache=payload.bypass_cache
         )
 
         if not result:
@@ -91,6 +95,29 @@ async def process_evaluation_task(
             "evaluacion_id": payload.evaluacion_id
         }
 
+    except EvaluacionEnCursoError as e:
+        # Cloud Tasks reintenta la tarea; para entonces el lote que la tomó ya habrá terminado.
+        log.info(f"Evaluación {payload.evaluacion_id} en análisis por otro lote: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+
     except Exception as e:
         log.error(f"Error en process_evaluation_task: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/process-exam-batch-task")
+def process_exam_batch_task(
+        payload: ExamBatchTaskPayload,
+        orchestrator: OrchestratorService = Depends(get_orchestrator_service)
+):
+
+    # Los errores del lote quedan registrados en su fila; solo una caída de la instancia deja la
+    # tarea sin respuesta y Cloud Tasks la reintenta, reanudando el lote.
+    log.info(f"Worker de lote iniciado: lote_id={payload.lote_id}")
+    orchestrator.run_exam_batch_job(lote_id=payload.lote_id)
+    log.info(f"Worker de lote terminado: lote_id={payload.lote_id}")
+
+    return {
+        "success": True,
+        "lote_id": payload.lote_id
+    }
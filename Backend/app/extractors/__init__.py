@@ -1,9 +1,16 @@
 from .text_extractor import TextExtractor
 from .image_extractor import ImageExtractor
 from .student_name_matcher import StudentNameMatcher
+from .exam_pdf_splitter import ExamPdfSplitter
+from .document_inspector import DocumentInspector, DocumentInspection
+from .image_record import ImageRecord
 
 __all__ = [
     'TextExtractor',
     'ImageExtractor',
-    'StudentNameMatcher'
+    'StudentNameMatcher',
+    'ExamPdfSplitter',
+    'DocumentInspector',
+    'DocumentInspection',
+    'ImageRecord'
 ]
@@ -0,0 +1,147 @@
+import logging
+import io
+from typing import Dict, List, Optional, Set
+from docx import Document
+
+from app.config.settings import settings
+from .pdf_text_engines import (
+    MIN_PAGE_TEXT_CHARS,
+    PDF_TEXT_ENGINES,
+    DocumentSource,
+    PyMuPDFTextEngine,
+    PdfPlumberTextEngine
+)
+
+log = logging.getLogger(__name__)
+
+MIN_EXTRACTABLE_CHARS = 50
+
+
+class DocumentInspection:
+
+    def __init__(self, file_extension: str):
+
+        self.file_extension = file_extension.lower()
+        self.page_count: Optional[int] = None
+        self.page_texts: List[Optional[str]] = []
+        self.image_refs: List[Dict] = []
+        self.drawing_pages: Set[int] = set()
+        self.complete = False
+
+    def reset(self) -> None:
+
+        self.page_count = None
+        self.page_texts = []
+        self.image_refs = []
+        self.drawing_pages = set()
+        self.complete = False
+
+    @property
+    def page_has_text(self) -> List[bool]:
+        return [bool(t and t.strip()) for t in self.page_texts]
+
+    @property
+    def pages_without_text(self) -> List[int]:
+
+        if self.file_extension != '.pdf' or self.page_count is None:
+            return []
+
+        # Una página corta solo merece OCR si hay algo que leer: una imagen (escaneo) o trazos
+        # vectoriales (tinta digital). Las páginas en blanco o con un simple número se omiten.
+        paginas_con_imagen = {ref["page"] for ref in self.image_refs if ref.get("page") is not None}
+        return [
+            i for i in range(self.page_count)
+            if (i >= len(self.page_texts) or len((self.page_texts[i] or "").strip()) < MIN_PAGE_TEXT_CHARS)
+            and (i in paginas_con_imagen or i in self.drawing_pages)
+        ]
+
+    @property
+    def text(self) -> Optional[str]:
+
+        partes = [t for t in self.page_texts if t]
+        return "\n".join(partes) if partes else None
+
+    @property
+    def has_extractable_text(self) -> bool:
+
+        texto = self.text
+        return texto is not None and len(texto.strip()) > MIN_EXTRACTABLE_CHARS
+
+    @property
+    def has_images(self) -> bool:
+        return bool(self.image_refs)
+
+
+class DocumentInspector:
+
+    def __init__(self, engine=None, fallback_engine=None):
+
+        self.engine = engine or self._engine_from_settings(settings.PDF_TEXT_ENGINE)
+        self.fallback_engine = fallback_engine or PdfPlumberTextEngine()
+
+    @staticmethod
+    def _engine_from_settings(nombre: str):
+
+        if nombre not in PDF_TEXT_ENGINES:
+            log.warning(f"Motor de texto PDF desconocido '{nombre}', se usa {PyMuPDFTextEngine.name}")
+            nombre = PyMuPDFTextEngine.name
+
+        if nombre == PyMuPDFTextEngine.name:
+            return PyMuPDFTextEngine(
+                parallel_min_pages=settings.PDF_PARALLEL_MIN_PAGES,
+                pages_per_chunk=settings.PDF_PAGES_PER_CHUNK
+            )
+        return PDF_TEXT_ENGINES[nombre]()
+
+    def inspect(
+            self,
+            file_bytes: DocumentSource,
+            file_extension: str,
+            stop_when_text_found: bool = False
+    ) -> DocumentInspection:
+
+        inspection = DocumentInspection(file_extension)
+
+        try:
+            if inspection.file_extension == '.pdf':
+                self._inspect_pdf(file_bytes, inspection, stop_when_text_found)
+            elif inspection.file_extension in ['.docx', '.doc']:
+                self._inspect_docx(file_bytes, inspection)
+            else:
+                log.warning(f"Extensión no soportada para inspección: {file_extension}")
+        except Exception as e:
+            log.error(f"Error al inspeccionar documento {file_extension}: {e}")
+
+        return inspection
+
+    def _inspect_pdf(
+            self,
+            pdf_bytes: DocumentSource,
+            inspection: DocumentInspection,
+            stop_when_text_found: bool
+    ) -> None:
+
+        stop_after_chars = MIN_EXTRACTABLE_CHARS if stop_when_text_found else None
+
+        try:
+            self.engine.inspect(pdf_bytes, inspection, stop_after_chars)
+            return
+        except Exception as e:
+            if self.fallback_engine is None or self.fallback_engine.name == self.engine.name:
+                raise
+            log.warning(f"Motor {self.engine.name} falló ({e}), reintentando con {self.fallback_engine.name}")
+
+        inspection.reset()
+        self.fallback_engine.inspect(pdf_bytes, inspection, stop_after_chars)
+
+    def _inspect_docx(self, docx_bytes: DocumentSource, inspection: DocumentInspection) -> None:
+
+        doc = Document(docx_bytes if isinstance(docx_bytes, str) else io.BytesIO(docx_bytes))
+
+        inspection.page_texts = [p.text for p in doc.paragraphs if p.text.strip()]
+
+        for rel in doc.part.rels.values():
+            if "image" in rel.target_ref:
+                inspection.image_refs.append({"page": None, "xref": None, "name": rel.target_ref})
+
+        inspection.complete = True
@@ -0,0 +1,131 @@
+import logging
+from typing import List, Optional, Tuple
+import fitz  # PyMuPDF
+
+log = logging.getLogger(__name__)
+
+
+def build_student_pdfs(face_paths: List[str], student_indices: List[int]) -> List[Optional[bytes]]:
+
+    # Recibe rutas y no bytes: así cada bloque del pool no serializa todas las caras.
+    with ExamPdfSplitter() as splitter:
+        for path in face_paths:
+            with open(path, "rb") as f:
+                splitter.add_face(f.read())
+        return [splitter.build_student_pdf(i) for i in student_indices]
+
+
+class ExamPdfSplitter:
+
+    def __init__(self):
+
+        self.faces: List[fitz.Document] = []
+        self.face_bytes: List[bytes] = []
+
+    def add_face(self, pdf_bytes: bytes) -> None:
+
+        self.faces.append(fitz.open(stream=pdf_bytes, filetype="pdf"))
+        self.face_bytes.append(pdf_bytes)
+
+    @property
+    def cover(self) -> fitz.Document:
+        return self.faces[0]
+
+    @property
+    def num_students(self) -> int:
+        return len(self.faces[0]) if self.faces else 0
+
+    @staticmethod
+    def target_page_index(face_num: int, student_idx: int, num_students: int) -> int:
+
+        # Las caras pares se escanean en dúplex invertido: el último alumno queda primero.
+        if face_num % 2 != 0:
+            return student_idx
+        return num_students - 1 - student_idx
+
+    @staticmethod
+    def parse_region(region: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+
+        if not region or region.strip().lower() in ("none", "full"):
+            return None
+
+        try:
+            x0, y0, x1, y1 = (float(v) for v in region.split(","))
+        except ValueError:
+            log.warning(f"Región de identificación inválida '{region}', se usará la página completa")
+            return None
+
+        if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+            log.warning(f"Región de identificación fuera de rango '{region}', se usará la página completa")
+            return None
+
+        return (x0, y0, x1, y1)
+
+    def render_cover_page(
+            self,
+            student_idx: int,
+            region: Optional[Tuple[float, float, float, float]] = None,
+            dpi: Optional[int] = None,
+            image_format: str = "png",
+            grayscale: bool = False,
+            jpeg_quality: int = 75
+    ) -> bytes:
+
+        page = self.cover.load_page(student_idx)
+
+        pixmap_kwargs = {}
+        if region:
+            rect = page.rect
+            x0, y0, x1, y1 = region
+            pixmap_kwargs["clip"] = fitz.Rect(
+                rect.x0 + rect.width * x0,
+                rect.y0 + rect.height * y0,
+                rect.x0 + rect.width * x1,
+                rect.y0 + rect.height * y1
+            )
+        if dpi:
+            pixmap_kwargs["dpi"] = dpi
+        if grayscale:
+            pixmap_kwargs["colorspace"] = fitz.csGRAY
+
+        pix = page.get_pixmap(**pixmap_kwargs)
+
+        if image_format.lower() in ("jpg", "jpeg"):
+            return pix.tobytes("jpeg", jpg_quality=jpeg_quality)
+        return pix.tobytes("png")
+
+    def build_student_pdf(self, student_idx: int) -> Optional[bytes]:
+
+        num_students = self.num_students
+
+        with fitz.open() as output:
+            for face_idx, face in enumerate(self.faces):
+                face_num = face_idx + 1
+                target_page_idx = self.target_page_index(face_num, student_idx, num_students)
+
+                if 0 <= target_page_idx < len(face):
+                    output.insert_pdf(face, from_page=target_page_idx, to_page=target_page_idx)
+                else:
+                    log.warning(f"Índice {target_page_idx} fuera de rango para cara {face_num}")
+
+            if len(output) == 0:
+                return None
+
+            return output.tobytes(garbage=3, deflate=True)
+
+    def close(self) -> None:
+
+        for face in self.faces:
+            try:
+                face.close()
+            except Exception as e:
+                log.warning(f"Error al cerrar documento de cara: {e}")
+        self.faces = []
+        self.face_bytes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -1,26 +1,145 @@
 import logging
 import io
-import base64
-from typing import List
-from PIL import Image
+from typing import Iterator, List, Optional
+from PIL import Image, ImageChops
 import fitz  # PyMuPDF
 from docx import Document
 
+from .image_record import ImageRecord, PASSTHROUGH_FORMATS, normalize_format
+from .pdf_text_engines import DocumentSource, open_pdf
+
 log = logging.getLogger(__name__)
 
 
 class ImageExtractor:
 
-    def __init__(self, max_images: int = 20):
+    def __init__(
+            self,
+            max_images: int = 20,
+            min_dimension: int = 50,
+            min_area: int = 10000,
+            hash_distance: int = 5,
+            max_edge: int = 1536,
+            photo_format: str = "jpeg",
+            photo_quality: int = 80,
+            keep_original: bool = False
+    ):
 
         self.max_images = max_images
+        self.min_dimension = min_dimension
+        self.min_area = min_area
+        self.hash_distance = hash_distance
+        self.max_edge = max_edge
+        self.photo_format = normalize_format(photo_format) if normalize_format(photo_format) in ("jpeg", "webp") else "jpeg"
+        self.photo_quality = photo_quality
+        self.keep_original = keep_original
 
-    def extract_images_from_pdf(self, pdf_bytes: bytes) -> List[str]:
+    def _is_too_small(self, width: int, height: int) -> bool:
 
-        try:
-            images_base64 = []
+        return width < self.min_dimension or height < self.min_dimension or width * height < self.min_area
+
+    @staticmethod
+    def _dhash(image_pil: Image.Image, hash_size: int = 8) -> int:
+
+        gris = image_pil.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+        pixels = list(gris.getdata())
+
+        valor = 0
+        for fila in range(hash_size):
+            for col in range(hash_size):
+                izquierda = pixels[fila * (hash_size + 1) + col]
+                derecha = pixels[fila * (hash_size + 1) + col + 1]
+                valor = (valor << 1) | (izquierda > derecha)
+        return valor
+
+    def _find_near_duplicate(self, phash: int, hashes: List[int]) -> Optional[int]:
+
+        for idx, existente in enumerate(hashes):
+            if (phash ^ existente).bit_count() <= self.hash_distance:
+                return idx
+        return None
+
+    def _accept_image(self, image_pil: Image.Image, hashes: List[int], origen: str) -> bool:
+
+        if self._is_too_small(image_pil.width, image_pil.height):
+            log.debug(f"Imagen descartada por tamaño ({image_pil.width}x{image_pil.height}): {origen}")
+            return False
+
+        phash = self._dhash(image_pil)
+        duplicada = self._find_near_duplicate(phash, hashes)
+        if duplicada is not None:
+            log.debug(f"Imagen casi duplicada de la #{duplicada} descartada: {origen}")
+            return False
+
+        hashes.append(phash)
+        return True
+
+    @staticmethod
+    def _can_passthrough(image_pil: Image.Image) -> bool:
+
+        return (
+            normalize_format(image_pil.format) in PASSTHROUGH_FORMATS
+            and image_pil.mode in ("1", "L", "LA", "P", "RGB", "RGBA")
+        )
+
+    @staticmethod
+    def _is_grayscale(muestra: Image.Image, tolerancia: int = 12) -> bool:
+
+        r, g, b = muestra.split()
+        return all(
+            ImageChops.difference(a, c).getextrema()[1] <= tolerancia
+            for a, c in ((r, g), (g, b))
+        )
+
+    @staticmethod
+    def _is_line_art(muestra: Image.Image, max_colores: int = 64) -> bool:
+
+        return muestra.getcolors(maxcolors=max_colores) is not None
+
+    def _to_record(self, image_bytes: bytes, image_pil: Image.Image) -> ImageRecord:
+
+        original_ok = self._can_passthrough(image_pil)
+        if self.keep_original and original_ok:
+            return ImageRecord(image_bytes, image_pil.format, image_pil.width, image_pil.height)
+
+        if image_pil.mode in ("RGBA", "LA") or (image_pil.mode == "P" and "transparency" in image_pil.info):
+            rgba = image_pil.convert("RGBA")
+            imagen = Image.new("RGB", rgba.size, "white")
+            imagen.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            imagen = image_pil.convert("RGB")
+
+        redimensionada = self.max_edge > 0 and max(imagen.size) > self.max_edge
+        if redimensionada:
+            imagen.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+
+        muestra = imagen.resize((64, 64), Image.Resampling.NEAREST)
+        if self._is_grayscale(muestra):
+            imagen = imagen.convert("L")
+            muestra = muestra.convert("L")
+
+        if self._is_line_art(muestra):
+            record = ImageRecord.from_pil(imagen, "png", optimize=True)
+        else:
+            record = ImageRecord.from_pil(imagen, self.photo_format, quality=self.photo_quality)
+
+        if original_ok and not redimensionada and record.size_bytes >= len(image_bytes):
+            return ImageRecord(image_bytes, image_pil.format, image_pil.width, image_pil.height)
 
-            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        log.debug(
+            f"Imagen normalizada: {image_pil.width}x{image_pil.height} {image_pil.format} "
+            f"({len(image_bytes)} bytes) -> {record}")
+        return record
+
+    def iter_images_from_pdf(self, source: DocumentSource) -> Iterator[ImageRecord]:
+
+        emitidas = 0
+        seen_xrefs = set()
+        hashes: List[int] = []
+        descartadas = 0
+
+        try:
+            with open_pdf(source) as doc:
                 log.info(f"Extrayendo imágenes de PDF con {len(doc)} páginas")
 
                 for page_num in range(len(doc)):
@@ -28,26 +147,29 @@ class ImageExtractor:
                     image_list = page.get_images(full=True)
 
                     for img_index, img in enumerate(image_list):
-                        if len(images_base64) >= self.max_images:
+                        if emitidas >= self.max_images:
                             log.info(f"Límite de {self.max_images} imágenes alcanzado")
-                            return images_base64
+                            return
 
                         try:
                             xref = img[0]
+                            if xref in seen_xrefs:
+                                continue
+                            seen_xrefs.add(xref)
+
+                            if self._is_too_small(img[2], img[3]):
+                                descartadas += 1
+                                continue
+
                             base_image = doc.extract_image(xref)
                             image_bytes = base_image["image"]
 
                             image_pil = Image.open(io.BytesIO(image_bytes))
+                            if not self._accept_image(image_pil, hashes, f"página {page_num + 1}, xref {xref}"):
+                                descartadas += 1
+                                continue
 
-                            if image_pil.mode != "RGB":
-                                image_pil = image_pil.convert("RGB")
-
-                            png_buffer = io.BytesIO()
-                            image_pil.save(png_buffer, format="PNG")
-                            png_bytes = png_buffer.getvalue()
-
-                            img_b64 = base64.b64encode(png_bytes).decode('utf-8')
-                            images_base64.append(img_b64)
+                            record = self._to_record(image_bytes, image_pil)
 
                             log.debug(f"Imagen extraída: página {page_num + 1}, índice {img_index}")
 
@@ -55,39 +177,43 @@ class ImageExtractor:
                             log.warning(f"Error al extraer imagen {img_index} de página {page_num + 1}: {e}")
                             continue
 
-            log.info(f"Total de imágenes extraídas del PDF: {len(images_base64)}")
-            return images_base64
+                        emitidas += 1
+                        yield record
 
         except Exception as e:
             log.error(f"Error al extraer imágenes de PDF: {e}")
-            return []
+            return
+
+        log.info(f"Total de imágenes extraídas del PDF: {emitidas} ({len(seen_xrefs)} únicas por xref, {descartadas} descartadas)")
 
-    def extract_images_from_docx(self, docx_bytes: bytes) -> List[str]:
+    def iter_images_from_docx(self, source: DocumentSource) -> Iterator[ImageRecord]:
+
+        emitidas = 0
+        seen_parts = set()
+        hashes: List[int] = []
 
         try:
-            doc = Document(io.BytesIO(docx_bytes))
-            images_base64 = []
+            doc = Document(source if isinstance(source, str) else io.BytesIO(source))
 
             for rel in doc.part.rels.values():
-                if "image" in rel.target_ref:
-                    if len(images_base64) >= self.max_images:
+                if "image" in rel.target_ref and not rel.is_external:
+                    if emitidas >= self.max_images:
                         log.info(f"Límite de {self.max_images} imágenes alcanzado")
-                        break
+                        return
 
                     try:
+                        partname = rel.target_part.partname
+                        if partname in seen_parts:
+                            continue
+                        seen_parts.add(partname)
+
                         image_bytes = rel.target_part.blob
 
                         image_pil = Image.open(io.BytesIO(image_bytes))
+                        if not self._accept_image(image_pil, hashes, rel.target_ref):
+                            continue
 
-                        if image_pil.mode != "RGB":
-                            image_pil = image_pil.convert("RGB")
-
-                        png_buffer = io.BytesIO()
-                        image_pil.save(png_buffer, format="PNG")
-                        png_bytes = png_buffer.getvalue()
-
-                        img_b64 = base64.b64encode(png_bytes).decode('utf-8')
-                        images_base64.append(img_b64)
+                        record = self._to_record(image_bytes, image_pil)
 
                         log.debug(f"Imagen extraída de DOCX")
 
@@ -95,26 +221,43 @@ class ImageExtractor:
                         log.warning(f"Error al extraer imagen de DOCX: {e}")
                         continue
 
-            log.info(f"Total de imágenes extraídas del DOCX: {len(images_base64)}")
-            return images_base64
+                    emitidas += 1
+                    yield record
 
         except Exception as e:
             log.error(f"Error al extraer imágenes de DOCX: {e}")
-            return []
+            return
+
+        log.info(f"Total de imágenes extraídas del DOCX: {emitidas}")
+
+    def iter_images(
+            self,
+            source: DocumentSource,
+            file_extension: str
+    ) -> Iterator[ImageRecord]:
+
+        if file_extension.lower() == '.pdf':
+            return self.iter_images_from_pdf(source)
+        elif file_extension.lower() in ['.docx', '.doc']:
+            return self.iter_images_from_docx(source)
+        else:
+            log.warning(f"Extensión no soportada para extracción de imágenes: {file_extension}")
+            return iter(())
+
+    def extract_images_from_pdf(self, source: DocumentSource) -> List[ImageRecord]:
+        return list(self.iter_images_from_pdf(source))
+
+    def extract_images_from_docx(self, source: DocumentSource) -> List[ImageRecord]:
+        return list(self.iter_images_from_docx(source))
 
     def extract_images(
             self,
-            file_bytes: bytes,
+            source: DocumentSource,
             file_extension: str
-    ) -> List[str]:
+    ) -> List[ImageRecord]:
 
         try:
-            if file_extension.lower() == '.pdf':
-                return self.extract_images_from_pdf(file_bytes)
-            elif file_extension.lower() in ['.docx', '.doc']:
-                return self.extract_images_from_docx(file_bytes)
-            else:
-                log.warning(f"Extensión no soportada para extracción de imágenes: {file_extension}")
-                return []
+            return list(self.iter_images(source, file_extension))
         except Exception as e:
             log.error(f"Error al extraer imágenes: {e}")
+            return []
@@ -0,0 +1,84 @@
+import hashlib
+import io
+from typing import Dict, Optional
+from PIL import Image
+
+PASSTHROUGH_FORMATS = ("jpeg", "png")
+
+_MIME_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif"
+}
+
+_FORMAT_ALIASES = {
+    "jpg": "jpeg",
+    "jpe": "jpeg"
+}
+
+
+def normalize_format(image_format: Optional[str]) -> Optional[str]:
+
+    if not image_format:
+        return None
+    image_format = image_format.lower().lstrip(".")
+    return _FORMAT_ALIASES.get(image_format, image_format)
+
+
+class ImageRecord:
+
+    __slots__ = ("data", "format", "width", "height", "_sha256")
+
+    def __init__(
+            self,
+            data: bytes,
+            image_format: str,
+            width: Optional[int] = None,
+            height: Optional[int] = None
+    ):
+
+        self.data = data
+        self.format = normalize_format(image_format)
+        self.width = width
+        self.height = height
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, image_format: Optional[str] = None) -> "ImageRecord":
+
+        # Image.open solo lee la cabecera; los píxeles no se decodifican.
+        with Image.open(io.BytesIO(data)) as img:
+            return cls(data, normalize_format(img.format) or image_format, img.width, img.height)
+
+    @classmethod
+    def from_pil(cls, image_pil: Image.Image, image_format: str = "png", **save_kwargs) -> "ImageRecord":
+
+        buffer = io.BytesIO()
+        image_pil.save(buffer, format=image_format.upper(), **save_kwargs)
+        return cls(buffer.getvalue(), image_format, image_pil.width, image_pil.height)
+
+    @property
+    def sha256(self) -> str:
+
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    @property
+    def mime_type(self) -> str:
+        return _MIME_TYPES.get(self.format, f"image/{self.format}")
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else self.format
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.data)
+
+    def to_gemini_part(self) -> Dict:
+        return {"mime_type": self.mime_type, "data": self.data}
+
+    def __repr__(self) -> str:
+        return f"ImageRecord({self.format}, {self.width}x{self.height}, {self.size_bytes} bytes)"
@@ -0,0 +1,188 @@
+import logging
+import io
+from typing import Dict, List, Optional, Tuple, Union
+import fitz  # PyMuPDF
+import pdfplumber
+
+from app.config.process_pool import CPUProcessPool, get_process_pool
+
+log = logging.getLogger(__name__)
+
+# Texto de la página, referencias a imágenes y si tiene trazos vectoriales (relevante solo con poco texto).
+PageResult = Tuple[str, List[Dict], bool]
+
+MIN_PAGE_TEXT_CHARS = 20
+
+# Un documento puede llegar como bytes en memoria o como ruta a un archivo temporal.
+DocumentSource = Union[bytes, str]
+
+
+def open_pdf(source: DocumentSource) -> "fitz.Document":
+
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _normalize_page_text(texto: str) -> str:
+
+    # Aproxima el formato de pdfplumber (sin líneas vacías, espacios colapsados), pero no es idéntico:
+    # PyMuPDF deja en líneas separadas los bloques que comparten renglón, p. ej. dos columnas.
+    return "\n".join(" ".join(line.split()) for line in texto.splitlines() if line.strip())
+
+
+def _pymupdf_page(doc: "fitz.Document", page_num: int) -> PageResult:
+
+    page = doc[page_num]
+    texto = _normalize_page_text(page.get_text("text"))
+
+    refs = []
+    for img in page.get_images(full=True):
+        refs.append({
+            "page": page_num,
+            "xref": img[0],
+            "name": img[7],
+            "width": img[2],
+            "height": img[3]
+        })
+
+    # get_cdrawings recorre todo el contenido vectorial: solo se paga en páginas casi sin texto.
+    tiene_trazos = len(texto.strip()) < MIN_PAGE_TEXT_CHARS and bool(page.get_cdrawings())
+    return texto, refs, tiene_trazos
+
+
+def _pymupdf_page_range(source: DocumentSource, start: int, end: int) -> List[PageResult]:
+
+    with open_pdf(source) as doc:
+        return [_pymupdf_page(doc, i) for i in range(start, end)]
+
+
+def rasterize_pages(source: DocumentSource, page_indices: List[int]) -> List[bytes]:
+
+    with open_pdf(source) as doc:
+        return [doc[i].get_pixmap().tobytes("png") for i in page_indices]
+
+
+class PyMuPDFTextEngine:
+
+    name = "pymupdf"
+
+    def __init__(
+            self,
+            parallel_min_pages: int = 32,
+            pages_per_chunk: int = 16,
+            pool: Optional[CPUProcessPool] = None
+    ):
+
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_chunk = max(1, pages_per_chunk)
+        self.pool = pool
+
+    @property
+    def _pool(self) -> CPUProcessPool:
+        return self.pool or get_process_pool()
+
+    def inspect(self, source: DocumentSource, inspection, stop_after_chars: Optional[int] = None) -> None:
+
+        with open_pdf(source) as doc:
+            inspection.page_count = len(doc)
+            log.info(f"Inspeccionando PDF con {inspection.page_count} páginas (motor: {self.name})")
+
+            if stop_after_chars is None and self._should_parallelize(inspection.page_count):
+                resultados = self._extract_parallel(source, inspection.page_count)
+                if resultados is not None:
+                    for i, (texto, refs, tiene_trazos) in enumerate(resultados):
+                        inspection.page_texts.append(texto)
+                        inspection.image_refs.extend(refs)
+                        if tiene_trazos:
+                            inspection.drawing_pages.add(i)
+                    inspection.complete = True
+                    return
+
+            acumulado = 0
+            for i in range(inspection.page_count):
+                texto, refs, tiene_trazos = _pymupdf_page(doc, i)
+                inspection.page_texts.append(texto)
+                inspection.image_refs.extend(refs)
+                if tiene_trazos:
+                    inspection.drawing_pages.add(i)
+
+                acumulado += len(texto)
+                if stop_after_chars is not None and acumulado > stop_after_chars:
+                    log.info(f"Texto suficiente detectado en página {i + 1}, inspección detenida")
+                    return
+
+        inspection.complete = True
+
+    def _should_parallelize(self, page_count: int) -> bool:
+
+        return (
+            self._pool.max_workers > 1
+            and self.parallel_min_pages > 0
+            and page_count >= self.parallel_min_pages
+        )
+
+    def _extract_parallel(self, source: DocumentSource, page_count: int) -> Optional[List[PageResult]]:
+
+        rangos = [
+            (start, min(start + self.pages_per_chunk, page_count))
+            for start in range(0, page_count, self.pages_per_chunk)
+        ]
+        log.info(f"Extrayendo {page_count} páginas en {len(rangos)} bloques con el pool de procesos")
+
+        try:
+            resultados = []
+            for bloque in self._pool.run_many(_pymupdf_page_range, [(source, start, end) for start, end in rangos]):
+                resultados.extend(bloque)
+            return resultados
+        except Exception as e:
+            log.warning(f"Extracción paralela falló, se continúa en serie: {e}")
+            return None
+
+
+class PdfPlumberTextEngine:
+
+    name = "pdfplumber"
+
+    def inspect(self, source: DocumentSource, inspection, stop_after_chars: Optional[int] = None) -> None:
+
+        with pdfplumber.open(source if isinstance(source, str) else io.BytesIO(source)) as pdf:
+            inspection.page_count = len(pdf.pages)
+            log.info(f"Inspeccionando PDF con {inspection.page_count} páginas (motor: {self.name})")
+
+            acumulado = 0
+            for i, page in enumerate(pdf.pages):
+                texto_pagina = page.extract_text()
+                inspection.page_texts.append(texto_pagina)
+
+                for img in page.images:
+                    inspection.image_refs.append({
+                        "page": i,
+                        "xref": None,
+                        "name": img.get("name"),
+                        "width": img.get("srcsize", (None, None))[0],
+                        "height": img.get("srcsize", (None, None))[1]
+                    })
+
+                if len((texto_pagina or "").strip()) < MIN_PAGE_TEXT_CHARS and (page.curves or page.lines or page.rects):
+                    inspection.drawing_pages.add(i)
+
+                if texto_pagina:
+                    acumulado += len(texto_pagina.strip())
+                    log.debug(f"Página {i + 1}: {len(texto_pagina)} caracteres")
+                else:
+                    log.debug(f"Página {i + 1}: sin texto extraíble")
+
+                if stop_after_chars is not None and acumulado > stop_after_chars:
+                    log.info(f"Texto suficiente detectado en página {i + 1}, inspección detenida")
+                    return
+
+                page.flush_cache()
+
+        inspection.complete = True
+
+
+PDF_TEXT_ENGINES = {
+    PyMuPDFTextEngine.name: PyMuPDFTextEngine,
+    PdfPlumberTextEngine.name: PdfPlumberTextEngine
+}
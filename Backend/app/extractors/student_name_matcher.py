@@ -1,16 +1,121 @@
 import logging
 import re
-from typing import Optional, Tuple
-from thefuzz import process as fuzzy_process
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process as rf_process
+from scipy.optimize import linear_sum_assignment
 
 log = logging.getLogger(__name__)
 
+_NAME_PATTERNS = [
+    re.compile(r"(?:nombres? y apellidos|apellidos y nombres?|alumno|estudiante)\s*[:\-\s]\s*([a-zA-Z\sÁÉÍÓÚáéíóúñÑ,'\. ]+)", re.IGNORECASE),
+    re.compile(r"^(?:nombre|alumno|estudiante)[:\s]+([a-zA-Z\sÁÉÍÓÚáéíóúñÑ,'\. ]+)", re.IGNORECASE)
+]
+_NAME_KEYWORDS = ("alumno", "nombre", "estudiante")
+_TRAILING_SYMBOLS = re.compile(r'[^\w\sÁÉÍÓÚáéíóúñÑ]+$')
+_CANDIDATE_SYMBOLS = re.compile(r'[^\w\sÁÉÍÓÚáéíóúñÑ]')
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+_MAX_TEXT_CHARS = 3000
+
+
+def normalize_name(texto: str) -> str:
+
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_ALNUM.sub(" ", texto.lower()).split())
+
+
+class RosterIndex:
+
+    def __init__(self, student_list: List[str]):
+
+        self.students = list(student_list)
+        self.normalized = [normalize_name(s) for s in self.students]
+
+        self.token_index: Dict[str, List[int]] = {}
+        for idx, name in enumerate(self.normalized):
+            for token in set(name.split()):
+                if len(token) > 2:
+                    self.token_index.setdefault(token, []).append(idx)
+
+        self.by_name: Dict[str, List[int]] = {}
+        for idx, name in enumerate(self.normalized):
+            if name:
+                self.by_name.setdefault(name, []).append(idx)
+
+        alternation = "|".join(re.escape(n) for n in sorted(self.by_name, key=len, reverse=True))
+        self.direct_pattern = re.compile(r'\b(?:' + alternation + r')\b') if alternation else None
+
+    def __len__(self) -> int:
+        return len(self.students)
+
+    def direct_matches(self, texto_normalizado: str) -> List[int]:
+
+        if not self.direct_pattern:
+            return []
+
+        found = []
+        for match in self.direct_pattern.finditer(texto_normalizado):
+            found.extend(self.by_name[match.group(0)])
+        return found
+
+    def shortlist(self, candidatos_normalizados: List[str]) -> List[int]:
+
+        indices = set()
+        for candidato in candidatos_normalizados:
+            for token in candidato.split():
+                indices.update(self.token_index.get(token, ()))
+        return sorted(indices)
+
+    def score(
+            self,
+            candidatos_normalizados: List[str],
+            indices: Optional[List[int]] = None,
+            workers: int = 1
+    ) -> np.ndarray:
+
+        choices = self.normalized if indices is None else [self.normalized[i] for i in indices]
+        return rf_process.cdist(
+            candidatos_normalizados,
+            choices,
+            scorer=fuzz.WRatio,
+            dtype=np.float64,
+            workers=workers
+        )
+
 
 class StudentNameMatcher:
 
-    def __init__(self, threshold: int = 70):
+    def __init__(self, threshold: int = 70, max_cached_rosters: int = 16):
 
         self.threshold = threshold
+        self.max_cached_rosters = max_cached_rosters
+        self._roster_cache: "OrderedDict[Tuple[str, ...], RosterIndex]" = OrderedDict()
+        # El matcher es un singleton compartido entre hilos de solicitudes: la caché LRU se protege.
+        self._roster_lock = threading.Lock()
+
+    def build_index(self, student_list: List[str]) -> RosterIndex:
+
+        key = tuple(student_list)
+        with self._roster_lock:
+            index = self._roster_cache.get(key)
+            if index is not None:
+                self._roster_cache.move_to_end(key)
+                return index
+
+        # Se construye fuera del candado; si otro hilo se adelantó con la misma lista, se usa la suya.
+        index = RosterIndex(student_list)
+        with self._roster_lock:
+            index = self._roster_cache.setdefault(key, index)
+            self._roster_cache.move_to_end(key)
+            while len(self._roster_cache) > self.max_cached_rosters:
+                self._roster_cache.popitem(last=False)
+
+        log.info(f"Índice de alumnos construido: {len(index)} nombres, {len(index.token_index)} tokens")
+        return index
 
     def find_student_name(
             self,
@@ -22,11 +127,115 @@ class StudentNameMatcher:
             log.warning("Texto o lista de estudiantes vacía")
             return None
 
-        patterns = [
-            r"(?:nombres? y apellidos|apellidos y nombres?|alumno|estudiante)\s*[:\-\s]\s*([a-zA-Z\sÁÉÍÓÚáéíóúñÑ,'\. ]+)",
-            r"^(?:nombre|alumno|estudiante)[:\s]+([a-zA-Z\sÁÉÍÓÚáéíóúñÑ,'\. ]+)"
-        ]
-        
+        index = self.build_index(student_list)
+        potential_names = self._extract_potential_names(texto)
+
+        if not potential_names:
+            log.info("No se encontraron nombres por patrones, buscando coincidencia directa...")
+            found_direct = index.direct_matches(normalize_name(texto))
+
+            if found_direct:
+
+                best = max((index.students[i] for i in found_direct), key=len)
+                log.info(f"Mejor coincidencia directa: '{best}'")
+                return (best, 100)
+
+        candidatos = self._build_candidates(texto, potential_names)
+        if not candidatos:
+            log.warning(f"No se encontró nombre con score >= {self.threshold}")
+            return None
+
+        shortlist = index.shortlist(candidatos)
+        best_idx, best_score = self._best_match(index, candidatos, shortlist) if shortlist else (None, 0.0)
+
+        if best_score < self.threshold:
+            best_idx, best_score = self._best_match(index, candidatos)
+
+        if best_idx is not None and best_score >= self.threshold:
+            best_match_name = index.students[best_idx]
+            log.info(f"Match encontrado: '{best_match_name}' (score: {best_score:.1f})")
+            return (best_match_name, int(round(best_score)))
+        else:
+            log.warning(f"No se encontró nombre con score >= {self.threshold}")
+            return None
+
+    def assign_students(
+            self,
+            textos: List[Optional[str]],
+            student_list: List[str]
+    ) -> List[Optional[Tuple[str, float]]]:
+
+        asignaciones: List[Optional[Tuple[str, float]]] = [None] * len(textos)
+        if not textos or not student_list:
+            return asignaciones
+
+        scores = self.score_matrix(textos, student_list)
+
+        rows, cols = linear_sum_assignment(scores, maximize=True)
+
+        usados = set()
+        for page_idx, student_idx in zip(rows, cols):
+            score = float(scores[page_idx, student_idx])
+            if score >= self.threshold:
+                asignaciones[page_idx] = (student_list[student_idx], score)
+                usados.add(student_idx)
+
+        paginas_pendientes = [i for i, a in enumerate(asignaciones) if a is None]
+        alumnos_pendientes = [j for j in range(len(student_list)) if j not in usados]
+
+        if len(paginas_pendientes) == 1 and len(alumnos_pendientes) == 1:
+            page_idx, student_idx = paginas_pendientes[0], alumnos_pendientes[0]
+            score = float(scores[page_idx, student_idx])
+            asignaciones[page_idx] = (student_list[student_idx], score)
+            log.info(f"Asignación por descarte en índice {page_idx}: '{student_list[student_idx]}' (score: {score:.1f})")
+
+        asignados = sum(1 for a in asignaciones if a)
+        log.info(f"Asignación global: {asignados}/{len(textos)} páginas con alumno")
+        return asignaciones
+
+    def score_matrix(self, textos: List[Optional[str]], student_list: List[str]) -> np.ndarray:
+
+        index = self.build_index(student_list)
+        scores = np.zeros((len(textos), len(index)), dtype=np.float64)
+
+        all_candidates = []
+        owners = []
+        for page_idx, texto in enumerate(textos):
+            if not texto:
+                continue
+
+            potential_names = self._extract_potential_names(texto)
+            if not potential_names:
+                for student_idx in index.direct_matches(normalize_name(texto)):
+                    scores[page_idx, student_idx] = 100.0
+
+            for candidate in self._build_candidates(texto, potential_names):
+                all_candidates.append(candidate)
+                owners.append(page_idx)
+
+        if all_candidates:
+            np.maximum.at(scores, np.asarray(owners), index.score(all_candidates, workers=-1))
+
+        return scores
+
+    @staticmethod
+    def _best_match(
+            index: RosterIndex,
+            candidatos: List[str],
+            indices: Optional[List[int]] = None
+    ) -> Tuple[Optional[int], float]:
+
+        scores = index.score(candidatos, indices)
+        if scores.size == 0:
+            return None, 0.0
+
+        best_flat = int(np.argmax(scores))
+        best_col = best_flat % scores.shape[1]
+        best_idx = indices[best_col] if indices is not None else best_col
+        return best_idx, float(scores.flat[best_flat])
+
+    def _extract_potential_names(self, texto: str) -> List[str]:
+
         text_lines = texto.strip().split("\n")
         potential_names = []
 
@@ -34,88 +243,56 @@ class StudentNameMatcher:
             line_stripped = line.strip()
             if not line_stripped:
                 continue
-            for pattern in patterns:
-                match = re.search(pattern, line_stripped, re.IGNORECASE)
+            for pattern in _NAME_PATTERNS:
+                match = pattern.search(line_stripped)
                 if match:
                     name_found = match.group(1).strip()
 
-                    name_found = re.sub(r'[^\w\sÁÉÍÓÚáéíóúñÑ]+$', '', name_found).strip()
+                    name_found = _TRAILING_SYMBOLS.sub('', name_found).strip()
                     if name_found:
-                        log.info(f"Nombre potencial por patrón: '{name_found}'")
+                        log.debug(f"Nombre potencial por patrón: '{name_found}'")
                         potential_names.append(name_found)
 
         for i, line in enumerate(text_lines):
             line_lower = line.strip().lower()
-            if any(line_lower.startswith(keyword) or keyword + ":" in line_lower 
-                   for keyword in ["alumno", "nombre", "estudiante"]):
+            if any(line_lower.startswith(keyword) or keyword + ":" in line_lower
+                   for keyword in _NAME_KEYWORDS):
                 parts = line.split(":", 1)
                 if len(parts) > 1 and parts[1].strip():
                     name_found = parts[1].strip()
-                    log.info(f"Nombre en línea de keyword: '{name_found}'")
+                    log.debug(f"Nombre en línea de keyword: '{name_found}'")
                     potential_names.append(name_found)
                 elif i + 1 < len(text_lines):
                     next_line = text_lines[i + 1].strip()
                     if next_line and len(next_line) > 3:
-                        log.info(f"Nombre en línea siguiente: '{next_line}'")
+                        log.debug(f"Nombre en línea siguiente: '{next_line}'")
                         potential_names.append(next_line)
 
-        if not potential_names:
-            log.info("No se encontraron nombres por patrones, buscando coincidencia directa...")
-            texto_lower = ' '.join(texto.lower().split())
-            found_direct = []
-            for student in student_list:
-                student_lower = student.lower()
-
-                if re.search(r'\b' + re.escape(student_lower) + r'\b', texto_lower):
-                    log.info(f"Coincidencia directa: '{student}'")
-                    found_direct.append(student)
-            
-            if found_direct:
+        return potential_names
 
-                best = max(found_direct, key=len)
-                log.info(f"Mejor coincidencia directa: '{best}'")
-                return (best, 100)
+    def _build_candidates(self, texto: str, potential_names: List[str]) -> List[str]:
 
-        candidates = potential_names if potential_names else [texto[:3000]]
-        
-        best_match_name = None
-        best_match_score = 0
+        candidates = potential_names if potential_names else [texto[:_MAX_TEXT_CHARS]]
 
         cleaned_candidates = []
         for cand in candidates:
 
-             c = re.sub(r'[^\w\sÁÉÍÓÚáéíóúñÑ]', '', cand).strip()
+             c = normalize_name(_CANDIDATE_SYMBOLS.sub('', cand))
              if len(c) > 2:
                  cleaned_candidates.append(c)
-        
+
         if not cleaned_candidates and not potential_names:
 
-             cleaned_candidates = [self.clean_text_for_matching(texto)]
-
-        for candidate in cleaned_candidates:
-            result = fuzzy_process.extractOne(
-                candidate,
-                student_list,
-                score_cutoff=self.threshold
-            )
-            if result:
-                if result[1] > best_match_score:
-                    best_match_name = result[0]
-                    best_match_score = result[1]
-
-        if best_match_name:
-            log.info(f"Match encontrado: '{best_match_name}' (score: {best_match_score})")
-            return (best_match_name, best_match_score)
-        else:
-            log.warning(f"No se encontró nombre con score >= {self.threshold}")
-            return None
+             cleaned_candidates = [normalize_name(self.clean_text_for_matching(texto))]
+
+        return [c for c in cleaned_candidates if c]
 
     def clean_text_for_matching(self, texto: str) -> str:
 
         if not texto:
             return ""
-        
-        texto = texto[:3000].lower()
+
+        texto = texto[:_MAX_TEXT_CHARS].lower()
         texto = re.sub(r'[^a-záéíóúñ0-9\s]', ' ', texto)
         texto = " ".join(texto.split())
         return texto
@@ -1,41 +1,28 @@
 import logging
 import io
-import pdfplumber
 from docx import Document
 from typing import Optional
 
+from .document_inspector import DocumentInspector
+
 log = logging.getLogger(__name__)
 
 
 class TextExtractor:
 
-    def extract_text_from_pdf(self, pdf_bytes: bytes) -> Optional[str]:
-
-        try:
-            texto_completo = []
-
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                log.info(f"Extrayendo texto de PDF con {len(pdf.pages)} páginas")
+    def __init__(self, inspector: Optional[DocumentInspector] = None):
 
-                for i, page in enumerate(pdf.pages):
-                    texto_pagina = page.extract_text()
+        self.inspector = inspector or DocumentInspector()
 
-                    if texto_pagina:
-                        texto_completo.append(texto_pagina)
-                        log.debug(f"Página {i + 1}: {len(texto_pagina)} caracteres")
-                    else:
-                        log.debug(f"Página {i + 1}: sin texto extraíble")
+    def extract_text_from_pdf(self, pdf_bytes: bytes) -> Optional[str]:
 
-            if texto_completo:
-                resultado = "\n".join(texto_completo)
-                log.info(f"Texto extraído exitosamente: {len(resultado)} caracteres totales")
-                return resultado
-            else:
-                log.warning("No se pudo extraer texto del PDF")
-                return None
+        resultado = self.inspector.inspect(pdf_bytes, '.pdf').text
 
-        except Exception as e:
-            log.error(f"Error al extraer texto de PDF: {e}")
+        if resultado:
+            log.info(f"Texto extraído exitosamente: {len(resultado)} caracteres totales")
+            return resultado
+        else:
+            log.warning("No se pudo extraer texto del PDF")
             return None
 
     def extract_text_from_docx(self, docx_bytes: bytes) -> Optional[str]:
@@ -64,15 +51,8 @@ class TextExtractor:
     ) -> bool:
 
         try:
-            if file_extension.lower() == '.pdf':
-                texto = self.extract_text_from_pdf(file_bytes)
-            elif file_extension.lower() in ['.docx', '.doc']:
-                texto = self.extract_text_from_docx(file_bytes)
-            else:
-                log.warning(f"Extensión no soportada: {file_extension}")
-                return False
-
-            has_text = texto is not None and len(texto.strip()) > 50
+            inspection = self.inspector.inspect(file_bytes, file_extension, stop_when_text_found=True)
+            has_text = inspection.has_extractable_text
 
             log.info(f"Archivo {'tiene' if has_text else 'NO tiene'} texto extraíble")
             return has_text
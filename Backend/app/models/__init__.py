@@ -14,6 +14,10 @@ from .alumno import Alumno
 from .alumno_nrc import AlumnoNrc
 from .facultad import Facultad
 from .escuela import Escuela
+from .lote_procesamiento import LoteProcesamiento
+from .ocr_cache import OcrCacheEntry
+from .extraccion_cache import ExtraccionCacheEntry
+from .respuesta_llm_cache import RespuestaLLMCacheEntry
 
 __all__ = [
     "Base",
@@ -35,5 +39,9 @@ __all__ = [
     "AlumnoNrc",
     "Facultad",
     "Escuela",
+    "LoteProcesamiento",
+    "OcrCacheEntry",
+    "ExtraccionCacheEntry",
+    "RespuestaLLMCacheEntry",
 ]
 
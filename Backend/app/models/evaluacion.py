@@ -21,6 +21,7 @@ class Evaluacion(Base):
     tipo_documento = Column(String, default="examen")
 
     estado = Column(String, default="pendiente")
+    fecha_reclamo = Column(DateTime, nullable=True)
 
     profesor = relationship("Usuario", back_populates="evaluaciones")
     rubrica = relationship("Rubrica", back_populates="evaluaciones")
@@ -0,0 +1,14 @@
+import datetime
+from sqlalchemy import Column, String, Text, DateTime, JSON
+from app.config.database import Base
+
+
+class ExtraccionCacheEntry(Base):
+
+    __tablename__ = "extraccion_cache"
+
+    hash = Column(String(64), primary_key=True)
+    version = Column(String(64), nullable=False)
+    texto_extraido = Column(Text, nullable=True)
+    imagenes_gcs = Column(JSON, nullable=True)
+    fecha_creacion = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,26 @@
+import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from app.config.database import Base
+
+
+class LoteProcesamiento(Base):
+
+    __tablename__ = "lotes_procesamiento"
+
+    id = Column(Integer, primary_key=True, index=True)
+    profesor_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False, index=True)
+    tipo_documento = Column(String, default="examen")
+
+    estado = Column(String, default="pendiente")
+    total = Column(Integer, default=0)
+    procesados = Column(Integer, default=0)
+    detalle = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Lo necesario para reanudar el lote si la tarea se reintenta: parámetros de la solicitud e
+    # ids de las evaluaciones ya creadas (alineados con el índice del alumno).
+    parametros = Column(JSON, nullable=True)
+    evaluacion_ids = Column(JSON, nullable=True)
+
+    fecha_creacion = Column(DateTime, default=datetime.datetime.utcnow)
+    fecha_actualizacion = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
@@ -0,0 +1,12 @@
+import datetime
+from sqlalchemy import Column, String, Text, DateTime
+from app.config.database import Base
+
+
+class OcrCacheEntry(Base):
+
+    __tablename__ = "ocr_cache"
+
+    hash = Column(String(64), primary_key=True)
+    texto = Column(Text, nullable=False)
+    fecha_creacion = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,15 @@
+import datetime
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from app.config.database import Base
+
+
+class RespuestaLLMCacheEntry(Base):
+
+    __tablename__ = "respuesta_llm_cache"
+
+    hash = Column(String(64), primary_key=True)
+    modelo = Column(String, nullable=False)
+    respuesta = Column(JSON, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    fecha_creacion = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    fecha_acceso = Column(DateTime, default=datetime.datetime.utcnow, index=True)
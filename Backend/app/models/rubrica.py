@@ -14,6 +14,7 @@ class Rubrica(Base):
     mensaje_ciac = Column(Text, nullable=True)
     estado_director = Column(String(50), default="pendiente")
     mensaje_director = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     criterios = relationship("Criterio", back_populates="rubrica", cascade="all, delete-orphan",
                              order_by="Criterio.orden")
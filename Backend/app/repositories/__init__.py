@@ -6,6 +6,9 @@ from .archivo_repository import ArchivoRepository
 from .resultado_repository import ResultadoRepository
 from .curso_repository import CursoRepository
 from .meta_porcentaje_repository import MetaPorcentajeRepository
+from .lote_repository import LoteRepository
+from .extraccion_cache_repository import ExtraccionCacheRepository
+from .respuesta_llm_cache_repository import RespuestaLLMCacheRepository
 
 __all__ = [
     'BaseRepository',
@@ -15,5 +18,8 @@ __all__ = [
     'ArchivoRepository',
     'ResultadoRepository',
     'CursoRepository',
-    'MetaPorcentajeRepository'
+    'MetaPorcentajeRepository',
+    'LoteRepository',
+    'ExtraccionCacheRepository',
+    'RespuestaLLMCacheRepository'
 ]
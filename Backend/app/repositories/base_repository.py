@@ -1,5 +1,6 @@
 import logging
-from typing import TypeVar, Generic, List, Optional, Type
+from typing import TypeVar, Generic, List, Optional, Type, Dict, Any
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 log = logging.getLogger(__name__)
@@ -47,6 +48,22 @@ class BaseRepository(Generic[ModelType]):
             log.error(f"Error al crear {self.model.__name__}: {e}")
             raise
 
+    def bulk_create(self, rows: List[Dict[str, Any]]) -> List[int]:
+
+        if not rows:
+            return []
+
+        try:
+            stmt = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+            ids = list(self._db.scalars(stmt, rows))
+            self._db.commit()
+            log.info(f"Creados {len(ids)} {self.model.__name__} en una sola transacción")
+            return ids
+        except Exception as e:
+            self._db.rollback()
+            log.error(f"Error al crear lote de {self.model.__name__}: {e}")
+            raise
+
     def update(self, id: int, **kwargs) -> Optional[ModelType]:
 
         try:
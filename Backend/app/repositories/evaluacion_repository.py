@@ -1,8 +1,9 @@
+import datetime
 import logging
 from typing import List, Optional
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, joinedload
-from app.models import Evaluacion, Curso
+from app.models import Evaluacion, Curso, ArchivoProcesado
 from app.repositories.base_repository import BaseRepository
 
 log = logging.getLogger(__name__)
@@ -59,6 +60,80 @@ class EvaluacionRepository(BaseRepository):
     def get_with_details(self, evaluacion_id: int) -> Optional[Evaluacion]:
         return self.get_with_resultados(evaluacion_id)
 
+    def get_batch_candidates(
+            self,
+            evaluacion: Evaluacion,
+            limit: int,
+            estado_reclamo: Optional[str] = None,
+            reclamo_vencido_antes: Optional[datetime.datetime] = None
+    ) -> List[Evaluacion]:
+
+        disponibles = Evaluacion.estado == "pendiente"
+        if estado_reclamo and reclamo_vencido_antes:
+            # Un reclamo vencido (trabajador caído a mitad de lote) vuelve a estar disponible.
+            disponibles = or_(disponibles, self._reclamo_vencido(estado_reclamo, reclamo_vencido_antes))
+
+        try:
+            return (
+                self.db.query(Evaluacion)
+                .options(joinedload(Evaluacion.archivos_procesados))
+                .filter(
+                    Evaluacion.id != evaluacion.id,
+                    Evaluacion.profesor_id == evaluacion.profesor_id,
+                    Evaluacion.rubrica_id == evaluacion.rubrica_id,
+                    Evaluacion.tema == evaluacion.tema,
+                    Evaluacion.descripcion_tema == evaluacion.descripcion_tema,
+                    Evaluacion.tipo_documento == evaluacion.tipo_documento,
+                    disponibles,
+                    Evaluacion.archivos_procesados.any(ArchivoProcesado.texto_extraido != None)
+                )
+                .order_by(Evaluacion.id)
+                .limit(limit)
+                .all()
+            )
+        except Exception as e:
+            log.error(f"Error al obtener evaluaciones agrupables con {evaluacion.id}: {e}")
+            raise
+
+    @staticmethod
+    def _reclamo_vencido(estado_reclamo: str, vencido_antes: datetime.datetime):
+
+        return and_(
+            Evaluacion.estado == estado_reclamo,
+            or_(Evaluacion.fecha_reclamo == None, Evaluacion.fecha_reclamo < vencido_antes)
+        )
+
+    def cambiar_estado(
+            self,
+            evaluacion_id: int,
+            desde: Optional[str],
+            hacia: str,
+            reclamo_vencido_antes: Optional[datetime.datetime] = None
+    ) -> bool:
+
+        # UPDATE condicional: solo un trabajador puede tomar la evaluación aunque compitan varios.
+        # Con `reclamo_vencido_antes`, `desde` es el estado de reclamo y solo se toma si está vencido.
+        if reclamo_vencido_antes is not None:
+            condicion = self._reclamo_vencido(desde, reclamo_vencido_antes)
+        else:
+            condicion = Evaluacion.estado == desde
+
+        try:
+            filas = (
+                self.db.query(Evaluacion)
+                .filter(Evaluacion.id == evaluacion_id, condicion)
+                .update({
+                    Evaluacion.estado: hacia,
+                    Evaluacion.fecha_reclamo: datetime.datetime.utcnow()
+                }, synchronize_session=False)
+            )
+            self.db.commit()
+            return filas == 1
+        except Exception as e:
+            self.db.rollback()
+            log.error(f"Error al cambiar estado de evaluación {evaluacion_id} ({desde} -> {hacia}): {e}")
+            raise
+
     def get_by_filters(
         self,
         semestre: str = None,
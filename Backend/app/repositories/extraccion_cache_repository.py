@@ -0,0 +1,49 @@
+import logging
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.models import ExtraccionCacheEntry
+from app.repositories.base_repository import BaseRepository
+
+log = logging.getLogger(__name__)
+
+
+class ExtraccionCacheRepository(BaseRepository):
+
+    def __init__(self, db: Session):
+        super().__init__(db, ExtraccionCacheEntry)
+
+    def get_by_hash(self, file_hash: str, version: str) -> Optional[ExtraccionCacheEntry]:
+
+        try:
+            return (
+                self.db.query(ExtraccionCacheEntry)
+                .filter(ExtraccionCacheEntry.hash == file_hash, ExtraccionCacheEntry.version == version)
+                .first()
+            )
+        except Exception as e:
+            log.error(f"Error al leer caché de extracción {file_hash[:12]}: {e}")
+            raise
+
+    def guardar(
+            self,
+            file_hash: str,
+            version: str,
+            texto_extraido: Optional[str],
+            imagenes_gcs: List[str]
+    ) -> ExtraccionCacheEntry:
+
+        try:
+            entry = self.db.merge(ExtraccionCacheEntry(
+                hash=file_hash,
+                version=version,
+                texto_extraido=texto_extraido,
+                imagenes_gcs=imagenes_gcs
+            ))
+            self.db.commit()
+            log.info(f"Extracción cacheada: hash={file_hash[:12]}, imágenes={len(imagenes_gcs)}")
+            return entry
+
+        except Exception as e:
+            log.error(f"Error al guardar caché de extracción {file_hash[:12]}: {e}")
+            self.db.rollback()
+            raise
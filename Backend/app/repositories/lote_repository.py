@@ -0,0 +1,97 @@
+import datetime
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.models import LoteProcesamiento
+from app.repositories.base_repository import BaseRepository
+
+log = logging.getLogger(__name__)
+
+ERROR_INTERRUMPIDO = "Lote interrumpido: el procesamiento no registró avances a tiempo"
+
+
+class LoteRepository(BaseRepository):
+
+    def __init__(self, db: Session):
+        super().__init__(db, LoteProcesamiento)
+
+    def create_lote(
+            self,
+            profesor_id: int,
+            tipo_documento: str,
+            total: int = 0,
+            parametros: Optional[Dict] = None
+    ) -> LoteProcesamiento:
+
+        lote = LoteProcesamiento(
+            profesor_id=profesor_id,
+            tipo_documento=tipo_documento,
+            estado="pendiente",
+            total=total,
+            procesados=0,
+            detalle=[],
+            parametros=parametros
+        )
+        return self.create(lote)
+
+    @staticmethod
+    def es_reanudable(lote: LoteProcesamiento) -> bool:
+
+        # Un lote cerrado por el barrido de interrumpidos se reanuda si su tarea vuelve a llegar.
+        return lote.estado in ("pendiente", "procesando") or (lote.estado == "error" and lote.error == ERROR_INTERRUMPIDO)
+
+    def registrar_evaluaciones(self, lote_id: int, evaluacion_ids: List[int]) -> Optional[LoteProcesamiento]:
+        return self.update(lote_id, evaluacion_ids=list(evaluacion_ids))
+
+    def iniciar(self, lote_id: int, total: int) -> Optional[LoteProcesamiento]:
+        return self.update(lote_id, estado="procesando", total=total, procesados=0, detalle=[])
+
+    def registrar_progreso(self, lote_id: int, item: Dict) -> Optional[LoteProcesamiento]:
+        return self.registrar_items(lote_id, [item])
+
+    def registrar_items(self, lote_id: int, items: List[Dict]) -> Optional[LoteProcesamiento]:
+
+        try:
+            lote = self.get_by_id(lote_id)
+            if not lote:
+                return None
+
+            lote.detalle = list(lote.detalle or []) + list(items)
+            lote.procesados = (lote.procesados or 0) + len(items)
+            self.db.commit()
+            return lote
+        except Exception as e:
+            self.db.rollback()
+            log.error(f"Error al registrar progreso del lote {lote_id}: {e}")
+            raise
+
+    def finalizar(self, lote_id: int, error: Optional[str] = None) -> Optional[LoteProcesamiento]:
+
+        if error:
+            return self.update(lote_id, estado="error", error=error)
+        return self.update(lote_id, estado="completado", error=None)
+
+    def marcar_interrumpidos(self, vencido_antes: datetime.datetime, lote_id: Optional[int] = None) -> int:
+
+        # Un lote sin avances desde `vencido_antes` perdió su trabajo en segundo plano (reinicio
+        # o caída de la instancia): se cierra como error en vez de quedar "procesando" para siempre.
+        try:
+            consulta = self.db.query(LoteProcesamiento).filter(
+                LoteProcesamiento.estado.in_(["pendiente", "procesando"]),
+                LoteProcesamiento.fecha_actualizacion < vencido_antes
+            )
+            if lote_id is not None:
+                consulta = consulta.filter(LoteProcesamiento.id == lote_id)
+            filas = consulta.update({
+                LoteProcesamiento.estado: "error",
+                LoteProcesamiento.error: ERROR_INTERRUMPIDO,
+                LoteProcesamiento.fecha_actualizacion: datetime.datetime.utcnow()
+            }, synchronize_session=False)
+            self.db.commit()
+            if filas:
+                log.warning(f"{filas} lote(s) sin avances marcados como interrumpidos")
+            return filas
+        except Exception as e:
+            self.db.rollback()
+            log.error(f"Error al marcar lotes interrumpidos: {e}")
+            raise
@@ -0,0 +1,90 @@
+import datetime
+import logging
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.models import RespuestaLLMCacheEntry
+from app.repositories.base_repository import BaseRepository
+
+log = logging.getLogger(__name__)
+
+
+class RespuestaLLMCacheRepository(BaseRepository):
+
+    def __init__(self, db: Session):
+        super().__init__(db, RespuestaLLMCacheEntry)
+
+    def get_vigente(self, key: str, ttl: datetime.timedelta) -> Optional[RespuestaLLMCacheEntry]:
+
+        try:
+            ahora = datetime.datetime.utcnow()
+            entry = (
+                self.db.query(RespuestaLLMCacheEntry)
+                .filter(
+                    RespuestaLLMCacheEntry.hash == key,
+                    RespuestaLLMCacheEntry.fecha_creacion >= ahora - ttl
+                )
+                .first()
+            )
+            if entry:
+                entry.fecha_acceso = ahora
+                entry.hits = (entry.hits or 0) + 1
+                self.db.commit()
+            return entry
+        except Exception as e:
+            log.error(f"Error al leer caché de respuestas LLM {key[:12]}: {e}")
+            self.db.rollback()
+            raise
+
+    def guardar(self, key: str, modelo: str, respuesta: Dict) -> RespuestaLLMCacheEntry:
+
+        try:
+            ahora = datetime.datetime.utcnow()
+            entry = self.db.merge(RespuestaLLMCacheEntry(
+                hash=key,
+                modelo=modelo,
+                respuesta=respuesta,
+                hits=0,
+                fecha_creacion=ahora,
+                fecha_acceso=ahora
+            ))
+            self.db.commit()
+            log.info(f"Respuesta LLM cacheada: hash={key[:12]}, modelo={modelo}")
+            return entry
+
+        except Exception as e:
+            log.error(f"Error al guardar caché de respuestas LLM {key[:12]}: {e}")
+            self.db.rollback()
+            raise
+
+    def purgar(self, ttl: datetime.timedelta, max_entries: int) -> int:
+
+        try:
+            eliminadas = (
+                self.db.query(RespuestaLLMCacheEntry)
+                .filter(RespuestaLLMCacheEntry.fecha_creacion < datetime.datetime.utcnow() - ttl)
+                .delete(synchronize_session=False)
+            )
+
+            # LRU: por encima del máximo se descartan las menos usadas recientemente.
+            if max_entries > 0:
+                sobrantes = (
+                    self.db.query(RespuestaLLMCacheEntry.hash)
+                    .order_by(RespuestaLLMCacheEntry.fecha_acceso.desc())
+                    .offset(max_entries)
+                    .subquery()
+                )
+                eliminadas += (
+                    self.db.query(RespuestaLLMCacheEntry)
+                    .filter(RespuestaLLMCacheEntry.hash.in_(sobrantes.select()))
+                    .delete(synchronize_session=False)
+                )
+
+            self.db.commit()
+            if eliminadas:
+                log.info(f"Caché de respuestas LLM: {eliminadas} entradas eliminadas")
+            return eliminadas
+
+        except Exception as e:
+            log.error(f"Error al purgar caché de respuestas LLM: {e}")
+            self.db.rollback()
+            raise
@@ -63,6 +63,8 @@ class RubricaRepository(BaseRepository):
             rubrica.mensaje_ciac = None
             rubrica.estado_director = 'pendiente'
             rubrica.mensaje_director = None
+            # Invalida los prompts compilados y contextos cacheados de la versión anterior.
+            rubrica.version = (rubrica.version or 1) + 1
 
             existing_criterios = sorted(rubrica.criterios, key=lambda c: c.orden)
 
@@ -6,9 +6,10 @@ from .evaluacion_schemas import (
     ResultadoAnalisisSchema,
     ArchivoProcesadoSchema,
     QualityDashboardStats,
-    EvaluacionFeedbackProfesorUpdateSchema
+    EvaluacionFeedbackProfesorUpdateSchema,
+    LoteProcesamientoSchema
 )
-from .task_schemas import FileTaskPayload, EvaluationTaskPayload
+from .task_schemas import FileTaskPayload, EvaluationTaskPayload, ExamBatchTaskPayload
 from .common_schemas import GenerateUploadURLRequest
 from .usuario_schemas import UsuarioCreate, UsuarioResponse, UsuarioCreateByAdmin, UsuarioUpdate
 from .rubrica_schemas import (
@@ -34,6 +35,7 @@ __all__ = [
     'PDFFileInfo',
     'FileTaskPayload',
     'EvaluationTaskPayload',
+    'ExamBatchTaskPayload',
     'GenerateUploadURLRequest',
     'EvaluacionSchema',
     'EvaluacionDetailSchema',
@@ -41,6 +43,7 @@ __all__ = [
     'ArchivoProcesadoSchema',
     'QualityDashboardStats',
     'EvaluacionFeedbackProfesorUpdateSchema',
+    'LoteProcesamientoSchema',
 
     'UsuarioCreate',
     'UsuarioResponse',
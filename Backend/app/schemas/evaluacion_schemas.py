@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
+from datetime import datetime
 
 
 class PDFFileInfo(BaseModel):
@@ -109,3 +110,33 @@ class QualityDashboardStats(BaseModel):
     total_alumnos: int
     porcentaje_logro: float
     criterios: List[dict]
+
+
+class LoteItemSchema(BaseModel):
+    indice: int
+    evaluacion_id: int
+    nombre_alumno: str
+    confianza: float | None = None
+    archivo: str | None = None
+    estado: str
+    error: str | None = None
+
+
+class LoteProcesamientoSchema(BaseModel):
+    id: int
+    tipo_documento: str | None = None
+    estado: str
+    total: int = 0
+    procesados: int = 0
+    detalle: List[LoteItemSchema] = []
+    error: str | None = None
+    fecha_creacion: datetime | None = None
+    fecha_actualizacion: datetime | None = None
+
+    @field_validator('detalle', mode='before')
+    @classmethod
+    def default_detalle(cls, v):
+        return v or []
+
+    class Config:
+        from_attributes = True
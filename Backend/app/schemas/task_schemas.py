@@ -9,3 +9,7 @@ class FileTaskPayload(BaseModel):
 
 class EvaluationTaskPayload(BaseModel):
     evaluacion_id: int
+    bypass_cache: bool = False
+
+class ExamBatchTaskPayload(BaseModel):
+    lote_id: int
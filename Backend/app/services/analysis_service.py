@@ -1,20 +1,40 @@
 import logging
+import os
+import datetime
+import hashlib
+import itertools
+import unicodedata
 from typing import Dict, List, Optional
 import json
 
 from app.services.gemini_analyzer import GeminiAnalyzer
 from app.models.resultado_analisis import ResultadoAnalisis
+from app.models import Evaluacion, ArchivoProcesado, Rubrica
 from app.repositories import (
     ArchivoRepository,
     ResultadoRepository,
     RubricaRepository,
-    EvaluacionRepository
+    EvaluacionRepository,
+    RespuestaLLMCacheRepository
 )
 from app.clients import GCSClient
-from app.extractors import ImageExtractor
+from app.extractors import ImageExtractor, ImageRecord
+from app.config.settings import settings
+from app.clients.llm_gateway import is_transient_llm_error
 
 log = logging.getLogger(__name__)
 
+ESTADO_ANALIZANDO = "ANALIZANDO"
+RESPUESTA_CACHE_VERSION = "2"
+RESPUESTA_CACHE_PURGE_EVERY = 50
+
+_escrituras_cache = itertools.count(1)
+
+
+class EvaluacionEnCursoError(RuntimeError):
+    pass
+
+
 class AnalysisService:
 
     def __init__(
@@ -25,7 +45,13 @@ class AnalysisService:
             resultado_repo: ResultadoRepository,
             gemini_analyzer: GeminiAnalyzer,
             gcs_client: Optional[GCSClient] = None,
-            image_extractor: Optional[ImageExtractor] = None
+            image_extractor: Optional[ImageExtractor] = None,
+            batch_size: int = settings.ANALYSIS_BATCH_SIZE,
+            batch_max_chars: int = settings.ANALYSIS_BATCH_MAX_CHARS,
+            claim_timeout_seconds: float = settings.ANALYSIS_CLAIM_TIMEOUT_SECONDS,
+            respuesta_cache_repo: Optional[RespuestaLLMCacheRepository] = None,
+            cache_ttl_hours: float = settings.LLM_CACHE_TTL_HOURS,
+            cache_max_entries: int = settings.LLM_CACHE_MAX_ENTRIES
     ):
         self.evaluacion_repo = evaluacion_repo
         self.archivo_repo = archivo_repo
@@ -34,8 +60,14 @@ class AnalysisService:
         self.analyzer = gemini_analyzer
         self.gcs_client = gcs_client
         self.image_extractor = image_extractor
+        self.batch_size = max(1, batch_size)
+        self.batch_max_chars = batch_max_chars
+        self.claim_timeout = datetime.timedelta(seconds=claim_timeout_seconds)
+        self.respuesta_cache_repo = respuesta_cache_repo
+        self.cache_ttl = datetime.timedelta(hours=cache_ttl_hours)
+        self.cache_max_entries = cache_max_entries
 
-    def analyze_evaluation(self, evaluacion_id: int):
+    def analyze_evaluation(self, evaluacion_id: int, bypass_cache: bool = False):
 
         try:
             log.info(f"Iniciando análisis para evaluación {evaluacion_id}")
@@ -52,36 +84,59 @@ class AnalysisService:
             if not archivos:
                 raise ValueError("No hay archivos para analizar")
 
-            full_text = ""
-            images_base64 = []
-            
-            for archivo in archivos:
-                if archivo.texto_extraido:
-                    full_text += f"\n--- Archivo: {archivo.nombre_archivo_original} ---\n"
-                    full_text += archivo.texto_extraido
-                
-                if archivo.analisis_visual and self.gcs_client:
-                    try:
-                        visual_data = json.loads(archivo.analisis_visual)
-                        gcs_images = visual_data.get("imagenes_gcs", [])
-                        if gcs_images:
-                            log.info(f"Descargando {len(gcs_images)} imágenes de GCS para evaluación de archivo ID={archivo.id}")
-                            for img_filename in gcs_images:
-                                try:
-                                    img_bytes = self.gcs_client.download_blob(img_filename)
-                                    import base64
-                                    img_b64 = base64.b64encode(img_bytes).decode('utf-8')
-                                    images_base64.append(img_b64)
-                                except Exception as img_err:
-                                    log.warning(f"Error al descargar o procesar imagen {img_filename} de GCS: {img_err}")
-                                    continue
-                    except Exception as json_err:
-                        log.warning(f"Error al decodificar analisis_visual del archivo {archivo.id}: {json_err}")
-                        pass
+            # Una recalificación explícita se hace siempre individualmente y sin caché.
+            if self.batch_size > 1 and not bypass_cache and self._is_batchable(evaluacion, archivos):
+                existente = self.resultado_repo.get_by_evaluacion(evaluacion_id)
+                if evaluacion.estado == "COMPLETADO" and existente:
+                    log.info(f"Evaluación {evaluacion_id} ya calificada en un lote; se omite")
+                    return existente
+
+                if evaluacion.estado == ESTADO_ANALIZANDO:
+                    # Reclamo de un lote cuyo trabajador murió: pasado el plazo se califica individualmente.
+                    if not self._take_stale_claim(evaluacion.id):
+                        raise EvaluacionEnCursoError(f"Evaluación {evaluacion_id} en análisis por otro trabajador")
+                    log.warning(f"Reclamo vencido de la evaluación {evaluacion_id}; se analiza individualmente")
+                    return self._analyze_single(evaluacion, rubrica, archivos)
+
+                if not self.evaluacion_repo.cambiar_estado(evaluacion_id, evaluacion.estado, ESTADO_ANALIZANDO):
+                    raise EvaluacionEnCursoError(f"Evaluación {evaluacion_id} en análisis por otro trabajador")
+
+                return self._analyze_batch(evaluacion, rubrica, archivos)
+
+            return self._analyze_single(evaluacion, rubrica, archivos, bypass_cache=bypass_cache)
+
+        except EvaluacionEnCursoError:
+            raise
+        except Exception as e:
+            if is_transient_llm_error(e):
+                # El estado no pasa a ERROR: el 500 hace que Cloud Tasks reintente más tarde.
+                log.warning(f"Gemini no disponible para evaluación {evaluacion_id}; se reintentará: {e}")
+                self.evaluacion_repo.cambiar_estado(evaluacion_id, ESTADO_ANALIZANDO, "pendiente")
+                raise
+            log.error(f"Error en analyze_evaluation: {e}")
+            evaluacion = self.evaluacion_repo.get_by_id(evaluacion_id)
+            if evaluacion:
+                self.evaluacion_repo.update(evaluacion.id, estado="ERROR")
+            raise
+
+    def _analyze_single(
+            self,
+            evaluacion: Evaluacion,
+            rubrica: Rubrica,
+            archivos: List[ArchivoProcesado],
+            bypass_cache: bool = False
+    ):
+
+        text = self._build_text(archivos)
+        cache_key = self._response_cache_key(evaluacion, rubrica, archivos, text)
+        resultados_gemini = None if bypass_cache else self._get_cached_response(cache_key)
 
+        if resultados_gemini is None:
+            # Si Gemini no va a recibir las imágenes no hace falta descargarlas.
+            images = self._load_images(archivos) if GeminiAnalyzer.sends_images(evaluacion.tipo_documento) else []
             resultados_gemini = self.analyzer.analyze_document(
-                text=full_text,
-                images_base64=images_base64, 
+                text=text,
+                images=images,
                 rubrica=rubrica,
                 tema=evaluacion.tema,
                 descripcion_tema=evaluacion.descripcion_tema,
@@ -92,93 +147,286 @@ class AnalysisService:
                 log.error("Gemini no devolvió resultados válidos")
                 raise ValueError("Falló el análisis de Gemini")
 
-            criterios_evaluados = {}
-            nota_final = 0.0
+            self._store_cached_response(cache_key, rubrica, resultados_gemini)
 
-            info_criterios = {}
-            for criterio in rubrica.criterios:
-                max_nivel = 0.0
-                for nivel in criterio.niveles:
-                    if nivel.puntaje > max_nivel:
-                        max_nivel = nivel.puntaje
-                
-                info_criterios[str(criterio.id)] = {
-                    "max_puntos": max_nivel if max_nivel > 0 else 20.0
-                }
+        return self._save_result(evaluacion.id, rubrica, resultados_gemini)
 
-            criterios_by_id = {c.id: c for c in rubrica.criterios}
-            unmatched_criterios = list(rubrica.criterios)
+    def _analyze_batch(self, evaluacion: Evaluacion, rubrica: Rubrica, archivos: List[ArchivoProcesado]):
 
-            for res in resultados_gemini.get("resultados", []):
-                criterio_id = res.get("criterio_id")
-                criterio_match = None
+        grupo = [(evaluacion, archivos)]
+        candidatas = self.evaluacion_repo.get_batch_candidates(
+            evaluacion,
+            limit=self.batch_size * 2,
+            estado_reclamo=ESTADO_ANALIZANDO,
+            reclamo_vencido_antes=self._claim_expired_before()
+        )
+        for candidata in candidatas:
+            if len(grupo) >= self.batch_size:
+                break
+            if not self._is_batchable(candidata, candidata.archivos_procesados):
+                continue
+            if candidata.estado == ESTADO_ANALIZANDO:
+                tomada = self._take_stale_claim(candidata.id)
+            else:
+                tomada = self.evaluacion_repo.cambiar_estado(candidata.id, "pendiente", ESTADO_ANALIZANDO)
+            if tomada:
+                grupo.append((candidata, list(candidata.archivos_procesados)))
 
-                if criterio_id is not None:
-                    try:
-                        c_id = int(criterio_id)
-                        if c_id in criterios_by_id:
-                            criterio_match = criterios_by_id[c_id]
-                    except (ValueError, TypeError):
-                        pass
-
-                if not criterio_match:
-                    criterio_nombre = res.get("criterio")
-                    if criterio_nombre:
-                        criterio_nombre_clean = criterio_nombre.strip().lower()
-                        for c in unmatched_criterios:
-                            if c.nombre_criterio.strip().lower() == criterio_nombre_clean:
-                                criterio_match = c
-                                break
-
-                if not criterio_match and unmatched_criterios:
-                    criterio_match = unmatched_criterios[0]
-
-                if criterio_match:
-                    if criterio_match in unmatched_criterios:
-                        unmatched_criterios.remove(criterio_match)
-                    key = str(criterio_match.id)
+        if len(grupo) == 1:
+            return self._analyze_single(evaluacion, rubrica, archivos)
+
+        textos = {e.id: self._build_text(a) for e, a in grupo}
+        cache_keys = {e.id: self._response_cache_key(e, rubrica, a, textos[e.id]) for e, a in grupo}
+        por_evaluacion: Dict[int, Dict] = {}
+        for miembro, _ in grupo:
+            cacheada = self._get_cached_response(cache_keys[miembro.id])
+            if cacheada is not None:
+                por_evaluacion[miembro.id] = cacheada
+
+        pendientes = [(e.id, textos[e.id]) for e, _ in grupo if e.id not in por_evaluacion]
+        if pendientes:
+            log.info(f"Analizando en lote evaluaciones {[doc_id for doc_id, _ in pendientes]} (rúbrica {rubrica.id})")
+            try:
+                nuevas = self.analyzer.analyze_batch(
+                    documentos=pendientes,
+                    rubrica=rubrica,
+                    tema=evaluacion.tema,
+                    descripcion_tema=evaluacion.descripcion_tema,
+                    tipo_documento=evaluacion.tipo_documento
+                )
+            except Exception:
+                # Las compañeras se liberan; la propia la resuelve analyze_evaluation.
+                for miembro, _ in grupo:
+                    if miembro.id != evaluacion.id:
+                        self.evaluacion_repo.cambiar_estado(miembro.id, ESTADO_ANALIZANDO, "pendiente")
+                raise
+            for doc_id, respuesta in nuevas.items():
+                self._store_cached_response(cache_keys[doc_id], rubrica, respuesta)
+            por_evaluacion.update(nuevas)
+
+        resultado_propio = None
+        error_propio = None
+        for miembro, archivos_miembro in grupo:
+            es_propia = miembro.id == evaluacion.id
+            try:
+                resultados_gemini = por_evaluacion.get(miembro.id)
+                if resultados_gemini:
+                    resultado = self._save_result(miembro.id, rubrica, resultados_gemini)
                 else:
-                    key = res.get("criterio") or f"unknown_{res.get('criterio_id')}"
+                    log.warning(f"Lote sin resultado para evaluación {miembro.id}; se analiza individualmente")
+                    resultado = self._analyze_single(miembro, rubrica, archivos_miembro)
+            except Exception as e:
+                if es_propia:
+                    error_propio = e
+                    continue
+                # La compañera vuelve a "pendiente": su propia tarea la analizará por separado.
+                log.error(f"Error al analizar evaluación {miembro.id} dentro del lote: {e}")
+                self.evaluacion_repo.cambiar_estado(miembro.id, ESTADO_ANALIZANDO, "pendiente")
+                continue
 
-                puntaje_obtenido = res.get("puntaje_obtenido", 0.0)
+            if es_propia:
+                resultado_propio = resultado
 
-                criterios_evaluados[key] = {
-                    "nivel": res.get("nivel_asignado"),
-                    "score": puntaje_obtenido, 
-                    "feedback": res.get("feedback"),
-                    "confidence": res.get("confidence", 0.0),
-                    "comentario": res.get("feedback", "")
-                }
+        if error_propio:
+            raise error_propio
+        return resultado_propio
 
-                nota_final += puntaje_obtenido
+    def _claim_expired_before(self) -> datetime.datetime:
+        return datetime.datetime.utcnow() - self.claim_timeout
 
-            nota_final = max(0.0, min(20.0, nota_final))
+    def _take_stale_claim(self, evaluacion_id: int) -> bool:
 
-            log.info(f"Análisis completado. Nota final calculada: {nota_final}")
+        return self.evaluacion_repo.cambiar_estado(
+            evaluacion_id, ESTADO_ANALIZANDO, ESTADO_ANALIZANDO,
+            reclamo_vencido_antes=self._claim_expired_before()
+        )
 
-            existing_result = self.resultado_repo.get_by_evaluacion(evaluacion_id)
-            if existing_result:
-                log.warning(f"Eliminando resultado previo para evaluación {evaluacion_id} antes de guardar nuevo análisis.")
-                self.resultado_repo.delete(existing_result.id)
+    def _response_cache_key(
+            self,
+            evaluacion: Evaluacion,
+            rubrica: Rubrica,
+            archivos: List[ArchivoProcesado],
+            text: str
+    ) -> str:
 
-            resultado = self.resultado_repo.create(
-                evaluacion_id=evaluacion_id,
-                criterios_json=criterios_evaluados,
-                nota_final=nota_final
-            )
+        # Las imágenes se identifican por su blob en GCS, que desde la caché de extracción
+        # es el sha256 del contenido: no hace falta descargarlas para calcular la clave.
+        partes = {
+            "version": RESPUESTA_CACHE_VERSION,
+            "modelo": self._model_version(),
+            "rubrica": [rubrica.id, getattr(rubrica, "version", None) or 1],
+            "tema": evaluacion.tema or "",
+            "descripcion_tema": evaluacion.descripcion_tema or "",
+            "tipo_documento": evaluacion.tipo_documento or "",
+            "texto": " ".join(unicodedata.normalize("NFC", text).split()),
+            "imagenes": [nombre for archivo in archivos for nombre in self._gcs_images(archivo)]
+        }
+        return hashlib.sha256(json.dumps(partes, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
 
-            feedback = resultados_gemini.get("comentarios_generales", "")
-            if feedback:
-                self.resultado_repo.update_feedback(resultado.id, feedback)
+    def _model_version(self) -> str:
 
-            self.evaluacion_repo.update(evaluacion.id, estado="COMPLETADO")
-            
-            log.info(f"Análisis completado. Nota final: {nota_final}")
-            return resultado
+        # Con un alias ("-latest") la clave cambiaría de modelo sin cambiar de nombre.
+        return getattr(self.analyzer, "model_version", None) or getattr(self.analyzer, "model_name", "")
 
+    def _get_cached_response(self, cache_key: str) -> Optional[Dict]:
+
+        if not self.respuesta_cache_repo:
+            return None
+        try:
+            entry = self.respuesta_cache_repo.get_vigente(cache_key, self.cache_ttl)
         except Exception as e:
-            log.error(f"Error en analyze_evaluation: {e}")
-            evaluacion = self.evaluacion_repo.get_by_id(evaluacion_id)
-            if evaluacion:
-                self.evaluacion_repo.update(evaluacion.id, estado="ERROR")
-            raise
+            log.warning(f"No se pudo consultar la caché de respuestas LLM: {e}")
+            return None
+
+        if entry and isinstance(entry.respuesta, dict) and entry.respuesta.get("resultados"):
+            log.info(f"Respuesta LLM servida desde caché (hash={cache_key[:12]}, hits={entry.hits})")
+            return entry.respuesta
+        return None
+
+    def _store_cached_response(self, cache_key: str, rubrica: Rubrica, respuesta: Dict) -> None:
+
+        # Solo respuestas completas: una parcial quedaría fijada hasta que venza el TTL.
+        if not self.respuesta_cache_repo or len(respuesta.get("resultados") or []) < len(rubrica.criterios):
+            return
+        try:
+            self.respuesta_cache_repo.guardar(cache_key, self._model_version(), respuesta)
+            if next(_escrituras_cache) % RESPUESTA_CACHE_PURGE_EVERY == 0:
+                self.respuesta_cache_repo.purgar(self.cache_ttl, self.cache_max_entries)
+        except Exception as e:
+            log.warning(f"No se pudo guardar la respuesta LLM en caché: {e}")
+
+    def _is_batchable(self, evaluacion: Evaluacion, archivos: List[ArchivoProcesado]) -> bool:
+
+        # Solo documentos cortos de un único archivo y sin imágenes que enviar a Gemini; los exámenes
+        # manuscritos tienen páginas en GCS, pero se califican solo con el texto.
+        if len(archivos) != 1 or not archivos[0].texto_extraido:
+            return False
+        if len(archivos[0].texto_extraido) > self.batch_max_chars:
+            return False
+        return not (GeminiAnalyzer.sends_images(evaluacion.tipo_documento) and self._gcs_images(archivos[0]))
+
+    @staticmethod
+    def _build_text(archivos: List[ArchivoProcesado]) -> str:
+
+        full_text = ""
+        for archivo in archivos:
+            if archivo.texto_extraido:
+                full_text += f"\n--- Archivo: {archivo.nombre_archivo_original} ---\n"
+                full_text += archivo.texto_extraido
+        return full_text
+
+    @staticmethod
+    def _gcs_images(archivo: ArchivoProcesado) -> List[str]:
+
+        if not archivo.analisis_visual:
+            return []
+        try:
+            return json.loads(archivo.analisis_visual).get("imagenes_gcs", [])
+        except Exception as json_err:
+            log.warning(f"Error al decodificar analisis_visual del archivo {archivo.id}: {json_err}")
+            return []
+
+    def _load_images(self, archivos: List[ArchivoProcesado]) -> List[ImageRecord]:
+
+        imagenes: List[ImageRecord] = []
+        if not self.gcs_client:
+            return imagenes
+
+        for archivo in archivos:
+            gcs_images = self._gcs_images(archivo)
+            if gcs_images:
+                log.info(f"Descargando {len(gcs_images)} imágenes de GCS para evaluación de archivo ID={archivo.id}")
+                for img_filename in gcs_images:
+                    try:
+                        img_bytes = self.gcs_client.download_blob(img_filename)
+                        imagenes.append(ImageRecord.from_bytes(img_bytes, os.path.splitext(img_filename)[1]))
+                    except Exception as img_err:
+                        log.warning(f"Error al descargar o procesar imagen {img_filename} de GCS: {img_err}")
+                        continue
+        return imagenes
+
+    def _save_result(self, evaluacion_id: int, rubrica: Rubrica, resultados_gemini: Dict):
+
+        criterios_evaluados = {}
+        nota_final = 0.0
+
+        info_criterios = {}
+        for criterio in rubrica.criterios:
+            max_nivel = 0.0
+            for nivel in criterio.niveles:
+                if nivel.puntaje > max_nivel:
+                    max_nivel = nivel.puntaje
+            
+            info_criterios[str(criterio.id)] = {
+                "max_puntos": max_nivel if max_nivel > 0 else 20.0
+            }
+
+        criterios_by_id = {c.id: c for c in rubrica.criterios}
+        unmatched_criterios = list(rubrica.criterios)
+
+        for res in resultados_gemini.get("resultados", []):
+            criterio_id = res.get("criterio_id")
+            criterio_match = None
+
+            if criterio_id is not None:
+                try:
+                    c_id = int(criterio_id)
+                    if c_id in criterios_by_id:
+                        criterio_match = criterios_by_id[c_id]
+                except (ValueError, TypeError):
+                    pass
+
+            if not criterio_match:
+                criterio_nombre = res.get("criterio")
+                if criterio_nombre:
+                    criterio_nombre_clean = criterio_nombre.strip().lower()
+                    for c in unmatched_criterios:
+                        if c.nombre_criterio.strip().lower() == criterio_nombre_clean:
+                            criterio_match = c
+                            break
+
+            if not criterio_match and unmatched_criterios:
+                criterio_match = unmatched_criterios[0]
+
+            if criterio_match:
+                if criterio_match in unmatched_criterios:
+                    unmatched_criterios.remove(criterio_match)
+                key = str(criterio_match.id)
+            else:
+                key = res.get("criterio") or f"unknown_{res.get('criterio_id')}"
+
+            puntaje_obtenido = res.get("puntaje_obtenido", 0.0)
+
+            criterios_evaluados[key] = {
+                "nivel": res.get("nivel_asignado"),
+                "score": puntaje_obtenido, 
+                "feedback": res.get("feedback"),
+                "confidence": res.get("confidence", 0.0),
+                "comentario": res.get("feedback", "")
+            }
+
+            nota_final += puntaje_obtenido
+
+        nota_final = max(0.0, min(20.0, nota_final))
+
+        log.info(f"Análisis completado. Nota final calculada: {nota_final}")
+
+        existing_result = self.resultado_repo.get_by_evaluacion(evaluacion_id)
+        if existing_result:
+            log.warning(f"Eliminando resultado previo para evaluación {evaluacion_id} antes de guardar nuevo análisis.")
+            self.resultado_repo.delete(existing_result.id)
+
+        resultado = self.resultado_repo.create(
+            evaluacion_id=evaluacion_id,
+            criterios_json=criterios_evaluados,
+            nota_final=nota_final
+        )
+
+        feedback = resultados_gemini.get("comentarios_generales", "")
+        if feedback:
+            self.resultado_repo.update_feedback(resultado.id, feedback)
+
+        self.evaluacion_repo.update(evaluacion_id, estado="COMPLETADO")
+        
+        log.info(f"Análisis completado. Nota final: {nota_final}")
+        return resultado
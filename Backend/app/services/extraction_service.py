@@ -1,14 +1,22 @@
 import logging
 import os
 import json
-from typing import Dict, Optional, List
+import hashlib
+import tempfile
+from typing import Dict, Iterator, Optional, List, Tuple
 
 from app.clients import GCSClient, RapidAPIClient, GeminiClient
-from app.extractors import TextExtractor, ImageExtractor, StudentNameMatcher
-from app.repositories import ArchivoRepository
+from app.config.settings import settings
+from app.extractors import TextExtractor, ImageExtractor, StudentNameMatcher, DocumentInspection
+from app.config.process_pool import get_process_pool
+from app.extractors.pdf_text_engines import DocumentSource, open_pdf, rasterize_pages
+from app.repositories import ArchivoRepository, ExtraccionCacheRepository
 
 log = logging.getLogger(__name__)
 
+# Incrementar cuando cambie la forma en que se extrae texto o imágenes.
+EXTRACTION_CACHE_VERSION = "2"
+
 
 class ExtractionService:
 
@@ -20,7 +28,8 @@ class ExtractionService:
             text_extractor: TextExtractor,
             image_extractor: ImageExtractor,
             student_matcher: StudentNameMatcher,
-            archivo_repo: ArchivoRepository
+            archivo_repo: ArchivoRepository,
+            extraccion_cache_repo: Optional[ExtraccionCacheRepository] = None
     ):
         self.gcs_client = gcs_client
         self.ocr_client = ocr_client
@@ -29,6 +38,7 @@ class ExtractionService:
         self.image_extractor = image_extractor
         self.student_matcher = student_matcher
         self.archivo_repo = archivo_repo
+        self.extraccion_cache_repo = extraccion_cache_repo
 
     def process_file(
             self,
@@ -37,37 +47,43 @@ class ExtractionService:
             evaluacion_id: int,
             tipo_documento: str,
             tema: str,
-            descripcion_tema: str
+            descripcion_tema: str,
+            precomputed_ocr_text: Optional[str] = None
     ) -> Dict:
 
+        temp_path = None
         try:
             log.info(f"Procesando archivo: {gcs_filename}")
 
-            file_bytes = self.gcs_client.download_blob(gcs_filename)
             file_extension = os.path.splitext(gcs_filename)[1]
 
-            texto_extraido = self._extract_text(
-                file_bytes=file_bytes,
-                file_extension=file_extension,
-                tipo_documento=tipo_documento
-            )
+            if settings.EXTRACTION_STREAMING:
+                temp_path = self._download_to_temp(gcs_filename, file_extension)
+                source: DocumentSource = temp_path
+            else:
+                source = self.gcs_client.download_blob(gcs_filename)
+
+            file_hash = self._hash_source(source)
+            cacheado = self._get_cached_extraction(file_hash)
+
+            if cacheado:
+                log.info(f"Extracción reutilizada por contenido (hash={file_hash[:12]}), sin reprocesar")
+                texto_extraido = cacheado.texto_extraido
+                imagenes_gcs = list(cacheado.imagenes_gcs or [])
+            else:
+                inspection = self.text_extractor.inspector.inspect(source, file_extension)
+
+                texto_extraido, completo = self._extract_text(
+                    file_bytes=source,
+                    file_extension=file_extension,
+                    tipo_documento=tipo_documento,
+                    precomputed_ocr_text=precomputed_ocr_text,
+                    inspection=inspection
+                )
+                imagenes_gcs, imagenes_ok = self._upload_images(source, file_extension, gcs_filename, inspection)
 
-            imagenes_base64 = self.image_extractor.extract_images(file_bytes, file_extension)
-
-            import base64
-            imagenes_gcs = []
-            if imagenes_base64:
-                log.info(f"Subiendo {len(imagenes_base64)} imágenes extraídas a GCS")
-                clean_base = os.path.splitext(os.path.basename(gcs_filename))[0]
-                for idx, img_b64 in enumerate(imagenes_base64):
-                    try:
-                        img_bytes = base64.b64decode(img_b64)
-                        destination_name = f"evaluacion_{evaluacion_id}_img_{clean_base}_{idx}.png"
-                        self.gcs_client.upload_blob(img_bytes, destination_name, content_type="image/png")
-                        imagenes_gcs.append(destination_name)
-                    except Exception as img_err:
-                        log.warning(f"Error al subir imagen {idx} de {gcs_filename} a GCS: {img_err}")
-                        continue
+                if completo and inspection.complete and imagenes_ok:
+                    self._store_cached_extraction(file_hash, texto_extraido, imagenes_gcs)
 
             analisis_visual = {"imagenes_gcs": imagenes_gcs}
 
@@ -85,64 +101,209 @@ class ExtractionService:
                 'archivo_id': archivo.id,
                 'texto_extraido': texto_extraido,
                 'analisis_visual': analisis_visual,
-                'imagenes_count': len(imagenes_base64)
+                'imagenes_count': len(imagenes_gcs)
             }
 
         except Exception as e:
             log.error(f"Error en process_file: {e}")
             raise
+        finally:
+            if temp_path:
+                self._remove_temp(temp_path)
+
+    def _upload_images(
+            self,
+            source: DocumentSource,
+            file_extension: str,
+            gcs_filename: str,
+            inspection: DocumentInspection
+    ) -> Tuple[List[str], bool]:
+
+        if inspection.complete and not inspection.has_images:
+            log.info("El documento no contiene imágenes incrustadas, se omite la extracción")
+            return [], True
+
+        # Nombres por hash de contenido: una misma imagen se guarda una sola vez.
+        uploads = (
+            {
+                "source_bytes": imagen.data,
+                "destination_blob_name": f"extracciones/imagenes/{imagen.sha256}.{imagen.extension}",
+                "content_type": imagen.mime_type
+            }
+            for imagen in self.image_extractor.iter_images(source, file_extension)
+        )
+
+        imagenes_gcs = []
+        fallidas = 0
+        for idx, subida in enumerate(self.gcs_client.upload_blobs(uploads)):
+            if subida["error"]:
+                fallidas += 1
+                log.warning(f"Error al subir imagen {idx} de {gcs_filename} a GCS: {subida['error']}")
+                continue
+            imagenes_gcs.append(subida["destination_blob_name"])
+
+        log.info(f"{len(imagenes_gcs)} imágenes extraídas subidas a GCS")
+        return imagenes_gcs, fallidas == 0
+
+    @staticmethod
+    def _hash_source(source: DocumentSource) -> str:
+
+        if not isinstance(source, str):
+            return hashlib.sha256(source).hexdigest()
+
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(bloque)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _cache_version() -> str:
+
+        partes = [
+            EXTRACTION_CACHE_VERSION,
+            settings.PDF_TEXT_ENGINE,
+            str(settings.IMAGE_MAX_EDGE),
+            settings.IMAGE_PHOTO_FORMAT,
+            str(settings.IMAGE_PHOTO_QUALITY),
+            str(settings.IMAGE_KEEP_ORIGINAL)
+        ]
+        return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()[:16]
+
+    def _get_cached_extraction(self, file_hash: str):
+
+        if not self.extraccion_cache_repo:
+            return None
+        try:
+            return self.extraccion_cache_repo.get_by_hash(file_hash, self._cache_version())
+        except Exception as e:
+            log.warning(f"No se pudo consultar la caché de extracción: {e}")
+            return None
+
+    def _store_cached_extraction(self, file_hash: str, texto_extraido: Optional[str], imagenes_gcs: List[str]) -> None:
+
+        if not self.extraccion_cache_repo or not texto_extraido:
+            return
+        try:
+            self.extraccion_cache_repo.guardar(file_hash, self._cache_version(), texto_extraido, imagenes_gcs)
+        except Exception as e:
+            log.warning(f"No se pudo guardar la caché de extracción: {e}")
+
+    def _download_to_temp(self, gcs_filename: str, file_extension: str) -> str:
+
+        fd, temp_path = tempfile.mkstemp(suffix=file_extension, dir=settings.EXTRACTION_TEMP_DIR)
+        os.close(fd)
+        try:
+            self.gcs_client.download_blob_to_file(gcs_filename, temp_path)
+        except Exception:
+            self._remove_temp(temp_path)
+            raise
+        return temp_path
+
+    @staticmethod
+    def _remove_temp(temp_path: str) -> None:
+
+        # Un fallo al limpiar no debe tapar el resultado (o el error real) del procesamiento.
+        try:
+            os.remove(temp_path)
+        except OSError as e:
+            log.warning(f"No se pudo eliminar archivo temporal {temp_path}: {e}")
 
     def _extract_text(
             self,
-            file_bytes: bytes,
+            file_bytes: DocumentSource,
             file_extension: str,
-            tipo_documento: str
-    ) -> Optional[str]:
+            tipo_documento: str,
+            precomputed_ocr_text: Optional[str] = None,
+            inspection: Optional[DocumentInspection] = None
+    ) -> Tuple[Optional[str], bool]:
 
         try:
-            has_text = self.text_extractor.detect_has_extractable_text(file_bytes, file_extension)
+            if inspection is None:
+                inspection = self.text_extractor.inspector.inspect(file_bytes, file_extension)
 
-            log.warning(f"DEBUG: has_text={has_text}, extension={file_extension}")
+            has_text = inspection.has_extractable_text
 
-            if has_text:
+            paginas_ocr = inspection.pages_without_text if inspection.complete else []
+            completo = True
+
+            if has_text and not paginas_ocr:
                 log.info("Archivo con texto extraíble, extrayendo directamente")
-                if file_extension.lower() == '.pdf':
-                    texto = self.text_extractor.extract_text_from_pdf(file_bytes)
-                elif file_extension.lower() in ['.docx', '.doc']:
-                    texto = self.text_extractor.extract_text_from_docx(file_bytes)
+                texto = inspection.text
+            elif file_extension.lower() == '.pdf':
+                if not has_text:
+                    log.info("Archivo sin texto extraíble, usando OCR")
+                    paginas_ocr = list(range(inspection.page_count)) if inspection.page_count else None
+                else:
+                    log.info(f"Documento mixto: OCR en {len(paginas_ocr)}/{inspection.page_count} páginas sin capa de texto")
+
+                textos_ocr = self._ocr_pdf_pages(file_bytes, paginas_ocr, precomputed_ocr_text)
+                completo = all(t is not None for t in textos_ocr.values())
+
+                if has_text:
+                    textos_paginas = [
+                        textos_ocr.get(i) or inspection.page_texts[i]
+                        for i in range(inspection.page_count)
+                    ]
+                    texto = "\n".join([t for t in textos_paginas if t])
                 else:
-                    log.warning(f"Extensión no soportada: {file_extension}")
-                    return None
+                    texto = "\n\n".join([textos_ocr[i] for i in sorted(textos_ocr) if textos_ocr[i]])
+            elif has_text:
+                texto = inspection.text
             else:
-                log.warning("DEBUG: Entrando a bloque OCR")
                 log.info("Archivo sin texto extraíble, usando OCR")
-                
-                if file_extension.lower() == '.pdf':
-                    import fitz
-                    doc = fitz.open(stream=file_bytes, filetype="pdf")
-                    images_list = []
-                    
-                    log.info(f"PDF multipágina detectado: {len(doc)} páginas")
-                    
-                    for page in doc:
-                        pix = page.get_pixmap()
-                        img_bytes = pix.tobytes("png")
-                        images_list.append(img_bytes)
-                        
-                    textos_paginas = self.ocr_client.ocr_multiple_images(images_list)
-
-                    texto = "\n\n".join([t for t in textos_paginas if t])
-                    
-                else:
-                    texto = self.ocr_client.ocr_image(file_bytes)
+                if isinstance(file_bytes, str):
+                    with open(file_bytes, "rb") as f:
+                        file_bytes = f.read()
+                texto = self.ocr_client.ocr_image(file_bytes)
 
             if texto:
                 log.info(f"Texto extraído: {len(texto)} caracteres")
-                return texto
+                return texto, completo
             else:
                 log.warning("No se pudo extraer texto")
-                return None
+                return None, False
 
         except Exception as e:
             log.error(f"Error en _extract_text: {e}")
-            return None
+            return None, False
+
+    def _ocr_pdf_pages(
+            self,
+            source: DocumentSource,
+            page_indices: Optional[List[int]],
+            precomputed_ocr_text: Optional[str] = None
+    ) -> Dict[int, Optional[str]]:
+
+        textos: Dict[int, Optional[str]] = {}
+
+        # La carátula ya fue leída por el orquestador al identificar al alumno.
+        if precomputed_ocr_text and (page_indices is None or 0 in page_indices):
+            log.info("Reutilizando OCR precalculado de la carátula (página 1)")
+            textos[0] = precomputed_ocr_text
+
+        for indices, images_list in self._iter_page_windows(source, page_indices, skip=set(textos)):
+            for page_idx, texto in zip(indices, self.ocr_client.ocr_multiple_images(images_list)):
+                textos[page_idx] = texto
+
+        return textos
+
+    def _iter_page_windows(
+            self,
+            source: DocumentSource,
+            page_indices: Optional[List[int]],
+            skip: set
+    ) -> Iterator[Tuple[List[int], List[bytes]]]:
+
+        window = max(1, settings.OCR_PAGE_WINDOW)
+
+        if page_indices is None:
+            with open_pdf(source) as doc:
+                page_indices = list(range(len(doc)))
+        pendientes = [i for i in page_indices if i not in skip]
+        log.info(f"Rasterizando {len(pendientes)} páginas para OCR en ventanas de {window}")
+
+        pool = get_process_pool()
+        for start in range(0, len(pendientes), window):
+            indices = pendientes[start:start + window]
+            yield indices, pool.run(rasterize_pages, source, indices)
@@ -1,21 +1,30 @@
 import logging
 import os
-import json
-import base64
-import io
-from typing import Dict, List, Optional
-from PIL import Image
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 
 import google.generativeai as genai
+from google.generativeai import caching
 from google.cloud import secretmanager
 
+from app.config.settings import settings
+from app.clients.llm_gateway import LLMGateway, LLMGatewayError, is_transient_llm_error
+
 from app.models.rubrica import Rubrica
+from app.extractors import ImageRecord
+from app.services.json_stream_parser import JSONArrayStreamParser
 
 log = logging.getLogger(__name__)
 
+# Los exámenes manuscritos se califican con el texto del OCR: las páginas escaneadas no se envían.
+TIPOS_SIN_IMAGENES = ("examen", "EXAMEN_MANUSCRITO")
+
 class GeminiAnalyzer:
 
-    def __init__(self):
+    def __init__(self, gateway: Optional[LLMGateway] = None):
+        self.gateway = gateway or LLMGateway()
         api_key = self._get_api_key_from_secret()
         
         if not api_key:
@@ -27,12 +36,34 @@ class GeminiAnalyzer:
             genai.configure(api_key=api_key)
             self.is_ready = True
 
-        self.model_name = "gemini-flash-latest" 
+        # Un único modelo con versión fija para todas las llamadas, con o sin contexto cacheado:
+        # la nota no depende del estado de la caché y la clave de respuestas no cambia de una llamada a otra.
+        self.model_name = settings.GEMINI_MODEL
         self.model = genai.GenerativeModel(self.model_name)
+        self.model_version = self.model_name
+
+        self.prompt_cache_size = max(1, settings.GEMINI_PROMPT_CACHE_SIZE)
+        self.context_cache_enabled = settings.GEMINI_CONTEXT_CACHE
+        self.context_cache_ttl = datetime.timedelta(minutes=settings.GEMINI_CONTEXT_CACHE_TTL_MINUTES)
+        self.context_cache_min_chars = settings.GEMINI_CONTEXT_CACHE_MIN_CHARS
+        # CachedContent exige un modelo con versión fija: con un alias como "-latest" no se cachea.
+        if self.context_cache_enabled and self.model_name.endswith("-latest"):
+            log.warning(f"Contexto cacheado desactivado: {self.model_name} es un alias sin versión fija")
+            self.context_cache_enabled = False
+        self.json_mode = settings.GEMINI_JSON_MODE
+        self.streaming = settings.GEMINI_STREAMING
+        self.reask_attempts = max(0, settings.GEMINI_REASK_ATTEMPTS)
+        self._rubric_sections: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self._contexts: "OrderedDict[Tuple, Tuple[Optional[genai.GenerativeModel], Optional[datetime.datetime]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         
         if self.is_ready:
             log.info(f"GeminiAnalyzer inicializado con modelo {self.model_name}")
 
+    @staticmethod
+    def sends_images(tipo_documento: Optional[str]) -> bool:
+        return tipo_documento not in TIPOS_SIN_IMAGENES
+
     def _get_api_key_from_secret(self) -> Optional[str]:
 
         try:
@@ -54,7 +85,7 @@ class GeminiAnalyzer:
     def analyze_document(
         self,
         text: str,
-        images_base64: List[str],
+        images: List[ImageRecord],
         rubrica: Rubrica,
         tema: str,
         descripcion_tema: str,
@@ -69,24 +100,332 @@ class GeminiAnalyzer:
             log.info(f"Iniciando análisis con Gemini. Tipo: {tipo_documento}, Texto: {len(text)} chars")
 
             system_prompt = self._build_system_prompt(rubrica, tema, descripcion_tema, tipo_documento)
+            cached_model = self._get_cached_context_model(rubrica, tema, descripcion_tema, tipo_documento, system_prompt)
+            context_key = self._context_key(rubrica, tema, descripcion_tema, tipo_documento)
 
-            content_parts = [system_prompt]
+            content_parts = [] if cached_model else [system_prompt]
             content_parts.append(f"\n\n--- DOCUMENTO A EVALUAR ---\n\n{text}\n")
 
-            if tipo_documento != "EXAMEN_MANUSCRITO" and images_base64:
-                log.info(f"Adjuntando {len(images_base64)} imágenes al análisis")
-                image_parts = self._process_images(images_base64)
+            if self.sends_images(tipo_documento) and images:
+                log.info(f"Adjuntando {len(images)} imágenes al análisis")
+                image_parts = self._process_images(images)
                 if image_parts:
                     content_parts.extend(image_parts)
 
-            response = self.model.generate_content(content_parts)
+            criterios_by_id = {c.id: c for c in rubrica.criterios}
+            aceptados: Dict[int, Dict] = {}
+
+            def aceptar(res: Dict) -> None:
+                criterio_id = self._validate_resultado(res, criterios_by_id)
+                if criterio_id is not None and criterio_id not in aceptados:
+                    aceptados[criterio_id] = res
+
+            parser = self._request_items(
+                content_parts, cached_model, system_prompt, context_key,
+                self._response_schema(rubrica.criterios), "resultados", aceptar
+            )
+            comentarios = parser.document().get("comentarios_generales", "")
+
+            # Solo se vuelve a preguntar por los criterios que faltan o llegaron inválidos;
+            # si no se salvó ninguno, la respuesta no es aprovechable y se informa el fallo.
+            # Una nota sin todos los criterios tampoco se guarda: sumaría menos de lo que corresponde.
+            for intento in range(self.reask_attempts):
+                faltantes = [c for c in rubrica.criterios if c.id not in aceptados]
+                if not faltantes or not aceptados:
+                    break
 
-            return self._parse_response(response.text)
+                log.warning(
+                    f"Respuesta de Gemini incompleta: {len(aceptados)}/{len(criterios_by_id)} criterios válidos; "
+                    f"se vuelven a pedir {[c.id for c in faltantes]}")
+                parser = self._request_items(
+                    content_parts + [self._build_reask_instructions(faltantes)],
+                    cached_model, system_prompt, context_key,
+                    self._response_schema(faltantes), "resultados", aceptar
+                )
+                comentarios = comentarios or parser.document().get("comentarios_generales", "")
+
+            if not aceptados:
+                log.error(f"Gemini no devolvió criterios válidos. Respuesta cruda: {parser.text}")
+                return {}
+
+            faltantes = [c.id for c in rubrica.criterios if c.id not in aceptados]
+            if faltantes:
+                log.error(f"Criterios sin resultado válido tras reintentos: {faltantes}; se descarta la respuesta")
+                return {}
+
+            return {
+                "resultados": [aceptados[c.id] for c in rubrica.criterios if c.id in aceptados],
+                "comentarios_generales": comentarios
+            }
 
         except Exception as e:
+            # Cuota agotada, circuito abierto o plazo vencido suben al llamador para que la tarea
+            # se reintente; {} queda para respuestas inservibles.
+            if is_transient_llm_error(e):
+                log.warning(f"Gemini no disponible temporalmente en analyze_document: {e}")
+                raise
             log.error(f"Error en GeminiAnalyzer.analyze_document: {e}")
             return {}
 
+    def analyze_batch(
+        self,
+        documentos: List[Tuple[int, str]],
+        rubrica: Rubrica,
+        tema: str,
+        descripcion_tema: str,
+        tipo_documento: str
+    ) -> Dict[int, Dict]:
+
+        if not self.is_ready:
+            log.error("No se puede analizar: GeminiAnalyzer no tiene API Key válida.")
+            return {}
+
+        try:
+            log.info(f"Iniciando análisis en lote con Gemini. Tipo: {tipo_documento}, Documentos: {len(documentos)}")
+
+            system_prompt = self._build_system_prompt(rubrica, tema, descripcion_tema, tipo_documento)
+            cached_model = self._get_cached_context_model(rubrica, tema, descripcion_tema, tipo_documento, system_prompt)
+
+            content_parts = [] if cached_model else [system_prompt]
+            content_parts.append(self._build_batch_instructions([doc_id for doc_id, _ in documentos]))
+            for doc_id, text in documentos:
+                content_parts.append(f"\n\n--- DOCUMENTO ESTUDIANTE_ID={doc_id} ---\n\n{text}\n")
+
+            esperados = {doc_id for doc_id, _ in documentos}
+            criterios_by_id = {c.id: c for c in rubrica.criterios}
+            por_estudiante: Dict[int, Dict] = {}
+
+            def aceptar(item: Dict) -> None:
+                doc_id, evaluacion = self._validate_batch_item(item, esperados, criterios_by_id)
+                if evaluacion is not None and doc_id not in por_estudiante:
+                    por_estudiante[doc_id] = evaluacion
+
+            self._request_items(
+                content_parts, cached_model, system_prompt,
+                self._context_key(rubrica, tema, descripcion_tema, tipo_documento),
+                self._batch_response_schema(rubrica.criterios), "evaluaciones", aceptar
+            )
+
+            faltantes = esperados - por_estudiante.keys()
+            if faltantes:
+                log.warning(f"Respuesta en lote sin resultados válidos para: {sorted(faltantes)}")
+            return por_estudiante
+
+        except Exception as e:
+            if is_transient_llm_error(e):
+                log.warning(f"Gemini no disponible temporalmente en analyze_batch: {e}")
+                raise
+            log.error(f"Error en GeminiAnalyzer.analyze_batch: {e}")
+            return {}
+
+    def _request_items(
+            self,
+            content_parts: List,
+            cached_model: Optional[genai.GenerativeModel],
+            system_prompt: str,
+            context_key: Tuple,
+            schema: Dict,
+            array_key: str,
+            on_item: Callable[[Dict], None]
+    ) -> JSONArrayStreamParser:
+
+        kwargs = {"stream": self.streaming}
+        if self.json_mode:
+            kwargs["generation_config"] = {
+                "response_mime_type": "application/json",
+                "response_schema": schema
+            }
+
+        return self._generate(
+            content_parts, cached_model, system_prompt, context_key,
+            consume=lambda response: self._consume_response(response, JSONArrayStreamParser(array_key), on_item),
+            **kwargs
+        )
+
+    def _consume_response(self, response, parser: JSONArrayStreamParser, on_item: Callable[[Dict], None]):
+
+        if not self.streaming:
+            for item in parser.feed(response.text):
+                on_item(item)
+            return parser
+
+        try:
+            for chunk in response:
+                try:
+                    texto = chunk.text
+                except ValueError:
+                    continue
+                for item in parser.feed(texto):
+                    on_item(item)
+        except Exception as e:
+            # Con elementos ya validados el corte se aprovecha; sin ellos se deja reintentar al gateway.
+            if not parser.items:
+                raise
+            log.warning(f"Stream de Gemini interrumpido tras {len(parser.items)} elementos: {e}")
+        return parser
+
+    def _generate(
+            self,
+            content_parts: List,
+            cached_model: Optional[genai.GenerativeModel],
+            system_prompt: str,
+            context_key: Tuple,
+            **kwargs
+    ):
+
+        if not cached_model:
+            return self.gateway.generate(self.model, content_parts, **kwargs)
+
+        try:
+            return self.gateway.generate(cached_model, content_parts, **kwargs)
+        except Exception as e:
+            # Solo un error propio del contexto (expirado, no encontrado) justifica reenviar el prompt;
+            # con cuota agotada o circuito abierto repetir la llamada no ayuda.
+            if isinstance(e, LLMGatewayError) or self.gateway.is_retryable(e):
+                raise
+            log.warning(f"Contexto cacheado de Gemini no disponible ({e}); se envía el prompt completo")
+            self._drop_context(context_key)
+            return self.gateway.generate(self.model, [system_prompt] + content_parts, **kwargs)
+
+    @staticmethod
+    def _max_puntaje(criterio) -> float:
+        return max((nivel.puntaje for nivel in criterio.niveles), default=0.0)
+
+    @classmethod
+    def _validate_resultado(cls, res: Dict, criterios_by_id: Dict) -> Optional[int]:
+
+        try:
+            criterio_id = int(res.get("criterio_id"))
+        except (TypeError, ValueError):
+            criterio_id = None
+
+        criterio = criterios_by_id.get(criterio_id)
+        if criterio is None:
+            nombre = str(res.get("criterio") or "").strip().lower()
+            criterio = next((c for c in criterios_by_id.values() if c.nombre_criterio.strip().lower() == nombre), None)
+        if criterio is None:
+            log.warning(f"Resultado descartado: criterio desconocido ({res.get('criterio_id')}, {res.get('criterio')})")
+            return None
+
+        puntaje = res.get("puntaje_obtenido")
+        maximo = cls._max_puntaje(criterio)
+        if isinstance(puntaje, bool) or not isinstance(puntaje, (int, float)) or puntaje < 0 or (maximo and puntaje > maximo):
+            log.warning(f"Resultado descartado: puntaje {puntaje!r} inválido para criterio {criterio.id} (máx. {maximo})")
+            return None
+
+        niveles = {n.nombre_nivel.strip().lower() for n in criterio.niveles}
+        nivel = str(res.get("nivel_asignado") or "").strip().lower()
+        if niveles and nivel not in niveles:
+            log.warning(f"Resultado descartado: nivel {res.get('nivel_asignado')!r} no existe en criterio {criterio.id}")
+            return None
+
+        res["criterio_id"] = criterio.id
+        return criterio.id
+
+    @classmethod
+    def _validate_batch_item(cls, item: Dict, esperados: set, criterios_by_id: Dict) -> Tuple[Optional[int], Optional[Dict]]:
+
+        try:
+            doc_id = int(item.get("estudiante_id"))
+        except (TypeError, ValueError):
+            return None, None
+        if doc_id not in esperados or not isinstance(item.get("resultados"), list):
+            return doc_id, None
+
+        # En lote se exige la evaluación completa; un alumno incompleto se reevalúa individualmente.
+        validos: Dict[int, Dict] = {}
+        for res in item["resultados"]:
+            criterio_id = cls._validate_resultado(res, criterios_by_id) if isinstance(res, dict) else None
+            if criterio_id is not None:
+                validos.setdefault(criterio_id, res)
+        if len(validos) != len(criterios_by_id):
+            log.warning(f"Evaluación en lote incompleta para estudiante {doc_id}: {len(validos)}/{len(criterios_by_id)} criterios")
+            return doc_id, None
+
+        return doc_id, {
+            "resultados": [validos[c_id] for c_id in criterios_by_id],
+            "comentarios_generales": item.get("comentarios_generales", "")
+        }
+
+    @staticmethod
+    def _resultado_schema(criterios) -> Dict:
+
+        niveles = sorted({nivel.nombre_nivel for criterio in criterios for nivel in criterio.niveles})
+        nivel_schema = {"type": "string", "enum": niveles} if niveles else {"type": "string"}
+        return {
+            "type": "object",
+            "properties": {
+                "criterio_id": {"type": "integer"},
+                "criterio": {"type": "string", "enum": [c.nombre_criterio for c in criterios]},
+                "nivel_asignado": nivel_schema,
+                "puntaje_obtenido": {"type": "number"},
+                "feedback": {"type": "string"},
+                "confidence": {"type": "number"}
+            },
+            "required": ["criterio_id", "criterio", "nivel_asignado", "puntaje_obtenido", "feedback", "confidence"]
+        }
+
+    @classmethod
+    def _response_schema(cls, criterios) -> Dict:
+
+        return {
+            "type": "object",
+            "properties": {
+                "resultados": {"type": "array", "items": cls._resultado_schema(criterios)},
+                "comentarios_generales": {"type": "string"}
+            },
+            "required": ["resultados", "comentarios_generales"]
+        }
+
+    @classmethod
+    def _batch_response_schema(cls, criterios) -> Dict:
+
+        evaluacion = cls._response_schema(criterios)
+        evaluacion["properties"]["estudiante_id"] = {"type": "integer"}
+        evaluacion["required"] = ["estudiante_id"] + evaluacion["required"]
+        return {
+            "type": "object",
+            "properties": {"evaluaciones": {"type": "array", "items": evaluacion}},
+            "required": ["evaluaciones"]
+        }
+
+    @staticmethod
+    def _build_reask_instructions(criterios) -> str:
+
+        lista = "\n".join(f"- Criterio ID: {c.id} ({c.nombre_criterio})" for c in criterios)
+        return f"""
+        \n**CRITERIOS PENDIENTES:**
+        Tu respuesta anterior no incluyó un resultado válido para los siguientes criterios.
+        Evalúa ÚNICAMENTE estos criterios, con el mismo formato JSON de salida:
+        {lista}
+        """
+
+    @staticmethod
+    def _build_batch_instructions(ids: List[int]) -> str:
+
+        return f"""
+        \n**MODO LOTE:**
+        Se adjuntan {len(ids)} documentos de estudiantes distintos (ESTUDIANTE_ID: {', '.join(str(i) for i in ids)}).
+        Cada documento empieza con la línea "--- DOCUMENTO ESTUDIANTE_ID=<id> ---".
+        Evalúa cada documento de forma independiente con la rúbrica anterior; no compares ni mezcles estudiantes.
+        Responde ÚNICAMENTE con un objeto JSON con exactamente un elemento por estudiante, donde "resultados"
+        y "comentarios_generales" siguen el formato indicado arriba:
+
+        {{
+            "evaluaciones": [
+                {{
+                    "estudiante_id": 123,
+                    "resultados": [],
+                    "comentarios_generales": "Resumen global."
+                }}
+            ]
+        }}
+        """
+
+    @staticmethod
+    def _rubric_version(rubrica: Rubrica) -> int:
+        return getattr(rubrica, "version", None) or 1
+
     def _build_system_prompt(self, rubrica: Rubrica, tema: str, descripcion_tema: str, tipo_documento: str) -> str:
         
         prompt = f"""
@@ -105,16 +444,41 @@ class GeminiAnalyzer:
         
         **Rúbrica de Evaluación:**
         """
-        
+
+        return prompt + self._get_rubric_section(rubrica)
+
+    def _get_rubric_section(self, rubrica: Rubrica) -> str:
+
+        key = (rubrica.id, self._rubric_version(rubrica))
+        with self._cache_lock:
+            section = self._rubric_sections.get(key)
+            if section is not None:
+                self._rubric_sections.move_to_end(key)
+                return section
+
+        section = self._compile_rubric_section(rubrica)
+
+        with self._cache_lock:
+            self._rubric_sections[key] = section
+            while len(self._rubric_sections) > self.prompt_cache_size:
+                self._rubric_sections.popitem(last=False)
+
+        log.info(f"Prompt de rúbrica {rubrica.id} (versión {key[1]}) compilado: {len(section)} caracteres")
+        return section
+
+    @staticmethod
+    def _compile_rubric_section(rubrica: Rubrica) -> str:
+
+        partes = []
         for criterio in rubrica.criterios:
-            prompt += f"\n- Criterio ID: {criterio.id}\n"
-            prompt += f"  Nombre: {criterio.nombre_criterio}\n"
-            prompt += f"  Descripción: {criterio.descripcion_criterio}\n"
-            prompt += "  Niveles:\n"
+            partes.append(f"\n- Criterio ID: {criterio.id}\n")
+            partes.append(f"  Nombre: {criterio.nombre_criterio}\n")
+            partes.append(f"  Descripción: {criterio.descripcion_criterio}\n")
+            partes.append("  Niveles:\n")
             for nivel in criterio.niveles:
-                prompt += f"    * {nivel.nombre_nivel} (Puntaje: {nivel.puntaje}): {', '.join(nivel.descriptores)}\n"
+                partes.append(f"    * {nivel.nombre_nivel} (Puntaje: {nivel.puntaje}): {', '.join(nivel.descriptores)}\n")
 
-        prompt += """
+        partes.append("""
         \n**Formato de Salida Requerido (JSON):**
         Debes responder ÚNICAMENTE con un objeto JSON válido con la siguiente estructura exacta. No incluyas markdown.
         
@@ -131,35 +495,86 @@ class GeminiAnalyzer:
             ],
             "comentarios_generales": "Resumen global."
         }
-        """
-        return prompt
+        """)
+        return "".join(partes)
 
-    def _process_images(self, images_base64: List[str]):
+    def _context_key(self, rubrica: Rubrica, tema: str, descripcion_tema: str, tipo_documento: str) -> Tuple:
+        return (rubrica.id, self._rubric_version(rubrica), tema, descripcion_tema, tipo_documento)
+
+    def _get_cached_context_model(
+            self,
+            rubrica: Rubrica,
+            tema: str,
+            descripcion_tema: str,
+            tipo_documento: str,
+            system_prompt: str
+    ) -> Optional[genai.GenerativeModel]:
+
+        if not self.context_cache_enabled:
+            return None
+        if len(system_prompt) < self.context_cache_min_chars:
+            return None
+
+        key = self._context_key(rubrica, tema, descripcion_tema, tipo_documento)
+        ahora = datetime.datetime.now(datetime.timezone.utc)
+        with self._cache_lock:
+            if key in self._contexts:
+                model, expira = self._contexts[key]
+                if expira is None or ahora < expira:
+                    self._contexts.move_to_end(key)
+                    return model
+                # Vencido en Gemini: se vuelve a crear en lugar de provocar un fallo en la llamada.
+                del self._contexts[key]
+
+        # Un fallo de creación (modelo sin soporte, prompt demasiado corto) se recuerda como None
+        # sin vencimiento para no reintentarla en cada alumno de la sección.
+        model, expira = None, None
+        try:
+            cached = caching.CachedContent.create(
+                model=self.model_name,
+                display_name=f"rubrica-{rubrica.id}-v{key[1]}",
+                system_instruction=system_prompt,
+                ttl=self.context_cache_ttl
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            # Margen de un minuto para no usar un contexto que vence durante la llamada.
+            expira = ahora + self.context_cache_ttl - datetime.timedelta(minutes=1)
+            log.info(f"Contexto de rúbrica {rubrica.id} cacheado en Gemini: {cached.name}")
+        except Exception as e:
+            log.warning(f"No se pudo crear contexto cacheado para rúbrica {rubrica.id} con {self.model_name}: {e}")
+
+        with self._cache_lock:
+            self._contexts[key] = (model, expira)
+            while len(self._contexts) > self.prompt_cache_size:
+                _, (evicted, _) = self._contexts.popitem(last=False)
+                self._delete_context(evicted)
+        return model
+
+    def _drop_context(self, key: Tuple) -> None:
+
+        # El contexto dejó de servir (expirado o borrado): se olvida para recrearlo en la próxima llamada.
+        with self._cache_lock:
+            model, _ = self._contexts.pop(key, (None, None))
+        self._delete_context(model)
+
+    @staticmethod
+    def _delete_context(model: Optional[genai.GenerativeModel]) -> None:
+
+        cached = getattr(model, "cached_content", None) if model else None
+        if not cached:
+            return
+        try:
+            caching.CachedContent.get(cached).delete()
+        except Exception as e:
+            log.debug(f"No se pudo eliminar contexto cacheado {cached}: {e}")
+
+    def _process_images(self, images: List[ImageRecord]):
 
         image_parts = []
-        for img_b64 in images_base64:
+        for imagen in images:
             try:
-                img_bytes = base64.b64decode(img_b64)
-                img = Image.open(io.BytesIO(img_bytes))
-                image_parts.append(img)
+                image_parts.append(imagen.to_gemini_part())
             except Exception as e:
                 log.warning(f"Error procesando imagen para Gemini: {e}")
                 continue
         return image_parts
-
-    def _parse_response(self, response_text: str) -> Dict:
-
-        try:
-            text = response_text.strip()
-
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text.replace("```", "")
-            if text.endswith("```"):
-                text = text[:-3]
-            
-            return json.loads(text.strip())
-        except json.JSONDecodeError as e:
-            log.error(f"Error parseando JSON de Gemini: {e}. Respuesta cruda: {response_text}")
-            return {}
\ No newline at end of file
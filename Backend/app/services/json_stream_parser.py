@@ -0,0 +1,104 @@
+import json
+import logging
+from typing import Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+
+    # Recorre el texto a medida que llega y entrega cada objeto del arreglo `array_key`
+    # (clave del objeto raíz) en cuanto se cierra, sin esperar al final de la respuesta.
+
+    def __init__(self, array_key: str):
+
+        self.array_key = array_key
+        self._texto = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.items: List[Dict] = []
+        self.invalid_items = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+
+        if not chunk:
+            return []
+
+        self._texto += chunk
+        nuevos: List[Dict] = []
+        texto = self._texto
+
+        while self._pos < len(texto):
+            c = texto[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._string_start is not None:
+                        self._last_key = texto[self._string_start + 1:self._pos]
+                self._pos += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif c in "{[":
+                if c == "[" and self._depth == 1 and self._last_key == self.array_key and self._array_depth is None:
+                    self._array_depth = self._depth + 1
+                elif c == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if c == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    item = self._decode(texto[self._item_start:self._pos + 1])
+                    self._item_start = None
+                    if item is not None:
+                        self.items.append(item)
+                        nuevos.append(item)
+                elif c == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = -1
+                if self._depth == 1:
+                    self._last_key = None
+            elif c == "," and self._depth == 1:
+                self._last_key = None
+
+            self._pos += 1
+
+        return nuevos
+
+    def _decode(self, fragmento: str) -> Optional[Dict]:
+
+        try:
+            item = json.loads(fragmento)
+        except json.JSONDecodeError as e:
+            self.invalid_items += 1
+            log.warning(f"Elemento de '{self.array_key}' con JSON inválido descartado: {e}")
+            return None
+        return item if isinstance(item, dict) else None
+
+    @property
+    def text(self) -> str:
+        return self._texto
+
+    def document(self) -> Dict:
+
+        texto = self._texto.strip()
+        inicio, fin = texto.find("{"), texto.rfind("}")
+        if inicio < 0 or fin <= inicio:
+            return {}
+        try:
+            documento = json.loads(texto[inicio:fin + 1])
+        except json.JSONDecodeError:
+            return {}
+        return documento if isinstance(documento, dict) else {}
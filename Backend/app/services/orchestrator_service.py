@@ -1,15 +1,17 @@
 import logging
 import os
-from typing import List, Dict
-from PyPDF2 import PdfReader, PdfWriter
-import io
-import fitz  # PyMuPDF
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Set, Tuple
 
-from app.repositories import EvaluacionRepository, RubricaRepository, CursoRepository
+from app.repositories import EvaluacionRepository, RubricaRepository, CursoRepository, LoteRepository
 from app.clients import GCSClient, TaskClient, RapidAPIClient
-from app.extractors import StudentNameMatcher
+from app.extractors import StudentNameMatcher, ExamPdfSplitter
+from app.extractors.exam_pdf_splitter import build_student_pdfs
 from .task_service import TaskService
-from app.models import Evaluacion
+from app.config.settings import settings
+from app.config.process_pool import get_process_pool
 
 log = logging.getLogger(__name__)
 
@@ -24,7 +26,9 @@ class OrchestratorService:
             gcs_client: GCSClient,
             task_service: TaskService,
             ocr_client: RapidAPIClient,
-            student_matcher: StudentNameMatcher
+            student_matcher: StudentNameMatcher,
+            lote_repo: Optional[LoteRepository] = None,
+            ocr_max_concurrency: int = settings.OCR_MAX_CONCURRENCY
     ):
         self.evaluacion_repo = evaluacion_repo
         self.rubrica_repo = rubrica_repo
@@ -33,6 +37,214 @@ class OrchestratorService:
         self.task_service = task_service
         self.ocr_client = ocr_client
         self.student_matcher = student_matcher
+        self.lote_repo = lote_repo
+        self.ocr_max_concurrency = max(1, ocr_max_concurrency)
+        self.id_region = ExamPdfSplitter.parse_region(settings.OCR_ID_REGION)
+        self.id_dpi = settings.OCR_ID_DPI
+        self.id_format = settings.OCR_ID_FORMAT
+        self.id_grayscale = settings.OCR_ID_GRAYSCALE
+        self.id_jpeg_quality = settings.OCR_ID_JPEG_QUALITY
+
+    def validate_batch_context(self, rubrica_id: int, curso_id: int) -> None:
+
+        rubrica = self.rubrica_repo.get_by_id(rubrica_id)
+        if not rubrica:
+            raise ValueError(f"Rúbrica {rubrica_id} no encontrada")
+
+        if rubrica.estado_ciac != 'aprobado' or rubrica.estado_director != 'aprobado':
+            raise ValueError(f"La rúbrica {rubrica_id} no está aprobada para su uso")
+
+        if rubrica.nrc_id:
+            from app.models.nrc import Nrc
+            nrc_record = self.rubrica_repo.db.query(Nrc).filter(Nrc.id == rubrica.nrc_id).first()
+            if nrc_record and nrc_record.id_curso != curso_id:
+                raise ValueError(f"La rúbrica {rubrica_id} (NRC {rubrica.nrc_id}) no pertenece al curso {curso_id}")
+
+        curso = self.curso_repo.get_by_id(curso_id)
+        if not curso:
+            raise ValueError(f"Curso {curso_id} no encontrado")
+
+        log.info(f"Rúbrica validada: {rubrica.nombre_rubrica}")
+        log.info(f"Curso validado: {curso.nombre}")
+
+    @staticmethod
+    def _face_number(filename: str) -> int:
+
+        match = re.search(r'cara_(\d+)', filename.lower())
+        return int(match.group(1)) if match else 999
+
+    def _sorted_faces(self, pdf_files: List[Dict]) -> List[Dict]:
+
+        sorted_files = sorted(pdf_files, key=lambda x: self._face_number(x['original_filename']))
+
+        if not sorted_files:
+            raise ValueError("No se recibieron archivos válidos (deben llamarse 'cara_X.pdf')")
+
+        if self._face_number(sorted_files[0]['original_filename']) != 1:
+            raise ValueError("Falta el archivo de la primera cara (cara_1.pdf)")
+
+        return sorted_files
+
+    def count_batch_students(self, pdf_files: List[Dict], tipo_documento: str) -> int:
+
+        if tipo_documento != "examen":
+            return len(pdf_files)
+
+        # En exámenes manuscritos cada página de cara_1 es un alumno; las demás caras no suman.
+        cara_1 = self._sorted_faces(pdf_files)[0]
+        with ExamPdfSplitter() as splitter:
+            splitter.add_face(self.gcs_client.download_blob(cara_1['gcs_filename']))
+            return splitter.num_students
+
+    def start_exam_batch(
+            self,
+            profesor_id: int,
+            tipo_documento: str,
+            total: int = 0,
+            parametros: Optional[Dict] = None
+    ) -> int:
+
+        if not self.lote_repo:
+            raise RuntimeError("OrchestratorService sin repositorio de lotes configurado")
+
+        lote = self.lote_repo.create_lote(
+            profesor_id=profesor_id,
+            tipo_documento=tipo_documento,
+            total=total,
+            parametros=parametros
+        )
+        log.info(f"Lote {lote.id} creado para profesor_id={profesor_id}")
+        return lote.id
+
+    def run_exam_batch_job(self, lote_id: int) -> None:
+
+        # Cloud Tasks puede entregar la tarea más de una vez: un lote terminado no se repite y uno
+        # interrumpido continúa desde lo registrado en su fila.
+        lote = self.lote_repo.get_by_id(lote_id)
+        if not lote:
+            log.error(f"Lote {lote_id} no encontrado")
+            return
+
+        if not self.lote_repo.es_reanudable(lote):
+            log.info(f"Lote {lote_id} ya finalizado ({lote.estado}); se ignora la tarea")
+            return
+
+        if not lote.parametros:
+            self.lote_repo.finalizar(lote_id, error="Lote sin parámetros de procesamiento")
+            return
+
+        parametros = dict(lote.parametros)
+        try:
+            log.info(f"{'Reanudando' if lote.evaluacion_ids else 'Ejecutando'} lote {lote_id}")
+            self.lote_repo.update(lote_id, estado="procesando", error=None)
+            self.process_exam_batch(lote_id=lote_id, **parametros)
+            self.lote_repo.finalizar(lote_id)
+            log.info(f"Lote {lote_id} completado")
+        except Exception as e:
+            log.error(f"Error en lote {lote_id}: {e}")
+            try:
+                self._close_orphans(lote_id, str(e))
+                self.lote_repo.finalizar(lote_id, error=str(e))
+            except Exception as lote_err:
+                log.error(f"No se pudo marcar el lote {lote_id} como fallido: {lote_err}")
+
+    def _resume_state(self, lote_id: Optional[int]) -> Tuple[Optional[List[int]], Set[int]]:
+
+        if lote_id is None or not self.lote_repo:
+            return None, set()
+
+        lote = self.lote_repo.get_by_id(lote_id)
+        if not lote or not lote.evaluacion_ids:
+            return None, set()
+
+        registrados = {item['evaluacion_id'] for item in (lote.detalle or [])}
+        return list(lote.evaluacion_ids), registrados
+
+    def _record_evaluaciones(self, lote_id: Optional[int], evaluacion_ids: List[int]) -> None:
+
+        if lote_id is not None and self.lote_repo:
+            self.lote_repo.registrar_evaluaciones(lote_id, evaluacion_ids)
+
+    def _close_orphans(self, lote_id: int, error: str) -> None:
+
+        # Las evaluaciones creadas que no llegaron a encolarse quedan como error en el lote en vez
+        # de seguir "pendiente" sin tarea que las procese.
+        evaluacion_ids, registrados = self._resume_state(lote_id)
+        items = []
+        for i, evaluacion_id in enumerate(evaluacion_ids or []):
+            if evaluacion_id in registrados:
+                continue
+            evaluacion = self.evaluacion_repo.update(evaluacion_id, estado="ERROR")
+            items.append({
+                'indice': i,
+                'evaluacion_id': evaluacion_id,
+                'nombre_alumno': evaluacion.nombre_alumno if evaluacion else "",
+                'archivo': None,
+                'estado': 'error',
+                'error': f"Lote fallido antes de encolar: {error}"
+            })
+        self._report_items(lote_id, items)
+
+    def _report_total(self, lote_id: Optional[int], total: int) -> None:
+
+        if lote_id is not None and self.lote_repo:
+            self.lote_repo.iniciar(lote_id, total)
+
+    def _report_items(self, lote_id: Optional[int], items: List[Dict]) -> None:
+
+        if lote_id is not None and self.lote_repo and items:
+            self.lote_repo.registrar_items(lote_id, items)
+
+    @staticmethod
+    def _evaluacion_row(
+            profesor_id: int,
+            rubrica_id: int,
+            nombre_alumno: str,
+            curso_id: int,
+            codigo_curso: str,
+            instructor: str,
+            semestre: str,
+            tema: str,
+            descripcion_tema: str,
+            tipo_documento: str
+    ) -> Dict:
+
+        return {
+            'profesor_id': profesor_id,
+            'rubrica_id': rubrica_id,
+            'nombre_alumno': nombre_alumno,
+            'curso_id': curso_id,
+            'codigo_curso': codigo_curso,
+            'instructor': instructor,
+            'semestre': semestre,
+            'tema': tema,
+            'descripcion_tema': descripcion_tema,
+            'tipo_documento': tipo_documento,
+            'estado': "pendiente"
+        }
+
+    def _enqueue_file_tasks(self, items: List[Dict], tasks: List[Dict], lote_id: Optional[int]) -> List[Dict]:
+
+        # Los fallos previos (reconstrucción, subida) se registran ya; el resto al confirmarse su tarea.
+        fallidos = [item for item in items if item['estado'] == 'error']
+        for item in fallidos:
+            self.evaluacion_repo.update(item['evaluacion_id'], estado="ERROR")
+        self._report_items(lote_id, fallidos)
+
+        items_por_evaluacion = {item['evaluacion_id']: item for item in items if item['estado'] != 'error'}
+
+        def _registrar(resultado: Dict) -> None:
+            item = items_por_evaluacion[resultado['evaluacion_id']]
+            if resultado['error']:
+                item['estado'] = 'error'
+                item['error'] = f"Error al encolar tarea: {resultado['error']}"
+                self.evaluacion_repo.update(item['evaluacion_id'], estado="ERROR")
+            else:
+                item['estado'] = 'encolado'
+            self._report_items(lote_id, [item])
+
+        self.task_service.create_file_tasks(tasks, on_result=_registrar)
+        return items
 
     def process_exam_batch(
             self,
@@ -46,31 +258,14 @@ class OrchestratorService:
             semestre: str,
             tema: str,
             descripcion_tema: str,
-            tipo_documento: str
+            tipo_documento: str,
+            lote_id: Optional[int] = None
     ) -> Dict:
 
         try:
             log.info(f"Iniciando procesamiento: profesor_id={profesor_id}, rubrica_id={rubrica_id}, curso_id={curso_id}")
 
-            rubrica = self.rubrica_repo.get_by_id(rubrica_id)
-            if not rubrica:
-                raise ValueError(f"Rúbrica {rubrica_id} no encontrada")
-
-            if rubrica.estado_ciac != 'aprobado' or rubrica.estado_director != 'aprobado':
-                raise ValueError(f"La rúbrica {rubrica_id} no está aprobada para su uso")
-
-            if rubrica.nrc_id:
-                from app.models.nrc import Nrc
-                nrc_record = self.rubrica_repo.db.query(Nrc).filter(Nrc.id == rubrica.nrc_id).first()
-                if nrc_record and nrc_record.id_curso != curso_id:
-                    raise ValueError(f"La rúbrica {rubrica_id} (NRC {rubrica.nrc_id}) no pertenece al curso {curso_id}")
-
-            curso = self.curso_repo.get_by_id(curso_id)
-            if not curso:
-                raise ValueError(f"Curso {curso_id} no encontrado")
-
-            log.info(f"Rúbrica validada: {rubrica.nombre_rubrica}")
-            log.info(f"Curso validado: {curso.nombre}")
+            self.validate_batch_context(rubrica_id, curso_id)
 
             students = [s.strip() for s in student_list.strip().split('\n') if s.strip()]
             log.info(f"Estudiantes en la lista: {len(students)}")
@@ -86,7 +281,8 @@ class OrchestratorService:
                     instructor=instructor,
                     semestre=semestre,
                     tema=tema,
-                    descripcion_tema=descripcion_tema
+                    descripcion_tema=descripcion_tema,
+                    lote_id=lote_id
                 )
             else:
                 return self._process_essays(
@@ -100,7 +296,8 @@ class OrchestratorService:
                     semestre=semestre,
                     tema=tema,
                     descripcion_tema=descripcion_tema,
-                    tipo_documento=tipo_documento
+                    tipo_documento=tipo_documento,
+                    lote_id=lote_id
                 )
 
         except Exception as e:
@@ -118,108 +315,123 @@ class OrchestratorService:
             instructor: str,
             semestre: str,
             tema: str,
-            descripcion_tema: str
+            descripcion_tema: str,
+            lote_id: Optional[int] = None
     ) -> Dict:
 
         try:
             log.info("Procesando exámenes manuscritos (Lógica Multi-Cara)...")
 
-            import re
-            
-            def get_face_number(filename):
-                match = re.search(r'cara_(\d+)', filename.lower())
-                return int(match.group(1)) if match else 999
-
-            sorted_files = sorted(pdf_files, key=lambda x: get_face_number(x['original_filename']))
-            
-            if not sorted_files:
-                raise ValueError("No se recibieron archivos válidos (deben llamarse 'cara_X.pdf')")
-
-            face_pdfs = [] 
-            face_images = [] 
-            
-            for f in sorted_files:
-                pdf_bytes = self.gcs_client.download_blob(f['gcs_filename'])
-                face_pdfs.append(PdfReader(io.BytesIO(pdf_bytes)))
-                face_images.append(fitz.open(stream=pdf_bytes, filetype="pdf"))
-
-            if get_face_number(sorted_files[0]['original_filename']) != 1:
-                raise ValueError("Falta el archivo de la primera cara (cara_1.pdf)")
-
-            num_students_in_batch = len(face_pdfs[0].pages)
-            log.info(f"Detectados {num_students_in_batch} exámenes en el lote (basado en cara_1)")
-
-            evaluaciones_creadas = []
-
-            for i in range(num_students_in_batch):
-                # ... (código de OCR igual) ...
-                page_img = face_images[0].load_page(i)
-                pix = page_img.get_pixmap()
-                img_bytes = pix.tobytes("png")
-                
-                texto_ocr = self.ocr_client.ocr_image(img_bytes)
-                
-                nombre_alumno = "UNKNOWN"
-                if texto_ocr:
-                    match_result = self.student_matcher.find_student_name(texto_ocr, students)
-                    if match_result:
-                        nombre_alumno = match_result[0]
-                
-                if nombre_alumno == "UNKNOWN":
-                    nombre_alumno = f"Estudiante_Desconocido_{i+1}"
-                    log.warning(f"No se pudo identificar alumno en índice {i}. Asignando: {nombre_alumno}")
+            sorted_files = self._sorted_faces(pdf_files)
+
+            with ExamPdfSplitter() as splitter:
+                for f in sorted_files:
+                    splitter.add_face(self.gcs_client.download_blob(f['gcs_filename']))
+
+                num_students_in_batch = splitter.num_students
+                evaluacion_ids, registrados = self._resume_state(lote_id)
+
+                if evaluacion_ids is None:
+                    log.info(f"Detectados {num_students_in_batch} exámenes en el lote (basado en cara_1)")
+                    self._report_total(lote_id, num_students_in_batch)
+
+                    asignaciones, textos_caratula = self._identify_students(splitter, num_students_in_batch, students)
+
+                    nombres_alumnos = []
+                    confianzas = []
+                    for i, asignacion in enumerate(asignaciones):
+                        if not asignacion:
+                            nombre_alumno = f"Estudiante_Desconocido_{i+1}"
+                            confianza = 0.0
+                            log.warning(f"No se pudo identificar alumno en índice {i}. Asignando: {nombre_alumno}")
+                        else:
+                            nombre_alumno, confianza = asignacion
+                            log.info(f"Alumno identificado en índice {i}: {nombre_alumno} (confianza: {confianza:.1f})")
+                        nombres_alumnos.append(nombre_alumno)
+                        confianzas.append(round(confianza, 1))
+
+                    evaluacion_ids = self.evaluacion_repo.bulk_create([
+                        self._evaluacion_row(
+                            profesor_id=profesor_id,
+                            rubrica_id=rubrica_id,
+                            nombre_alumno=nombre_alumno,
+                            curso_id=curso_id,
+                            codigo_curso=codigo_curso,
+                            instructor=instructor,
+                            semestre=semestre,
+                            tema=tema,
+                            descripcion_tema=descripcion_tema,
+                            tipo_documento="examen"
+                        )
+                        for nombre_alumno in nombres_alumnos
+                    ])
+                    self._record_evaluaciones(lote_id, evaluacion_ids)
                 else:
-                    log.info(f"Alumno identificado en índice {i}: {nombre_alumno}")
-
-                evaluacion = Evaluacion(
-                    profesor_id=profesor_id,
-                    rubrica_id=rubrica_id,
-                    nombre_alumno=nombre_alumno,
-                    curso_id=curso_id,
-                    codigo_curso=codigo_curso,
-                    instructor=instructor,
-                    semestre=semestre,
-                    tema=tema,
-                    descripcion_tema=descripcion_tema,
-                    tipo_documento="examen",
-                    estado="pendiente"
-                )
-                evaluacion = self.evaluacion_repo.create(evaluacion)
-
-                writer = PdfWriter()
-                
-                for face_idx, pdf_reader in enumerate(face_pdfs):
-                    face_num = face_idx + 1
-                    
-                    if face_num % 2 != 0:
-                        target_page_idx = i
-                    else:
-                        target_page_idx = num_students_in_batch - 1 - i
-                    
-                    if target_page_idx < len(pdf_reader.pages):
-                        writer.add_page(pdf_reader.pages[target_page_idx])
-                    else:
-                        log.warning(f"Índice {target_page_idx} fuera de rango para cara {face_num}")
-
-                combined_buffer = io.BytesIO()
-                writer.write(combined_buffer)
-                combined_bytes = combined_buffer.getvalue()
-
-                combined_filename = f"examen_{evaluacion.id}_{nombre_alumno.replace(' ', '_')}.pdf"
-                self.gcs_client.upload_blob(combined_bytes, combined_filename, "application/pdf")
-
-                self.task_service.create_file_task(
-                    gcs_filename=combined_filename,
-                    original_filename=combined_filename,
-                    evaluacion_id=evaluacion.id,
-                    tipo_documento="examen"
-                )
-
-                evaluaciones_creadas.append({
-                    'evaluacion_id': evaluacion.id,
+                    # Reintento: los alumnos ya se identificaron y sus evaluaciones existen.
+                    if len(evaluacion_ids) != num_students_in_batch:
+                        raise ValueError(
+                            f"El lote registró {len(evaluacion_ids)} evaluaciones pero cara_1 tiene {num_students_in_batch} páginas"
+                        )
+                    log.info(f"Reanudando lote {lote_id}: {len(registrados)}/{num_students_in_batch} exámenes ya registrados")
+                    nombres_alumnos = [
+                        getattr(self.evaluacion_repo.get_by_id(evaluacion_id), 'nombre_alumno', None) or f"Estudiante_Desconocido_{i+1}"
+                        for i, evaluacion_id in enumerate(evaluacion_ids)
+                    ]
+                    confianzas = [None] * num_students_in_batch
+                    textos_caratula = {}
+
+                pendientes = [i for i, evaluacion_id in enumerate(evaluacion_ids) if evaluacion_id not in registrados]
+                pdfs_alumnos = dict(zip(pendientes, self._build_student_pdfs(splitter, pendientes)))
+
+                # Un examen sin páginas reconstruibles no se sube: queda como error en el lote.
+                uploads = [
+                    {
+                        "source_bytes": pdfs_alumnos[i],
+                        "destination_blob_name": f"examen_{evaluacion_ids[i]}_{nombres_alumnos[i].replace(' ', '_')}.pdf",
+                        "content_type": "application/pdf"
+                    }
+                    for i in pendientes
+                    if pdfs_alumnos[i] is not None
+                ]
+
+            upload_results = iter(self.gcs_client.upload_blobs(uploads))
+
+            items = []
+            tasks = []
+            for i in pendientes:
+                evaluacion_id, nombre_alumno, pdf_alumno = evaluacion_ids[i], nombres_alumnos[i], pdfs_alumnos[i]
+                item = {
+                    'indice': i,
+                    'evaluacion_id': evaluacion_id,
                     'nombre_alumno': nombre_alumno,
-                    'archivo': combined_filename
-                })
+                    'confianza': confianzas[i],
+                    'archivo': None,
+                    'estado': 'pendiente'
+                }
+                items.append(item)
+
+                if pdf_alumno is None:
+                    log.warning(f"No se pudo reconstruir el examen del índice {i} ({nombre_alumno})")
+                    item['estado'] = 'error'
+                    item['error'] = "No se pudo reconstruir el PDF del examen: ninguna cara tiene esa página"
+                    continue
+
+                upload = next(upload_results)
+                combined_filename = upload['destination_blob_name']
+                item['archivo'] = combined_filename
+                if upload['error']:
+                    item['estado'] = 'error'
+                    item['error'] = f"Error al subir a GCS: {upload['error']}"
+                else:
+                    tasks.append({
+                        'gcs_filename': combined_filename,
+                        'original_filename': combined_filename,
+                        'evaluacion_id': evaluacion_id,
+                        'tipo_documento': "examen",
+                        'precomputed_ocr_text': textos_caratula.get(i)
+                    })
+
+            evaluaciones_creadas = self._enqueue_file_tasks(items, tasks, lote_id)
 
             log.info(f"Lote procesado: {len(evaluaciones_creadas)} exámenes reconstruidos y encolados")
 
@@ -234,6 +446,106 @@ class OrchestratorService:
             log.error(f"Error en _process_handwritten_exams: {e}")
             raise
 
+    @staticmethod
+    def _build_student_pdfs(splitter: ExamPdfSplitter, indices: List[int]) -> List[Optional[bytes]]:
+
+        pool = get_process_pool()
+        if pool.max_workers <= 1 or len(indices) < 2:
+            return [splitter.build_student_pdf(i) for i in indices]
+
+        tamano = -(-len(indices) // pool.max_workers)
+        bloques = [indices[i:i + tamano] for i in range(0, len(indices), tamano)]
+        log.info(f"Reconstruyendo {len(indices)} exámenes en {len(bloques)} bloques con el pool de procesos")
+
+        # Las caras se escriben una sola vez a disco y cada bloque recibe solo las rutas.
+        rutas = []
+        try:
+            for pdf_bytes in splitter.face_bytes:
+                fd, ruta = tempfile.mkstemp(suffix=".pdf", dir=settings.EXTRACTION_TEMP_DIR)
+                rutas.append(ruta)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pdf_bytes)
+
+            pdfs = []
+            for bloque in pool.run_many(build_student_pdfs, [(rutas, b) for b in bloques]):
+                pdfs.extend(bloque)
+            return pdfs
+        finally:
+            for ruta in rutas:
+                try:
+                    os.remove(ruta)
+                except OSError as e:
+                    log.warning(f"No se pudo eliminar archivo temporal {ruta}: {e}")
+
+    def _identify_students(
+            self,
+            splitter: ExamPdfSplitter,
+            num_pages: int,
+            students: List[str]
+    ) -> Tuple[List[Optional[Tuple[str, float]]], Dict[int, str]]:
+
+        indices = list(range(num_pages))
+        use_region = self.id_region is not None
+
+        textos_ocr = self._ocr_cover_pages(splitter, indices, use_region=use_region)
+        asignaciones = self.student_matcher.assign_students(textos_ocr, students)
+
+        textos_pagina_completa = {} if use_region else {i: t for i, t in enumerate(textos_ocr) if t}
+
+        pendientes = [i for i, asignacion in enumerate(asignaciones) if asignacion is None]
+        if use_region and pendientes:
+            log.info(f"{len(pendientes)} carátulas sin coincidencia en la región de identificación, reintentando con la página completa")
+            textos_completos = self._ocr_cover_pages(splitter, pendientes, use_region=False)
+            for i, texto in zip(pendientes, textos_completos):
+                if texto:
+                    textos_ocr[i] = texto
+                    textos_pagina_completa[i] = texto
+            asignaciones = self.student_matcher.assign_students(textos_ocr, students)
+
+        return asignaciones, textos_pagina_completa
+
+    def _ocr_cover_pages(
+            self,
+            splitter: ExamPdfSplitter,
+            indices: List[int],
+            use_region: bool = True
+    ) -> List[Optional[str]]:
+
+        if use_region:
+            image_format = self.id_format
+            page_images = [
+                splitter.render_cover_page(
+                    i,
+                    region=self.id_region,
+                    dpi=self.id_dpi,
+                    image_format=image_format,
+                    grayscale=self.id_grayscale,
+                    jpeg_quality=self.id_jpeg_quality
+                )
+                for i in indices
+            ]
+        else:
+            image_format = "png"
+            page_images = [splitter.render_cover_page(i) for i in indices]
+
+        max_workers = min(self.ocr_max_concurrency, max(1, len(indices)))
+        log.info(
+            f"OCR de {len(indices)} carátulas ({'región' if use_region else 'página completa'}, "
+            f"{sum(len(b) for b in page_images)} bytes) con concurrencia máxima {max_workers}"
+        )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.ocr_client.ocr_image,
+                    img_bytes,
+                    session_id=f"caratula_{i}",
+                    image_format=image_format
+                )
+                for i, img_bytes in zip(indices, page_images)
+            ]
+            return [future.result() for future in futures]
+
     def _process_essays(
             self,
             profesor_id: int,
@@ -246,51 +558,62 @@ class OrchestratorService:
             semestre: str,
             tema: str,
             descripcion_tema: str,
-            tipo_documento: str
+            tipo_documento: str,
+            lote_id: Optional[int] = None
     ) -> Dict:
 
         try:
             log.info("Procesando ensayos/informes...")
 
-            evaluaciones_creadas = []
-
+            nombres_alumnos = []
             for pdf_info in pdf_files:
-                gcs_filename = pdf_info['gcs_filename']
-                original_filename = pdf_info['original_filename']
-
-                nombre_extraido = original_filename.replace('_', ' ').replace('-', ' ').rsplit('.', 1)[0]
-                nombre_alumno = nombre_extraido if not students else students[0] if students else "Por identificar"
-
-                evaluacion = Evaluacion(
-                    profesor_id=profesor_id,
-                    rubrica_id=rubrica_id,
-                    nombre_alumno=nombre_alumno,
-                    curso_id=curso_id,
-                    codigo_curso=codigo_curso,
-                    instructor=instructor,
-                    semestre=semestre,
-                    tema=tema,
-                    descripcion_tema=descripcion_tema,
-                    tipo_documento=tipo_documento,
-                    estado="pendiente"
-                )
-
-                evaluacion = self.evaluacion_repo.create(evaluacion)
-
-                log.info(f"Evaluación creada: ID={evaluacion.id}, Archivo={original_filename}")
-
-                self.task_service.create_file_task(
-                    gcs_filename=gcs_filename,
-                    original_filename=original_filename,
-                    evaluacion_id=evaluacion.id,
-                    tipo_documento=tipo_documento
-                )
-
-                evaluaciones_creadas.append({
-                    'evaluacion_id': evaluacion.id,
+                nombre_extraido = pdf_info['original_filename'].replace('_', ' ').replace('-', ' ').rsplit('.', 1)[0]
+                nombres_alumnos.append(nombre_extraido if not students else students[0] if students else "Por identificar")
+
+            evaluacion_ids, registrados = self._resume_state(lote_id)
+            if evaluacion_ids is None:
+                self._report_total(lote_id, len(pdf_files))
+
+                evaluacion_ids = self.evaluacion_repo.bulk_create([
+                    self._evaluacion_row(
+                        profesor_id=profesor_id,
+                        rubrica_id=rubrica_id,
+                        nombre_alumno=nombre_alumno,
+                        curso_id=curso_id,
+                        codigo_curso=codigo_curso,
+                        instructor=instructor,
+                        semestre=semestre,
+                        tema=tema,
+                        descripcion_tema=descripcion_tema,
+                        tipo_documento=tipo_documento
+                    )
+                    for nombre_alumno in nombres_alumnos
+                ])
+                self._record_evaluaciones(lote_id, evaluacion_ids)
+            else:
+                log.info(f"Reanudando lote {lote_id}: {len(registrados)}/{len(pdf_files)} ensayos ya registrados")
+
+            items = []
+            tasks = []
+            for idx, (pdf_info, evaluacion_id, nombre_alumno) in enumerate(zip(pdf_files, evaluacion_ids, nombres_alumnos)):
+                if evaluacion_id in registrados:
+                    continue
+                log.info(f"Evaluación creada: ID={evaluacion_id}, Archivo={pdf_info['original_filename']}")
+                items.append({
+                    'indice': idx,
+                    'evaluacion_id': evaluacion_id,
                     'nombre_alumno': nombre_alumno,
-                    'archivo': original_filename
+                    'archivo': pdf_info['original_filename'],
+                    'estado': 'pendiente'
                 })
+                tasks.append({
+                    'gcs_filename': pdf_info['gcs_filename'],
+                    'original_filename': pdf_info['original_filename'],
+                    'evaluacion_id': evaluacion_id,
+                    'tipo_documento': tipo_documento
+                })
+
+            evaluaciones_creadas = self._enqueue_file_tasks(items, tasks, lote_id)
 
             log.info(f"Lote procesado: {len(evaluaciones_creadas)} ensayos encolados")
 
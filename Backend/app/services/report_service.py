@@ -10,6 +10,13 @@ from reportlab.pdfgen import canvas
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
+from app.config.process_pool import get_process_pool
+
+
+def render_report(method_name: str, stats: dict, metadata: dict) -> bytes:
+
+    return getattr(ReportService(), method_name)(stats, metadata).getvalue()
+
 class NumberedCanvas(canvas.Canvas):
     """
     Custom canvas to enable 2-pass page numbering ('Página X de Y')
@@ -52,6 +59,12 @@ class NumberedCanvas(canvas.Canvas):
         self.restoreState()
 
 class ReportService:
+    async def generate_async(self, method_name: str, stats: dict, metadata: dict) -> io.BytesIO:
+
+        # ReportLab/openpyxl son CPU intensivos: se generan en el pool de procesos.
+        contenido = await get_process_pool().run_async(render_report, method_name, stats, metadata)
+        return io.BytesIO(contenido)
+
     def _setup_styles(self):
         styles = getSampleStyleSheet()
         
@@ -1,5 +1,8 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Optional
 from app.clients import TaskClient
+from app.config.settings import settings
 
 log = logging.getLogger(__name__)
 
@@ -15,6 +18,7 @@ class TaskService:
             original_filename: str,
             evaluacion_id: int,
             tipo_documento: str,
+            precomputed_ocr_text: str = None,
             delay_seconds: int = 0
     ) -> str:
 
@@ -24,6 +28,7 @@ class TaskService:
                 original_filename=original_filename,
                 evaluacion_id=evaluacion_id,
                 tipo_documento=tipo_documento,
+                precomputed_ocr_text=precomputed_ocr_text,
                 delay_seconds=delay_seconds
             )
 
@@ -33,16 +38,62 @@ class TaskService:
             log.error(f"Error al crear tarea de archivo: {e}")
             raise
 
+    def create_file_tasks(
+            self,
+            tasks: List[Dict],
+            max_workers: Optional[int] = None,
+            on_result: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+
+        # Cloud Tasks no ofrece creación por lotes; se paraleliza sobre el mismo cliente gRPC.
+        if not tasks:
+            return {'creadas': [], 'fallidas': []}
+
+        max_workers = min(max_workers or settings.TASK_ENQUEUE_CONCURRENCY, len(tasks))
+
+        def _create(task: Dict) -> Dict:
+            try:
+                task_name = self.task_client.create_file_processing_task(
+                    gcs_filename=task['gcs_filename'],
+                    original_filename=task['original_filename'],
+                    evaluacion_id=task['evaluacion_id'],
+                    tipo_documento=task['tipo_documento'],
+                    precomputed_ocr_text=task.get('precomputed_ocr_text'),
+                    delay_seconds=task.get('delay_seconds', 0)
+                )
+                return {'evaluacion_id': task['evaluacion_id'], 'task_name': task_name, 'error': None}
+            except Exception as e:
+                return {'evaluacion_id': task['evaluacion_id'], 'task_name': None, 'error': str(e)}
+
+        # on_result se invoca en este hilo a medida que termina cada tarea, no al final del lote.
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [executor.submit(_create, task) for task in tasks]
+            if on_result:
+                for future in as_completed(futures):
+                    on_result(future.result())
+            results = [future.result() for future in futures]
+
+        creadas = [r for r in results if not r['error']]
+        fallidas = [r for r in results if r['error']]
+
+        log.info(f"Tareas de archivo creadas: {len(creadas)}/{len(results)}")
+        for fallo in fallidas:
+            log.error(f"Error al crear tarea para evaluacion_id={fallo['evaluacion_id']}: {fallo['error']}")
+
+        return {'creadas': creadas, 'fallidas': fallidas}
+
     def create_evaluation_task(
             self,
             evaluacion_id: int,
-            delay_seconds: int = 5
+            delay_seconds: int = 5,
+            bypass_cache: bool = False
     ) -> str:
 
         try:
             task_name = self.task_client.create_evaluation_task(
                 evaluacion_id=evaluacion_id,
-                delay_seconds=delay_seconds
+                delay_seconds=delay_seconds,
+                bypass_cache=bypass_cache
             )
 
             log.info(f"Tarea de evaluación creada: {task_name}")
@@ -50,3 +101,14 @@ class TaskService:
         except Exception as e:
             log.error(f"Error al crear tarea de evaluación: {e}")
             raise
+
+    def create_exam_batch_task(self, lote_id: int) -> str:
+
+        try:
+            task_name = self.task_client.create_exam_batch_task(lote_id=lote_id)
+
+            log.info(f"Tarea de lote creada: {task_name}")
+            return task_name
+        except Exception as e:
+            log.error(f"Error al crear tarea del lote {lote_id}: {e}")
+            raise
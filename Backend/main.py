@@ -26,7 +26,11 @@ try:
     from sqlalchemy import text
     with engine.begin() as conn:
         conn.execute(text("ALTER TABLE resultados_analisis ADD COLUMN IF NOT EXISTS resultado_evaluacion_id INTEGER REFERENCES resultados_evaluacion(id) ON DELETE SET NULL;"))
-    print("Base de datos: Columna resultado_evaluacion_id verificada/creada.")
+        conn.execute(text("ALTER TABLE rubricas ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;"))
+        conn.execute(text("ALTER TABLE evaluaciones ADD COLUMN IF NOT EXISTS fecha_reclamo TIMESTAMP NULL;"))
+        conn.execute(text("ALTER TABLE lotes_procesamiento ADD COLUMN IF NOT EXISTS parametros JSON NULL;"))
+        conn.execute(text("ALTER TABLE lotes_procesamiento ADD COLUMN IF NOT EXISTS evaluacion_ids JSON NULL;"))
+    print("Base de datos: Columnas resultado_evaluacion_id, rubricas.version, evaluaciones.fecha_reclamo y lotes_procesamiento.parametros/evaluacion_ids verificadas/creadas.")
 except Exception as db_err:
     print(f"Error al verificar/crear columna en la base de datos: {db_err}")
 
@@ -0,0 +1,37 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.analysis_service import AnalysisService
+
+
+def _archivo(texto: str = "respuesta corta", imagenes=()) -> SimpleNamespace:
+    return SimpleNamespace(id=1, texto_extraido=texto, analisis_visual=json.dumps({"imagenes_gcs": list(imagenes)}))
+
+
+def _servicio() -> AnalysisService:
+    return AnalysisService(None, None, None, None, SimpleNamespace(model_name="m"), batch_size=3, batch_max_chars=100)
+
+
+@pytest.mark.parametrize("tipo_documento, imagenes, esperado", [
+    ("examen", ["pagina_1.png"], True),
+    ("examen", [], True),
+    ("ensayo", [], True),
+    ("ensayo", ["figura.png"], False),
+])
+def test_examen_escaneado_es_agrupable_aunque_tenga_paginas_en_gcs(tipo_documento, imagenes, esperado):
+
+    evaluacion = SimpleNamespace(tipo_documento=tipo_documento)
+
+    assert _servicio()._is_batchable(evaluacion, [_archivo(imagenes=imagenes)]) is esperado
+
+
+def test_documento_largo_o_con_varios_archivos_no_es_agrupable():
+
+    evaluacion = SimpleNamespace(tipo_documento="examen")
+    servicio = _servicio()
+
+    assert servicio._is_batchable(evaluacion, [_archivo("x" * 101)]) is False
+    assert servicio._is_batchable(evaluacion, [_archivo(), _archivo()]) is False
+    assert servicio._is_batchable(evaluacion, [_archivo(None)]) is False
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+from app.services.analysis_service import AnalysisService
+
+
+def _servicio(model_version: str = "gemini-2.5-flash-001") -> AnalysisService:
+
+    analyzer = SimpleNamespace(model_name="gemini-flash-latest", model_version=model_version)
+    return AnalysisService(None, None, None, None, analyzer)
+
+
+def _clave(servicio: AnalysisService, texto: str = "La fotosíntesis produce oxígeno.", **cambios) -> str:
+
+    datos = dict(tema="Biología", descripcion_tema="Fotosíntesis", tipo_documento="examen")
+    datos.update({k: v for k, v in cambios.items() if k in datos})
+    evaluacion = SimpleNamespace(**datos)
+    rubrica = SimpleNamespace(id=cambios.get("rubrica_id", 7), version=cambios.get("rubrica_version", 1))
+    archivos = [SimpleNamespace(id=1, analisis_visual=json.dumps({"imagenes_gcs": cambios.get("imagenes", [])}))]
+    return servicio._response_cache_key(evaluacion, rubrica, archivos, texto)
+
+
+def test_clave_estable_ante_espacios_y_normalizacion_unicode():
+
+    servicio = _servicio()
+
+    assert _clave(servicio, "La  fotosíntesis\nproduce oxígeno. ") == _clave(servicio)
+    assert _clave(servicio, "La fotosi\u0301ntesis produce oxi\u0301geno.") == _clave(servicio)
+
+
+def test_clave_cambia_con_cada_entrada_del_prompt():
+
+    servicio = _servicio()
+    base = _clave(servicio)
+
+    assert _clave(servicio, "Otra respuesta") != base
+    assert _clave(servicio, tema="Química") != base
+    assert _clave(servicio, tipo_documento="ensayo") != base
+    assert _clave(servicio, rubrica_version=2) != base
+    assert _clave(servicio, rubrica_id=8) != base
+    assert _clave(servicio, imagenes=["abc.png"]) != base
+
+
+def test_clave_usa_la_version_resuelta_del_modelo():
+
+    assert _clave(_servicio("gemini-2.5-flash-001")) != _clave(_servicio("gemini-2.5-flash-002"))
+
+    sin_version = AnalysisService(None, None, None, None, SimpleNamespace(model_name="gemini-flash-latest"))
+    assert sin_version._model_version() == "gemini-flash-latest"
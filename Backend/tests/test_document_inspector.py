@@ -0,0 +1,64 @@
+import fitz
+
+from app.extractors import DocumentInspector
+from app.extractors.pdf_text_engines import PdfPlumberTextEngine
+
+TEXTO_LARGO = "Desarrollo de la pregunta con texto suficiente para superar el umbral mínimo. " * 2
+
+
+def _pdf(*paginas: str) -> bytes:
+
+    # "t" = página con capa de texto, "e" = página escaneada (solo imagen).
+    with fitz.open() as doc:
+        for tipo in paginas:
+            pagina = doc.new_page()
+            if tipo == "t":
+                pagina.insert_textbox(fitz.Rect(72, 72, 520, 400), TEXTO_LARGO)
+            else:
+                pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), 0)
+                pix.set_rect(pix.irect, (120, 60, 200))
+                pagina.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+        return doc.tobytes()
+
+
+class _MotorRoto:
+
+    name = "roto"
+
+    def inspect(self, source, inspection, stop_after_chars=None):
+
+        inspection.page_texts.append("parcial")
+        raise RuntimeError("PDF dañado")
+
+
+def test_inspeccion_unica_registra_texto_e_imagenes_por_pagina():
+
+    inspection = DocumentInspector().inspect(_pdf("t", "e"), ".pdf")
+
+    assert inspection.complete is True
+    assert inspection.page_count == 2
+    assert inspection.has_extractable_text is True
+    assert inspection.has_images is True
+    assert inspection.pages_without_text == [1]
+
+
+def test_deteccion_se_detiene_al_encontrar_texto():
+
+    inspection = DocumentInspector().inspect(_pdf("t", "t", "t"), ".pdf", stop_when_text_found=True)
+
+    assert inspection.has_extractable_text is True
+    assert len(inspection.page_texts) == 1
+    assert inspection.complete is False
+    assert inspection.pages_without_text == []
+
+
+def test_motor_que_falla_se_reintenta_con_el_de_respaldo():
+
+    inspector = DocumentInspector(engine=_MotorRoto(), fallback_engine=PdfPlumberTextEngine())
+
+    inspection = inspector.inspect(_pdf("t", "e"), ".pdf")
+
+    assert inspection.complete is True
+    assert "parcial" not in inspection.page_texts
+    assert inspection.page_count == 2
+    assert inspection.has_extractable_text is True
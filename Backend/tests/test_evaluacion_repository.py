@@ -0,0 +1,117 @@
+import datetime
+
+from app.models import Evaluacion, ArchivoProcesado
+from app.repositories import EvaluacionRepository
+
+
+def _evaluacion(db, estado: str = "pendiente", fecha_reclamo=None, texto: str = "respuesta") -> Evaluacion:
+
+    evaluacion = Evaluacion(
+        profesor_id=1,
+        rubrica_id=1,
+        curso_id=1,
+        nombre_alumno="Alumno",
+        tema="tema",
+        descripcion_tema="descripción",
+        tipo_documento="examen",
+        estado=estado,
+        fecha_reclamo=fecha_reclamo
+    )
+    db.add(evaluacion)
+    db.flush()
+    db.add(ArchivoProcesado(evaluacion_id=evaluacion.id, nombre_archivo_original="examen.pdf", texto_extraido=texto))
+    db.commit()
+    return evaluacion
+
+
+def _estado(db, evaluacion_id: int) -> str:
+
+    db.expire_all()
+    return db.get(Evaluacion, evaluacion_id).estado
+
+
+def test_cambiar_estado_solo_toma_desde_el_estado_esperado(db):
+
+    repo = EvaluacionRepository(db)
+    evaluacion = _evaluacion(db)
+
+    assert repo.cambiar_estado(evaluacion.id, "pendiente", "ANALIZANDO") is True
+    assert repo.cambiar_estado(evaluacion.id, "pendiente", "ANALIZANDO") is False
+    assert _estado(db, evaluacion.id) == "ANALIZANDO"
+    assert db.get(Evaluacion, evaluacion.id).fecha_reclamo is not None
+
+
+def test_reclamo_vigente_no_se_puede_tomar(db):
+
+    repo = EvaluacionRepository(db)
+    evaluacion = _evaluacion(db, estado="ANALIZANDO", fecha_reclamo=datetime.datetime.utcnow())
+    vencido_antes = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+
+    assert repo.cambiar_estado(evaluacion.id, "ANALIZANDO", "ANALIZANDO", reclamo_vencido_antes=vencido_antes) is False
+
+
+def test_reclamo_vencido_se_toma_y_renueva_la_fecha(db):
+
+    repo = EvaluacionRepository(db)
+    antiguo = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    evaluacion = _evaluacion(db, estado="ANALIZANDO", fecha_reclamo=antiguo)
+    vencido_antes = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+
+    assert repo.cambiar_estado(evaluacion.id, "ANALIZANDO", "ANALIZANDO", reclamo_vencido_antes=vencido_antes) is True
+    db.expire_all()
+    assert db.get(Evaluacion, evaluacion.id).fecha_reclamo > vencido_antes
+
+    # Renovado, el mismo reclamo deja de estar vencido para un segundo trabajador.
+    assert repo.cambiar_estado(evaluacion.id, "ANALIZANDO", "ANALIZANDO", reclamo_vencido_antes=vencido_antes) is False
+
+
+def test_reclamo_sin_fecha_se_considera_vencido(db):
+
+    repo = EvaluacionRepository(db)
+    evaluacion = _evaluacion(db, estado="ANALIZANDO")
+    vencido_antes = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+
+    assert repo.cambiar_estado(evaluacion.id, "ANALIZANDO", "ANALIZANDO", reclamo_vencido_antes=vencido_antes) is True
+
+
+def test_candidatas_incluyen_pendientes_y_reclamos_vencidos(db):
+
+    repo = EvaluacionRepository(db)
+    ahora = datetime.datetime.utcnow()
+    propia = _evaluacion(db)
+    pendiente = _evaluacion(db)
+    vencida = _evaluacion(db, estado="ANALIZANDO", fecha_reclamo=ahora - datetime.timedelta(hours=1))
+    _evaluacion(db, estado="ANALIZANDO", fecha_reclamo=ahora)
+    _evaluacion(db, estado="COMPLETADO")
+
+    sin_vencidas = repo.get_batch_candidates(propia, limit=10)
+    con_vencidas = repo.get_batch_candidates(
+        propia, limit=10,
+        estado_reclamo="ANALIZANDO",
+        reclamo_vencido_antes=ahora - datetime.timedelta(minutes=10)
+    )
+
+    assert [e.id for e in sin_vencidas] == [pendiente.id]
+    assert [e.id for e in con_vencidas] == [pendiente.id, vencida.id]
+
+
+def test_bulk_create_devuelve_ids_en_el_orden_de_las_filas(db):
+
+    repo = EvaluacionRepository(db)
+    filas = [
+        {
+            'profesor_id': 1,
+            'rubrica_id': 1,
+            'curso_id': 1,
+            'nombre_alumno': nombre,
+            'tema': "tema",
+            'tipo_documento': "examen",
+            'estado': "pendiente"
+        }
+        for nombre in ("Ana", "Luis", "María")
+    ]
+
+    ids = repo.bulk_create(filas)
+
+    assert [db.get(Evaluacion, i).nombre_alumno for i in ids] == ["Ana", "Luis", "María"]
+    assert repo.bulk_create([]) == []
@@ -0,0 +1,75 @@
+import fitz
+import pytest
+
+from app.extractors.exam_pdf_splitter import ExamPdfSplitter
+
+
+def _cara(face_num: int, paginas: int) -> bytes:
+
+    with fitz.open() as doc:
+        for i in range(paginas):
+            doc.new_page().insert_text((72, 72), f"cara{face_num}-pagina{i}")
+        return doc.tobytes()
+
+
+@pytest.mark.parametrize("face_num, esperado", [
+    (1, [0, 1, 2, 3]),
+    (2, [3, 2, 1, 0]),
+    (3, [0, 1, 2, 3]),
+    (4, [3, 2, 1, 0]),
+])
+def test_caras_pares_se_leen_en_orden_inverso(face_num, esperado):
+
+    assert [ExamPdfSplitter.target_page_index(face_num, i, 4) for i in range(4)] == esperado
+
+
+def test_build_student_pdf_une_las_caras_de_cada_alumno():
+
+    with ExamPdfSplitter() as splitter:
+        for face_num in (1, 2, 3):
+            splitter.add_face(_cara(face_num, 3))
+
+        assert splitter.num_students == 3
+        with fitz.open(stream=splitter.build_student_pdf(0), filetype="pdf") as pdf:
+            textos = [pagina.get_text().strip() for pagina in pdf]
+
+    assert textos == ["cara1-pagina0", "cara2-pagina2", "cara3-pagina0"]
+
+
+def test_cara_con_menos_paginas_se_omite_para_ese_alumno():
+
+    with ExamPdfSplitter() as splitter:
+        splitter.add_face(_cara(1, 3))
+        splitter.add_face(_cara(2, 2))
+
+        with fitz.open(stream=splitter.build_student_pdf(0), filetype="pdf") as pdf:
+            assert len(pdf) == 1
+
+
+@pytest.mark.parametrize("region, esperado", [
+    ("0,0,1,0.35", (0.0, 0.0, 1.0, 0.35)),
+    ("full", None),
+    ("", None),
+    ("0,0,1", None),
+    ("0,0.5,1,0.2", None),
+])
+def test_parse_region(region, esperado):
+
+    assert ExamPdfSplitter.parse_region(region) == esperado
+
+
+def test_render_cover_page_recorta_la_region_en_jpeg_gris():
+
+    with ExamPdfSplitter() as splitter:
+        splitter.add_face(_cara(1, 1))
+        completa = splitter.render_cover_page(0)
+        recorte = splitter.render_cover_page(
+            0, region=(0, 0, 1, 0.35), dpi=100, image_format="jpeg", grayscale=True
+        )
+
+    with fitz.open(stream=completa, filetype="png") as img_completa, fitz.open(stream=recorte, filetype="jpeg") as img_recorte:
+        pix_completa = img_completa[0].get_pixmap()
+        pix_recorte = img_recorte[0].get_pixmap()
+
+    assert recorte[:2] == b"\xff\xd8"
+    assert pix_recorte.height < pix_completa.height
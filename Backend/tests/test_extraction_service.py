@@ -0,0 +1,219 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import fitz
+import pytest
+
+from app.config.process_pool import CPUProcessPool
+from app.extractors import TextExtractor, ImageExtractor
+from app.repositories import ExtraccionCacheRepository
+from app.services import ExtractionService
+
+TEXTO_LARGO = "Respuesta escrita en el examen con suficiente texto para la capa digital. " * 2
+
+
+def _pagina_escaneada(doc: fitz.Document) -> None:
+
+    pagina = doc.new_page()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), 0)
+    pix.set_rect(pix.irect, (120, 60, 200))
+    pagina.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+
+
+def _pdf(*paginas: str) -> bytes:
+
+    # "t" = página con capa de texto, "e" = página escaneada (solo imagen).
+    with fitz.open() as doc:
+        for tipo in paginas:
+            if tipo == "t":
+                doc.new_page().insert_textbox(fitz.Rect(72, 72, 520, 400), TEXTO_LARGO)
+            else:
+                _pagina_escaneada(doc)
+        return doc.tobytes()
+
+
+class _FakeOCR:
+
+    def __init__(self):
+        self.imagenes = []
+
+    def ocr_multiple_images(self, images_list, session_id="default_session"):
+
+        inicio = len(self.imagenes)
+        self.imagenes.extend(images_list)
+        return [f"ocr-{inicio + i}" for i in range(len(images_list))]
+
+
+class _FakeGCS:
+
+    def __init__(self, contenido: bytes = b""):
+        self.contenido = contenido
+        self.subidas = []
+
+    def download_blob(self, nombre):
+        return self.contenido
+
+    def download_blob_to_file(self, nombre, ruta):
+        with open(ruta, "wb") as f:
+            f.write(self.contenido)
+
+    def upload_blobs(self, uploads):
+        uploads = list(uploads)
+        self.subidas.extend(uploads)
+        return [{"destination_blob_name": u["destination_blob_name"], "error": None} for u in uploads]
+
+
+def _servicio(ocr=None, gcs=None, cache_repo=None) -> ExtractionService:
+
+    return ExtractionService(
+        gcs_client=gcs or _FakeGCS(),
+        ocr_client=ocr or _FakeOCR(),
+        gemini_client=None,
+        text_extractor=TextExtractor(),
+        image_extractor=ImageExtractor(),
+        student_matcher=None,
+        archivo_repo=SimpleNamespace(create_archivo=lambda **kwargs: SimpleNamespace(id=1, **kwargs)),
+        extraccion_cache_repo=cache_repo
+    )
+
+
+def _procesar(servicio: ExtractionService) -> dict:
+
+    return servicio.process_file(
+        gcs_filename="examen.pdf",
+        original_filename="examen.pdf",
+        evaluacion_id=1,
+        tipo_documento="examen",
+        tema="tema",
+        descripcion_tema=""
+    )
+
+
+@pytest.fixture(autouse=True)
+def _sin_pool_de_procesos():
+
+    with mock.patch("app.services.extraction_service.get_process_pool", return_value=CPUProcessPool(max_workers=0)):
+        yield
+
+
+def test_ocr_precalculado_de_la_caratula_evita_releer_la_pagina_1():
+
+    ocr = _FakeOCR()
+
+    texto, completo = _servicio(ocr)._extract_text(_pdf("e", "e"), ".pdf", "examen", precomputed_ocr_text="Carátula: Ana")
+
+    assert len(ocr.imagenes) == 1
+    assert texto == "Carátula: Ana\n\nocr-0"
+    assert completo is True
+
+
+def test_pdf_mixto_solo_hace_ocr_de_las_paginas_sin_texto():
+
+    ocr = _FakeOCR()
+
+    texto, completo = _servicio(ocr)._extract_text(_pdf("t", "e", "t"), ".pdf", "ensayo")
+
+    assert len(ocr.imagenes) == 1
+    antes, despues = texto.split("\nocr-0\n")
+    assert antes.startswith("Respuesta escrita") and despues.startswith("Respuesta escrita")
+    assert completo is True
+
+
+def test_pdf_mixto_con_ocr_fallido_queda_incompleto():
+
+    ocr = _FakeOCR()
+    ocr.ocr_multiple_images = lambda images_list, session_id=None: [None] * len(images_list)
+
+    texto, completo = _servicio(ocr)._extract_text(_pdf("t", "e"), ".pdf", "ensayo")
+
+    assert texto.startswith("Respuesta escrita")
+    assert completo is False
+
+
+def test_procesamiento_en_streaming_trabaja_sobre_un_temporal_y_lo_borra(tmp_path):
+
+    rutas = []
+    original = ExtractionService._download_to_temp
+
+    def _download(self, gcs_filename, file_extension):
+        ruta = original(self, gcs_filename, file_extension)
+        rutas.append(ruta)
+        return ruta
+
+    with mock.patch("app.services.extraction_service.settings.EXTRACTION_STREAMING", True), \
+            mock.patch("app.services.extraction_service.settings.EXTRACTION_TEMP_DIR", str(tmp_path)), \
+            mock.patch.object(ExtractionService, "_download_to_temp", _download):
+        resultado = _procesar(_servicio(gcs=_FakeGCS(_pdf("t", "e"))))
+
+    assert resultado["texto_extraido"].endswith("ocr-0")
+    assert len(rutas) == 1 and not list(tmp_path.iterdir())
+
+
+def test_fallo_al_borrar_el_temporal_no_falla_la_extraccion(tmp_path):
+
+    with mock.patch("app.services.extraction_service.settings.EXTRACTION_STREAMING", True), \
+            mock.patch("app.services.extraction_service.settings.EXTRACTION_TEMP_DIR", str(tmp_path)), \
+            mock.patch("app.services.extraction_service.os.remove", side_effect=PermissionError("ocupado")):
+        resultado = _procesar(_servicio(gcs=_FakeGCS(_pdf("t"))))
+
+    assert resultado["archivo_id"] == 1
+
+
+def test_ocr_se_rasteriza_por_ventanas_de_paginas():
+
+    ventanas = []
+    ocr = _FakeOCR()
+    original = ocr.ocr_multiple_images
+
+    def _ocr(images_list, session_id="default_session"):
+        ventanas.append(len(images_list))
+        return original(images_list)
+
+    ocr.ocr_multiple_images = _ocr
+
+    with mock.patch("app.services.extraction_service.settings.OCR_PAGE_WINDOW", 2):
+        texto, _ = _servicio(ocr)._extract_text(_pdf("e", "e", "e", "e", "e"), ".pdf", "examen")
+
+    assert ventanas == [2, 2, 1]
+    assert texto.split("\n\n") == [f"ocr-{i}" for i in range(5)]
+
+
+def _procesar_en_memoria(servicio: ExtractionService) -> dict:
+
+    with mock.patch("app.services.extraction_service.settings.EXTRACTION_STREAMING", False):
+        return _procesar(servicio)
+
+
+def test_mismo_contenido_reutiliza_la_extraccion_cacheada(db):
+
+    ocr = _FakeOCR()
+    servicio = _servicio(ocr, gcs=_FakeGCS(_pdf("t", "e")), cache_repo=ExtraccionCacheRepository(db))
+
+    primero = _procesar_en_memoria(servicio)
+    segundo = _procesar_en_memoria(servicio)
+
+    assert len(ocr.imagenes) == 1
+    assert segundo["texto_extraido"] == primero["texto_extraido"]
+
+
+def test_cambio_de_configuracion_invalida_la_cache(db):
+
+    ocr = _FakeOCR()
+    servicio = _servicio(ocr, gcs=_FakeGCS(_pdf("e")), cache_repo=ExtraccionCacheRepository(db))
+
+    _procesar_en_memoria(servicio)
+    with mock.patch("app.services.extraction_service.settings.IMAGE_MAX_EDGE", 512):
+        _procesar_en_memoria(servicio)
+
+    assert len(ocr.imagenes) == 2
+
+
+def test_extraccion_incompleta_no_se_cachea(db):
+
+    ocr = _FakeOCR()
+    ocr.ocr_multiple_images = lambda images_list, session_id=None: [None] * len(images_list)
+    repo = ExtraccionCacheRepository(db)
+
+    _procesar_en_memoria(_servicio(ocr, gcs=_FakeGCS(_pdf("t", "e")), cache_repo=repo))
+
+    assert repo.get_all() == []
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from app.clients import GCSClient
+
+
+def _cliente(upload_blob) -> GCSClient:
+
+    cliente = GCSClient.__new__(GCSClient)
+    cliente.upload_blob = upload_blob
+    return cliente
+
+
+def test_upload_blobs_conserva_el_orden_y_reporta_errores_por_archivo():
+
+    def _upload(source_bytes, destination, content_type=None):
+        time.sleep(0.01 * (5 - int(destination)))
+        if destination == "2":
+            raise RuntimeError("403")
+        return f"gs://bucket/{destination}"
+
+    uploads = [{"source_bytes": b"x", "destination_blob_name": str(i)} for i in range(5)]
+
+    resultados = _cliente(_upload).upload_blobs(uploads, max_workers=3)
+
+    assert [r["destination_blob_name"] for r in resultados] == ["0", "1", "2", "3", "4"]
+    assert [r["error"] for r in resultados] == [None, None, "403", None, None]
+    assert resultados[0]["uri"] == "gs://bucket/0"
+
+
+def test_upload_blobs_consume_el_generador_con_subidas_acotadas():
+
+    lock = threading.Lock()
+    estado = {"generadas": 0, "subidas": 0, "max_en_vuelo": 0}
+
+    def _upload(source_bytes, destination, content_type=None):
+        time.sleep(0.01)
+        with lock:
+            estado["subidas"] += 1
+        return destination
+
+    def _generar():
+        for i in range(20):
+            with lock:
+                estado["max_en_vuelo"] = max(estado["max_en_vuelo"], estado["generadas"] - estado["subidas"])
+                estado["generadas"] += 1
+            yield {"source_bytes": b"x", "destination_blob_name": str(i)}
+
+    resultados = _cliente(_upload).upload_blobs(_generar(), max_workers=2)
+
+    assert len(resultados) == 20
+    assert estado["max_en_vuelo"] <= 4
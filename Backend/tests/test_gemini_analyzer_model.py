@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from app.config.settings import settings
+from app.services import gemini_analyzer
+from app.services.gemini_analyzer import GeminiAnalyzer
+
+
+def _analyzer(model_name: str) -> GeminiAnalyzer:
+
+    with mock.patch.object(settings, "GEMINI_MODEL", model_name), \
+            mock.patch.object(settings, "GEMINI_CONTEXT_CACHE", True), \
+            mock.patch.object(GeminiAnalyzer, "_get_api_key_from_secret", return_value=None):
+        return GeminiAnalyzer(gateway=mock.Mock())
+
+
+def test_contexto_cacheado_usa_el_mismo_modelo_que_las_llamadas_directas():
+
+    analyzer = _analyzer("gemini-2.5-flash")
+    analyzer.context_cache_min_chars = 1
+    rubrica = SimpleNamespace(id=3, version=1, criterios=[])
+
+    with mock.patch.object(gemini_analyzer.caching.CachedContent, "create") as create, \
+            mock.patch.object(gemini_analyzer.genai.GenerativeModel, "from_cached_content"):
+        analyzer._get_cached_context_model(rubrica, "tema", "desc", "ensayo", "prompt")
+
+    assert create.call_args.kwargs["model"] == analyzer.model.model_name.split("/")[-1] == "gemini-2.5-flash"
+    assert analyzer.model_version == "gemini-2.5-flash"
+
+
+def test_alias_sin_version_desactiva_el_contexto_cacheado():
+
+    analyzer = _analyzer("gemini-flash-latest")
+    rubrica = SimpleNamespace(id=3, version=1, criterios=[])
+
+    assert analyzer.context_cache_enabled is False
+    assert analyzer._get_cached_context_model(rubrica, "tema", "desc", "ensayo", "p" * 10000) is None
+
+
+def test_la_version_del_modelo_no_cambia_con_las_respuestas():
+
+    analyzer = _analyzer("gemini-2.5-flash")
+    respuesta = SimpleNamespace(text='{"resultados": []}', model_version="gemini-2.5-flash-preview-09-2025")
+    analyzer.streaming = False
+
+    analyzer._consume_response(respuesta, gemini_analyzer.JSONArrayStreamParser("resultados"), lambda item: None)
+
+    assert analyzer.model_version == "gemini-2.5-flash"
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from app.config.settings import settings
+from app.services import gemini_analyzer
+from app.services.gemini_analyzer import GeminiAnalyzer
+
+
+def _analyzer() -> GeminiAnalyzer:
+
+    with mock.patch.object(settings, "GEMINI_MODEL", "gemini-2.5-flash"), \
+            mock.patch.object(settings, "GEMINI_CONTEXT_CACHE", True), \
+            mock.patch.object(GeminiAnalyzer, "_get_api_key_from_secret", return_value=None):
+        return GeminiAnalyzer(gateway=mock.Mock())
+
+
+def _rubrica(version: int = 1) -> SimpleNamespace:
+
+    nivel = SimpleNamespace(nombre_nivel="Logrado", puntaje=5, descriptores=["claro", "completo"])
+    criterio = SimpleNamespace(id=7, nombre_criterio="Argumentación", descripcion_criterio="Sustenta ideas", niveles=[nivel])
+    return SimpleNamespace(id=3, version=version, criterios=[criterio])
+
+
+def test_seccion_de_rubrica_se_compila_una_vez_por_version():
+
+    analyzer = _analyzer()
+
+    with mock.patch.object(GeminiAnalyzer, "_compile_rubric_section", wraps=GeminiAnalyzer._compile_rubric_section) as compilar:
+        primero = analyzer._build_system_prompt(_rubrica(), "tema", "desc", "ensayo")
+        segundo = analyzer._build_system_prompt(_rubrica(), "otro tema", "desc", "ensayo")
+        analyzer._build_system_prompt(_rubrica(version=2), "tema", "desc", "ensayo")
+
+    assert compilar.call_count == 2
+    assert "Criterio ID: 7" in primero and "Logrado (Puntaje: 5): claro, completo" in primero
+    assert "otro tema" in segundo
+
+
+def test_contexto_cacheado_se_reutiliza_y_un_fallo_no_se_reintenta():
+
+    analyzer = _analyzer()
+    analyzer.context_cache_min_chars = 1
+
+    with mock.patch.object(gemini_analyzer.caching.CachedContent, "create") as create, \
+            mock.patch.object(gemini_analyzer.genai.GenerativeModel, "from_cached_content", return_value="modelo"):
+        assert analyzer._get_cached_context_model(_rubrica(), "tema", "desc", "ensayo", "prompt") == "modelo"
+        assert analyzer._get_cached_context_model(_rubrica(), "tema", "desc", "ensayo", "prompt") == "modelo"
+    assert create.call_count == 1
+
+    with mock.patch.object(gemini_analyzer.caching.CachedContent, "create", side_effect=RuntimeError("sin soporte")) as create:
+        assert analyzer._get_cached_context_model(_rubrica(2), "tema", "desc", "ensayo", "prompt") is None
+        assert analyzer._get_cached_context_model(_rubrica(2), "tema", "desc", "ensayo", "prompt") is None
+    assert create.call_count == 1
@@ -0,0 +1,93 @@
+import io
+
+import fitz
+from PIL import Image
+
+from app.extractors import ImageExtractor
+
+
+def _degradado(ancho: int = 200, alto: int = 150, desfase: int = 0) -> Image.Image:
+
+    imagen = Image.new("RGB", (ancho, alto))
+    imagen.putdata([((x * 255) // ancho, (y * 255) // alto, (x + y + desfase) % 256) for y in range(alto) for x in range(ancho)])
+    return imagen
+
+
+def _png(imagen: Image.Image) -> bytes:
+
+    buffer = io.BytesIO()
+    imagen.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _pdf_con_imagenes(*imagenes: bytes) -> bytes:
+
+    with fitz.open() as doc:
+        for contenido in imagenes:
+            doc.new_page().insert_image(fitz.Rect(72, 72, 372, 297), stream=contenido)
+        return doc.tobytes()
+
+
+def test_imagenes_repetidas_y_casi_iguales_se_guardan_una_vez():
+
+    original = _degradado()
+    casi_igual = original.copy()
+    casi_igual.putpixel((10, 10), (255, 255, 255))
+
+    pdf = _pdf_con_imagenes(_png(original), _png(casi_igual), _png(original.transpose(Image.Transpose.ROTATE_180)))
+
+    imagenes = ImageExtractor().extract_images(pdf, ".pdf")
+
+    assert len(imagenes) == 2
+
+
+def test_imagenes_pequenas_se_descartan():
+
+    pdf = _pdf_con_imagenes(_png(_degradado(30, 30)), _png(_degradado()))
+
+    imagenes = ImageExtractor().extract_images(pdf, ".pdf")
+
+    assert [(i.width, i.height) for i in imagenes] == [(200, 150)]
+
+
+def test_limite_de_imagenes_por_documento():
+
+    distintas = [_png(_degradado().rotate(angulo)) for angulo in (0, 90, 180)]
+    pdf = _pdf_con_imagenes(*distintas)
+
+    assert len(ImageExtractor(max_images=1, hash_distance=0).extract_images(pdf, ".pdf")) == 1
+
+
+def test_foto_grande_se_reduce_y_recomprime():
+
+    grande = _degradado().resize((3000, 2000))
+
+    record = ImageExtractor(max_edge=1536)._to_record(_png(grande), Image.open(io.BytesIO(_png(grande))))
+
+    assert record.format == "jpeg"
+    assert max(record.width, record.height) == 1536
+
+
+def test_dibujo_de_pocos_colores_queda_en_png_gris():
+
+    dibujo = Image.new("RGB", (400, 300), "white")
+    for x in range(50, 350):
+        dibujo.putpixel((x, 150), (0, 0, 0))
+    contenido = _png(dibujo)
+
+    record = ImageExtractor()._to_record(contenido, Image.open(io.BytesIO(contenido)))
+
+    assert record.format == "png"
+    with Image.open(io.BytesIO(record.data)) as resultado:
+        assert resultado.mode == "L"
+
+
+def test_imagen_ya_compacta_no_se_recodifica():
+
+    buffer = io.BytesIO()
+    _degradado(300, 200).save(buffer, format="JPEG", quality=30)
+    contenido = buffer.getvalue()
+
+    record = ImageExtractor(photo_quality=95)._to_record(contenido, Image.open(io.BytesIO(contenido)))
+
+    assert record.data is contenido
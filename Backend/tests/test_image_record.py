@@ -0,0 +1,56 @@
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+from PIL import Image
+
+from app.extractors import ImageExtractor, ImageRecord
+from app.services.analysis_service import AnalysisService
+
+
+def _jpeg(ancho: int = 120, alto: int = 80) -> bytes:
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (ancho, alto), (200, 40, 90)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_registro_conserva_los_bytes_y_arma_la_parte_para_gemini():
+
+    contenido = _jpeg()
+
+    record = ImageRecord.from_bytes(contenido, ".bin")
+
+    assert record.data is contenido
+    assert (record.format, record.width, record.height) == ("jpeg", 120, 80)
+    assert record.extension == "jpg"
+    assert record.to_gemini_part() == {"mime_type": "image/jpeg", "data": contenido}
+
+
+def test_formato_del_nombre_solo_se_usa_si_la_cabecera_no_lo_indica():
+
+    assert ImageRecord(b"...", ".JPG").format == "jpeg"
+    assert ImageRecord(b"...", "webp").mime_type == "image/webp"
+
+
+def test_imagen_original_se_conserva_sin_recodificar():
+
+    contenido = _jpeg()
+    imagen = Image.open(io.BytesIO(contenido))
+
+    record = ImageExtractor(keep_original=True)._to_record(contenido, imagen)
+
+    assert record.data is contenido
+
+
+def test_imagenes_de_gcs_se_envuelven_sin_decodificar():
+
+    contenido = _jpeg()
+    servicio = AnalysisService.__new__(AnalysisService)
+    servicio.gcs_client = SimpleNamespace(download_blob=lambda nombre: contenido)
+
+    with mock.patch.object(AnalysisService, "_gcs_images", return_value=["extracciones/imagenes/abc.jpg"]):
+        imagenes = servicio._load_images([SimpleNamespace(id=1)])
+
+    assert [i.data for i in imagenes] == [contenido]
+    assert imagenes[0].mime_type == "image/jpeg"
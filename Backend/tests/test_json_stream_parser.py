@@ -0,0 +1,50 @@
+from app.services.json_stream_parser import JSONArrayStreamParser
+
+
+def test_entrega_cada_elemento_al_cerrarse():
+
+    parser = JSONArrayStreamParser("resultados")
+
+    assert parser.feed('{"resultados": [{"criterio_id": 1, "nota": ') == []
+    assert parser.feed('5}, {"criterio_id": 2') == [{"criterio_id": 1, "nota": 5}]
+    assert parser.feed(', "nota": 3}], "comentarios_generales": "ok"}') == [{"criterio_id": 2, "nota": 3}]
+
+    assert len(parser.items) == 2
+    assert parser.document()["comentarios_generales"] == "ok"
+
+
+def test_ignora_llaves_y_corchetes_dentro_de_cadenas():
+
+    parser = JSONArrayStreamParser("resultados")
+    parser.feed('{"resultados": [{"feedback": "usa } y ] y \\"{\\" en el texto"}]}')
+
+    assert parser.items == [{"feedback": 'usa } y ] y "{" en el texto'}]
+
+
+def test_solo_lee_el_arreglo_de_la_clave_indicada():
+
+    parser = JSONArrayStreamParser("resultados")
+    parser.feed('{"otros": [{"x": 1}], "meta": {"resultados": [{"y": 2}]}, "resultados": [{"z": 3}]}')
+
+    assert parser.items == [{"z": 3}]
+
+
+def test_descarta_elementos_invalidos_sin_detenerse():
+
+    parser = JSONArrayStreamParser("resultados")
+    parser.feed('{"resultados": [{"a": 1,}, {"b": 2}]}')
+
+    assert parser.items == [{"b": 2}]
+    assert parser.invalid_items == 1
+
+
+def test_document_tolera_texto_alrededor_y_respuestas_cortadas():
+
+    parser = JSONArrayStreamParser("resultados")
+    parser.feed('```json\n{"resultados": [], "comentarios_generales": "x"}\n```')
+    assert parser.document() == {"resultados": [], "comentarios_generales": "x"}
+
+    cortada = JSONArrayStreamParser("resultados")
+    cortada.feed('{"resultados": [{"a": 1}, {"b"')
+    assert cortada.items == [{"a": 1}]
+    assert cortada.document() == {}
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.clients.llm_gateway import LLMGateway, LLMUnavailableError, _CircuitBreaker
+
+
+def test_circuito_se_abre_al_alcanzar_el_umbral():
+
+    breaker = _CircuitBreaker(failure_threshold=3, cooldown=60)
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.allow()
+    assert breaker.record_failure() is True
+    assert not breaker.allow()
+
+
+def test_un_exito_reinicia_el_conteo():
+
+    breaker = _CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.allow()
+
+
+def test_semiabierto_deja_pasar_una_sola_prueba():
+
+    breaker = _CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_umbral_cero_desactiva_el_circuito():
+
+    breaker = _CircuitBreaker(failure_threshold=0, cooldown=60)
+    for _ in range(10):
+        assert breaker.record_failure() is False
+    assert breaker.allow()
+
+
+class _ModeloFallido:
+
+    model_name = "modelo-prueba"
+
+    def __init__(self, error):
+
+        self.error = error
+        self.llamadas = 0
+
+    def generate_content(self, contents, **kwargs):
+
+        self.llamadas += 1
+        raise self.error
+
+
+def _gateway(**kwargs) -> LLMGateway:
+
+    opciones = dict(max_concurrency=2, requests_per_minute=6000, tokens_per_minute=1e9, max_retries=0, deadline=5)
+    opciones.update(kwargs)
+    return LLMGateway(**opciones)
+
+
+def test_gateway_rechaza_llamadas_con_el_circuito_abierto():
+
+    gateway = _gateway(circuit_failures=2, circuit_cooldown=60)
+    modelo = _ModeloFallido(google_exceptions.ServiceUnavailable("caído"))
+
+    for _ in range(2):
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            gateway.generate(modelo, ["hola"])
+
+    with pytest.raises(LLMUnavailableError):
+        gateway.generate(modelo, ["hola"])
+    assert modelo.llamadas == 2
+
+
+def test_errores_de_contenido_no_abren_el_circuito():
+
+    gateway = _gateway(circuit_failures=1, circuit_cooldown=60)
+    modelo = _ModeloFallido(google_exceptions.InvalidArgument("prompt inválido"))
+
+    for _ in range(3):
+        with pytest.raises(google_exceptions.InvalidArgument):
+            gateway.generate(modelo, ["hola"])
+    assert modelo.llamadas == 3
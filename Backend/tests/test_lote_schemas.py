@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from app.schemas import LoteProcesamientoSchema
+
+
+def test_lote_con_examen_no_reconstruido_se_valida():
+
+    lote = SimpleNamespace(
+        id=1,
+        tipo_documento="examen",
+        estado="completado",
+        total=2,
+        procesados=2,
+        detalle=[
+            {
+                "indice": 0,
+                "evaluacion_id": 10,
+                "nombre_alumno": "Ana",
+                "confianza": 95.0,
+                "archivo": "examen_10_Ana.pdf",
+                "estado": "encolado"
+            },
+            {
+                "indice": 1,
+                "evaluacion_id": 11,
+                "nombre_alumno": "Estudiante_Desconocido_2",
+                "confianza": 0.0,
+                "archivo": None,
+                "estado": "error",
+                "error": "No se pudo reconstruir el PDF del examen: ninguna cara tiene esa página"
+            }
+        ],
+        error=None,
+        fecha_creacion=None,
+        fecha_actualizacion=None
+    )
+
+    schema = LoteProcesamientoSchema.model_validate(lote)
+
+    assert [item.archivo for item in schema.detalle] == ["examen_10_Ana.pdf", None]
+    assert schema.detalle[1].estado == "error"
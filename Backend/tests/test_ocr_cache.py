@@ -0,0 +1,63 @@
+from unittest import mock
+
+from app.clients import RapidAPIClient
+from app.clients.ocr_cache import OCRCache
+
+
+class _FakeBackend:
+
+    def __init__(self, entradas=None):
+        self.entradas = dict(entradas or {})
+
+    def get(self, key):
+        return self.entradas.get(key)
+
+    def set(self, key, texto):
+        self.entradas[key] = texto
+
+
+def test_misma_imagen_se_reconoce_una_sola_vez():
+
+    cliente = RapidAPIClient(cache=OCRCache())
+
+    with mock.patch.object(cliente, "_request_ocr", return_value="Ana García") as request_ocr:
+        assert cliente.ocr_image(b"imagen") == "Ana García"
+        assert cliente.ocr_image(b"imagen", session_id="otra") == "Ana García"
+
+    request_ocr.assert_called_once()
+    assert cliente.cache.stats()["hits"] == 1
+
+
+def test_fallo_de_ocr_no_se_guarda_en_cache():
+
+    cliente = RapidAPIClient(cache=OCRCache())
+
+    with mock.patch.object(cliente, "_request_ocr", side_effect=[None, "texto"]) as request_ocr:
+        assert cliente.ocr_image(b"imagen") is None
+        assert cliente.ocr_image(b"imagen") == "texto"
+
+    assert request_ocr.call_count == 2
+
+
+def test_cache_persistente_alimenta_la_memoria():
+
+    key = OCRCache.key_for(b"imagen")
+    backend = _FakeBackend({key: "guardado"})
+    cache = OCRCache(backend=backend)
+
+    assert cache.get(key) == "guardado"
+    backend.entradas.clear()
+    assert cache.get(key) == "guardado"
+    assert cache.stats()["hits_persistentes"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_en_memoria_respeta_el_limite():
+
+    cache = OCRCache(max_entries=2)
+    for i in range(3):
+        cache.set(str(i), f"texto{i}")
+
+    assert cache.get("0") is None
+    assert cache.get("2") == "texto2"
+    assert cache.stats()["entradas"] == 2
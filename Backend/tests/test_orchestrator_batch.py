@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from app.models import Evaluacion, LoteProcesamiento
+from app.repositories import EvaluacionRepository, LoteRepository
+from app.repositories.lote_repository import ERROR_INTERRUMPIDO
+from app.services import OrchestratorService
+
+
+class _FakeTaskService:
+
+    def __init__(self, falla: bool = False):
+        self.falla = falla
+        self.encoladas = []
+
+    def create_file_tasks(self, tasks, on_result=None):
+
+        if self.falla:
+            raise RuntimeError("cola no disponible")
+        for task in tasks:
+            self.encoladas.append(task['evaluacion_id'])
+            on_result({'evaluacion_id': task['evaluacion_id'], 'task_name': "t", 'error': None})
+
+
+def _orchestrator(db, task_service) -> OrchestratorService:
+
+    return OrchestratorService(
+        evaluacion_repo=EvaluacionRepository(db),
+        rubrica_repo=SimpleNamespace(),
+        curso_repo=SimpleNamespace(),
+        gcs_client=SimpleNamespace(),
+        task_service=task_service,
+        ocr_client=SimpleNamespace(),
+        student_matcher=SimpleNamespace(),
+        lote_repo=LoteRepository(db)
+    )
+
+
+def _parametros(archivos) -> dict:
+
+    return {
+        "profesor_id": 1,
+        "rubrica_id": 1,
+        "pdf_files": [{"gcs_filename": a, "original_filename": a} for a in archivos],
+        "student_list": "",
+        "curso_id": 1,
+        "codigo_curso": 1234,
+        "instructor": "Profesor",
+        "semestre": "2026-1",
+        "tema": "tema",
+        "descripcion_tema": "",
+        "tipo_documento": "ensayo"
+    }
+
+
+def _lote(db, **kwargs) -> LoteProcesamiento:
+
+    return LoteRepository(db).create_lote(profesor_id=1, tipo_documento="ensayo", **kwargs)
+
+
+def test_lote_se_ejecuta_desde_los_parametros_guardados(db):
+
+    tareas = _FakeTaskService()
+    lote = _lote(db, total=2, parametros=_parametros(["a.pdf", "b.pdf"]))
+
+    with mock.patch.object(OrchestratorService, "validate_batch_context"):
+        _orchestrator(db, tareas).run_exam_batch_job(lote.id)
+
+    db.refresh(lote)
+    assert lote.estado == "completado"
+    assert lote.procesados == 2
+    assert sorted(tareas.encoladas) == sorted(lote.evaluacion_ids)
+
+
+def test_reintento_reanuda_sin_duplicar_evaluaciones(db):
+
+    tareas = _FakeTaskService()
+    lote = _lote(db, total=2, parametros=_parametros(["a.pdf", "b.pdf"]))
+
+    with mock.patch.object(OrchestratorService, "validate_batch_context"):
+        orchestrator = _orchestrator(db, tareas)
+        ids = orchestrator.evaluacion_repo.bulk_create([
+            orchestrator._evaluacion_row(1, 1, "Alumno", 1, 1234, "Profesor", "2026-1", "tema", "", "ensayo")
+            for _ in range(2)
+        ])
+        lote_repo = LoteRepository(db)
+        lote_repo.registrar_evaluaciones(lote.id, ids)
+        lote_repo.registrar_items(lote.id, [{'indice': 0, 'evaluacion_id': ids[0], 'nombre_alumno': "Alumno", 'estado': 'encolado'}])
+        lote_repo.update(lote.id, estado="error", error=ERROR_INTERRUMPIDO)
+
+        orchestrator.run_exam_batch_job(lote.id)
+
+    db.refresh(lote)
+    assert tareas.encoladas == [ids[1]]
+    assert db.query(Evaluacion).count() == 2
+    assert lote.estado == "completado"
+    assert lote.procesados == 2
+
+
+def test_lote_finalizado_no_se_repite(db):
+
+    tareas = _FakeTaskService()
+    lote = _lote(db, parametros=_parametros(["a.pdf"]))
+    LoteRepository(db).finalizar(lote.id)
+
+    _orchestrator(db, tareas).run_exam_batch_job(lote.id)
+
+    assert tareas.encoladas == []
+    assert db.query(Evaluacion).count() == 0
+
+
+def test_lote_fallido_cierra_evaluaciones_sin_encolar(db):
+
+    lote = _lote(db, parametros=_parametros(["a.pdf", "b.pdf"]))
+
+    with mock.patch.object(OrchestratorService, "validate_batch_context"):
+        _orchestrator(db, _FakeTaskService(falla=True)).run_exam_batch_job(lote.id)
+
+    db.refresh(lote)
+    assert lote.estado == "error"
+    assert [item['estado'] for item in lote.detalle] == ['error', 'error']
+    assert {e.estado for e in db.query(Evaluacion).all()} == {"ERROR"}
+
+
+def test_total_de_examenes_cuenta_alumnos_de_cara_1():
+
+    import fitz
+
+    cara_1 = fitz.open()
+    for _ in range(3):
+        cara_1.new_page()
+    contenido = cara_1.tobytes()
+
+    gcs = SimpleNamespace(download_blob=mock.Mock(return_value=contenido))
+    orchestrator = OrchestratorService(
+        evaluacion_repo=None, rubrica_repo=None, curso_repo=None, gcs_client=gcs, task_service=None,
+        ocr_client=None, student_matcher=None
+    )
+    archivos = [
+        {"gcs_filename": "g2", "original_filename": "cara_2.pdf"},
+        {"gcs_filename": "g1", "original_filename": "cara_1.pdf"}
+    ]
+
+    assert orchestrator.count_batch_students(archivos, "examen") == 3
+    gcs.download_blob.assert_called_once_with("g1")
+    assert orchestrator.count_batch_students(archivos, "ensayo") == 2
@@ -0,0 +1,88 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services import OrchestratorService
+
+
+class _FakeSplitter:
+
+    def render_cover_page(self, i, **kwargs):
+        return f"pagina_{i}".encode()
+
+
+class _FakeOCR:
+
+    def __init__(self):
+        self.activas = 0
+        self.max_activas = 0
+        self._lock = threading.Lock()
+
+    def ocr_image(self, img_bytes, session_id=None, image_format=None):
+
+        with self._lock:
+            self.activas += 1
+            self.max_activas = max(self.max_activas, self.activas)
+        time.sleep(0.05)
+        with self._lock:
+            self.activas -= 1
+        return img_bytes.decode().upper()
+
+
+def _orchestrator(ocr, ocr_max_concurrency: int) -> OrchestratorService:
+
+    return OrchestratorService(
+        evaluacion_repo=None,
+        rubrica_repo=None,
+        curso_repo=None,
+        gcs_client=None,
+        task_service=None,
+        ocr_client=ocr,
+        student_matcher=SimpleNamespace(),
+        ocr_max_concurrency=ocr_max_concurrency
+    )
+
+
+def test_ocr_de_caratulas_concurrente_conserva_el_orden():
+
+    ocr = _FakeOCR()
+
+    textos = _orchestrator(ocr, 3)._ocr_cover_pages(_FakeSplitter(), list(range(8)), use_region=False)
+
+    assert textos == [f"PAGINA_{i}" for i in range(8)]
+    assert 1 < ocr.max_activas <= 3
+
+
+def test_ocr_de_caratulas_respeta_concurrencia_unitaria():
+
+    ocr = _FakeOCR()
+
+    _orchestrator(ocr, 1)._ocr_cover_pages(_FakeSplitter(), [0, 1, 2], use_region=False)
+
+    assert ocr.max_activas == 1
+
+
+def test_caratula_sin_coincidencia_en_la_region_se_reintenta_con_pagina_completa():
+
+    llamadas = []
+
+    def _ocr_cover_pages(splitter, indices, use_region=True):
+        llamadas.append((list(indices), use_region))
+        if use_region:
+            return ["Alumno: Garcia Perez Ana", "ilegible"]
+        return ["Alumno: Quispe Mamani Luis"]
+
+    from app.extractors import StudentNameMatcher
+
+    orchestrator = _orchestrator(_FakeOCR(), 2)
+    orchestrator.student_matcher = StudentNameMatcher()
+    orchestrator.id_region = (0.0, 0.0, 1.0, 0.35)
+    orchestrator._ocr_cover_pages = _ocr_cover_pages
+
+    asignaciones, textos_completos = orchestrator._identify_students(
+        _FakeSplitter(), 2, ["García Pérez, Ana", "Quispe Mamani, Luis", "Torres Díaz, María"]
+    )
+
+    assert llamadas == [([0, 1], True), ([1], False)]
+    assert [a[0] for a in asignaciones] == ["García Pérez, Ana", "Quispe Mamani, Luis"]
+    assert textos_completos == {1: "Alumno: Quispe Mamani Luis"}
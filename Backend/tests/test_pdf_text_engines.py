@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import fitz
+
+from app.extractors.document_inspector import DocumentInspection
+from app.extractors.pdf_text_engines import PyMuPDFTextEngine, PdfPlumberTextEngine
+
+
+def _pdf(paginas: int) -> bytes:
+
+    with fitz.open() as doc:
+        for i in range(paginas):
+            doc.new_page().insert_text((72, 72), f"Pregunta {i + 1}: respuesta del alumno")
+        return doc.tobytes()
+
+
+def _pool_en_linea(llamadas: list):
+
+    def _run_many(fn, args_list, timeout=None):
+        llamadas.extend(args_list)
+        return [fn(*args) for args in args_list]
+
+    return SimpleNamespace(max_workers=2, run_many=_run_many)
+
+
+def _inspeccionar(engine, pdf_bytes: bytes) -> DocumentInspection:
+
+    inspection = DocumentInspection(".pdf")
+    engine.inspect(pdf_bytes, inspection)
+    return inspection
+
+
+def test_pymupdf_extrae_el_mismo_texto_que_pdfplumber():
+
+    pdf_bytes = _pdf(3)
+
+    rapido = _inspeccionar(PyMuPDFTextEngine(pool=SimpleNamespace(max_workers=1)), pdf_bytes)
+    referencia = _inspeccionar(PdfPlumberTextEngine(), pdf_bytes)
+
+    assert rapido.page_texts == referencia.page_texts
+    assert rapido.complete is True
+
+
+def test_documentos_largos_se_extraen_por_bloques_en_orden():
+
+    llamadas = []
+    engine = PyMuPDFTextEngine(parallel_min_pages=4, pages_per_chunk=2, pool=_pool_en_linea(llamadas))
+
+    inspection = _inspeccionar(engine, _pdf(5))
+
+    assert [(inicio, fin) for _, inicio, fin in llamadas] == [(0, 2), (2, 4), (4, 5)]
+    assert inspection.page_texts == [f"Pregunta {i + 1}: respuesta del alumno" for i in range(5)]
+    assert inspection.complete is True
+
+
+def test_fallo_del_pool_continua_en_serie():
+
+    def _falla(fn, args_list, timeout=None):
+        raise TimeoutError("pool saturado")
+
+    engine = PyMuPDFTextEngine(parallel_min_pages=2, pool=SimpleNamespace(max_workers=2, run_many=_falla))
+
+    inspection = _inspeccionar(engine, _pdf(3))
+
+    assert len(inspection.page_texts) == 3
+    assert inspection.complete is True
@@ -0,0 +1,73 @@
+import time
+from unittest import mock
+
+import pytest
+
+from app.config import process_pool
+from app.config.process_pool import CPUProcessPool
+
+
+@pytest.fixture
+def pool():
+
+    pool = CPUProcessPool(max_workers=2, task_timeout=5)
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_no_interrumpe_otras_tareas_en_curso(pool):
+
+    colgada = pool.submit(time.sleep, 3)
+    otra = pool.submit(pow, 2, 10)
+    time.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        pool.result(colgada, timeout=0.1)
+
+    assert pool.result(otra) == 1024
+    assert pool.run(pow, 3, 2) == 9
+
+
+def test_timeout_en_cola_cancela_solo_esa_tarea():
+
+    pool = CPUProcessPool(max_workers=1, task_timeout=5)
+    try:
+        # El ejecutor adelanta una tarea extra a la cola de llamadas; la tercera sigue pendiente.
+        ocupada = pool.submit(time.sleep, 1)
+        pool.submit(pow, 2, 2)
+        en_cola = pool.submit(pow, 2, 3)
+        executor = ocupada[0]
+
+        with pytest.raises(TimeoutError):
+            pool.result(en_cola, timeout=0.1)
+
+        assert en_cola[1].cancelled()
+        assert pool.result(ocupada) is None
+        assert pool._executor is executor
+    finally:
+        pool.shutdown()
+
+
+def test_memoria_bajo_el_limite_no_recicla(pool):
+
+    pool.max_rss_mb = 10_000
+    executor = pool.submit(pow, 2, 2)[0]
+    pool.run(pow, 2, 2)
+    assert pool._executor is executor
+
+
+def test_memoria_sobre_el_limite_recicla(pool):
+
+    pool.max_rss_mb = 1
+    executor = pool.submit(pow, 2, 2)[0]
+    pool.run(pow, 2, 2)
+    assert pool._executor is not executor
+
+
+def test_rss_actual_sin_proc_no_recicla():
+
+    with mock.patch("builtins.open", side_effect=OSError):
+        assert process_pool._current_rss_mb() is None
+    assert process_pool._current_rss_mb() > 0
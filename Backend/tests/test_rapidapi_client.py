@@ -0,0 +1,67 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from app.clients import RapidAPIClient
+
+
+def _respuesta(status_code: int, valor: str = "", headers=None):
+
+    respuesta = mock.Mock(status_code=status_code, headers=headers or {})
+    respuesta.json.return_value = {"value": valor}
+    return respuesta
+
+
+def test_ocr_multiple_images_concurrente_conserva_el_orden():
+
+    cliente = RapidAPIClient()
+    cliente.max_concurrency = 4
+    activas = {"actual": 0, "max": 0}
+    lock = threading.Lock()
+
+    def _ocr(img_bytes, session_id=None):
+        with lock:
+            activas["actual"] += 1
+            activas["max"] = max(activas["max"], activas["actual"])
+        time.sleep(0.05)
+        with lock:
+            activas["actual"] -= 1
+        return img_bytes.decode()
+
+    with mock.patch.object(cliente, "ocr_image", side_effect=_ocr):
+        resultados = cliente.ocr_multiple_images([f"p{i}".encode() for i in range(6)])
+
+    assert resultados == [f"p{i}" for i in range(6)]
+    assert 1 < activas["max"] <= 4
+
+
+def test_http_429_se_reintenta_respetando_retry_after():
+
+    cliente = RapidAPIClient()
+    cliente.max_retries = 2
+    cliente.rate_limiter = SimpleNamespace(acquire=lambda: None)
+    cliente.session = mock.Mock()
+    cliente.session.post.side_effect = [_respuesta(429, headers={"Retry-After": "0"}), _respuesta(200, "hola")]
+
+    with mock.patch("app.clients.rapidapi_client.time.sleep") as sleep:
+        assert cliente.ocr_image(b"imagen") == "hola"
+
+    assert cliente.session.post.call_count == 2
+    sleep.assert_called_once_with(0.0)
+
+
+def test_error_persistente_devuelve_none():
+
+    cliente = RapidAPIClient()
+    cliente.max_retries = 1
+    cliente.rate_limiter = SimpleNamespace(acquire=lambda: None)
+    cliente.session = mock.Mock()
+    fallo = _respuesta(503)
+    fallo.raise_for_status.side_effect = RuntimeError("503")
+    cliente.session.post.return_value = fallo
+
+    with mock.patch("app.clients.rapidapi_client.time.sleep"):
+        assert cliente.ocr_image(b"imagen") is None
+
+    assert cliente.session.post.call_count == 2
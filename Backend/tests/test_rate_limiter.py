@@ -0,0 +1,50 @@
+import pytest
+
+from app.clients.rate_limiter import TokenBucket
+
+
+def test_consume_descuenta_sin_esperar_y_puede_quedar_en_negativo():
+
+    bucket = TokenBucket(rate_per_second=1.0, capacity=10)
+    bucket.consume(15)
+
+    assert bucket._tokens < 0
+    with pytest.raises(TimeoutError):
+        bucket.acquire(1, timeout=0.01)
+
+
+def test_consume_ajusta_la_estimacion_con_el_uso_real():
+
+    bucket = TokenBucket(rate_per_second=0.001, capacity=100)
+    bucket.acquire(40)
+    bucket.consume(25 - 40)
+
+    assert bucket._tokens == pytest.approx(75, abs=0.1)
+
+
+def test_acquire_con_plazo_no_descuenta_si_no_alcanza():
+
+    bucket = TokenBucket(rate_per_second=0.1, capacity=2)
+    bucket.acquire(2)
+    antes = bucket._tokens
+
+    with pytest.raises(TimeoutError):
+        bucket.acquire(1, timeout=0.05)
+    assert bucket._tokens == pytest.approx(antes, abs=0.01)
+
+
+def test_release_limita_a_la_capacidad():
+
+    bucket = TokenBucket(rate_per_second=1.0, capacity=4)
+    bucket.acquire(4)
+    bucket.release(10)
+
+    assert bucket._tokens == 4
+
+
+def test_sin_tasa_no_limita():
+
+    bucket = TokenBucket(rate_per_second=0, capacity=1)
+    bucket.consume(50)
+
+    assert bucket.acquire(100) == 0.0
@@ -0,0 +1,69 @@
+from app.extractors import StudentNameMatcher
+
+ALUMNOS = ["García Pérez, Ana", "Quispe Mamani, Luis", "Torres Díaz, María"]
+
+
+def test_asigna_cada_caratula_a_un_alumno_distinto():
+
+    textos = [
+        "Examen parcial\nAlumno: Torres Diaz Maria\nCurso: Física",
+        "Alumno: Garcia Perez Ana",
+        "Estudiante: Quispe Mamani Luis"
+    ]
+
+    asignaciones = StudentNameMatcher().assign_students(textos, ALUMNOS)
+
+    assert [a[0] for a in asignaciones] == ["Torres Díaz, María", "García Pérez, Ana", "Quispe Mamani, Luis"]
+    assert all(a[1] >= 70 for a in asignaciones)
+
+
+def test_un_alumno_no_se_asigna_dos_veces():
+
+    textos = ["Alumno: Garcia Perez Ana", "Alumno: Garcia Perez Ana"]
+
+    asignaciones = StudentNameMatcher().assign_students(textos, ALUMNOS)
+
+    nombres = [a[0] for a in asignaciones if a]
+    assert nombres.count("García Pérez, Ana") == 1
+
+
+def test_caratula_ilegible_queda_sin_asignar():
+
+    textos = ["Alumno: Garcia Perez Ana", None, "xx"]
+
+    asignaciones = StudentNameMatcher().assign_students(textos, ALUMNOS)
+
+    assert asignaciones[0][0] == "García Pérez, Ana"
+    assert asignaciones[1] is None
+
+
+def test_ultima_caratula_se_asigna_por_descarte():
+
+    textos = ["Alumno: Garcia Perez Ana", "Alumno: Quispe Mamani Luis", "Alumno: ilegible"]
+
+    asignaciones = StudentNameMatcher().assign_students(textos, ALUMNOS)
+
+    assert asignaciones[2][0] == "Torres Díaz, María"
+
+
+def test_listas_vacias():
+
+    matcher = StudentNameMatcher()
+
+    assert matcher.assign_students([], ALUMNOS) == []
+    assert matcher.assign_students(["Alumno: Ana"], []) == [None]
+
+
+def test_cache_de_listas_es_segura_entre_hilos():
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    matcher = StudentNameMatcher(max_cached_rosters=2)
+    listas = [ALUMNOS[:n] for n in (1, 2, 3)] * 50
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        indices = list(executor.map(matcher.build_index, listas))
+
+    assert len(indices) == len(listas)
+    assert len(matcher._roster_cache) <= 2
+    assert matcher.build_index(ALUMNOS) is matcher.build_index(list(ALUMNOS))
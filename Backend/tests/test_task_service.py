@@ -0,0 +1,43 @@
+from unittest import mock
+
+from app.services import TaskService
+
+
+def _tarea(evaluacion_id: int) -> dict:
+
+    return {
+        'gcs_filename': f"examen_{evaluacion_id}.pdf",
+        'original_filename': f"examen_{evaluacion_id}.pdf",
+        'evaluacion_id': evaluacion_id,
+        'tipo_documento': "examen"
+    }
+
+
+def test_create_file_tasks_informa_cada_resultado_y_separa_fallos():
+
+    def _crear(**kwargs):
+        if kwargs['evaluacion_id'] == 2:
+            raise RuntimeError("cuota excedida")
+        return f"tarea-{kwargs['evaluacion_id']}"
+
+    task_client = mock.Mock()
+    task_client.create_file_processing_task.side_effect = _crear
+    resultados = []
+
+    resumen = TaskService(task_client).create_file_tasks(
+        [_tarea(i) for i in (1, 2, 3)],
+        max_workers=3,
+        on_result=resultados.append
+    )
+
+    assert sorted(r['evaluacion_id'] for r in resultados) == [1, 2, 3]
+    assert [r['task_name'] for r in resumen['creadas']] == ["tarea-1", "tarea-3"]
+    assert resumen['fallidas'] == [{'evaluacion_id': 2, 'task_name': None, 'error': "cuota excedida"}]
+
+
+def test_create_file_tasks_sin_tareas_no_llama_al_cliente():
+
+    task_client = mock.Mock()
+
+    assert TaskService(task_client).create_file_tasks([]) == {'creadas': [], 'fallidas': []}
+    task_client.create_file_processing_task.assert_not_called()